@@ -0,0 +1,833 @@
+"""Benchmarks hors-ligne de getPrevNaviresPapeete (pages servies en local).
+
+Chaque sous-commande imprime un résumé JSON (médiane, min, max en secondes).
+
+Exemples:
+  - Démarrage à froid vs démon chaud:  python bench_papeete.py daemon --runs 5
+  - Blocage des ressources:            python bench_papeete.py block --images 40
+  - Stratégies d'attente:              python bench_papeete.py wait --delay-ms 800
+  - Débit multi-URL (async):           python bench_papeete.py concurrency --urls 16
+  - Charge utile des evaluate():       python bench_papeete.py payload --decoys 60
+  - textContent vs innerText:          python bench_papeete.py textmode --rows 1000
+  - textContent vs innerText (HAR):    python bench_papeete.py textmode --har papeete.har
+  - Appariement des escales:           python bench_papeete.py calls --rows 1000000
+  - Mémoire dicts vs colonnes typées:  python bench_papeete.py records --rows 1000000
+  - Dates en bloc vs strptime:         python bench_papeete.py dates --rows 1000000
+  - Relecture JSON vs Parquet/Arrow:   python bench_papeete.py columnar --rows 200000
+  - NDJSON vs JSON indenté:            python bench_papeete.py ndjson --rows 200000
+  - Projection de colonnes (large):    python bench_papeete.py headers --cols 200 --rows 20000
+  - Projection/filtre dans la page:    python bench_papeete.py projection --rows 5000
+  - Suite de référence (enregistrer):  python bench_papeete.py suite --save bench-baseline.json
+  - Suite de référence (comparer):     python bench_papeete.py suite --compare bench-baseline.json
+  - Relevé réel rejoué (HAR):          python bench_papeete.py suite --replay-har papeete.har
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from playwright.sync_api import sync_playwright
+
+import getPrevNaviresPapeete as gp
+import papeete_daemon
+from fixtures_papeete import (
+    HEADERS,
+    FixtureServer,
+    add_asset_routes,
+    build_api_page,
+    build_api_payload,
+    build_delayed_page,
+    build_forecast_page,
+    build_frame_document,
+    build_recorded_page,
+    synthetic_rows,
+)
+from papeete_calls import pair_calls
+import papeete_arrow
+import papeete_dates
+import papeete_ndjson
+from papeete_fields import find_field, iso_datetime
+from papeete_records import MovementColumns
+
+
+HERE = Path(__file__).resolve().parent
+# Relevé réel de la page (250 lignes) servi tel quel par la suite de référence
+RECORDED_CSV = HERE / "out.csv"
+SUITE_VERSION = 1
+
+
+# Chronomètre `fn` sur `runs` exécutions et résume les durées.
+def _timeit(fn: Callable[[], Any], runs: int) -> Dict[str, Any]:
+    durations: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return {
+        "runs": runs,
+        "median_s": round(statistics.median(durations), 4),
+        "min_s": round(min(durations), 4),
+        "max_s": round(max(durations), 4),
+    }
+
+
+# Compare un scraping à froid (lancement local) et via le démon persistant.
+def bench_daemon(args: argparse.Namespace) -> Dict[str, Any]:
+    with FixtureServer() as srv:
+        url = srv.add_page("/previsions", build_forecast_page(rows=args.rows))
+        job = {"url": url, "timeout": 15000}
+
+        cold = _timeit(lambda: gp._run_in_process(job, headless=True), args.runs)
+
+        daemon = subprocess.Popen(
+            [sys.executable, str(HERE / "getPrevNaviresPapeete.py"), "--daemon",
+             "--daemon-port", str(args.port), "--log-level", "WARNING"],
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not papeete_daemon.ping(port=args.port):
+                if time.monotonic() > deadline or daemon.poll() is not None:
+                    raise RuntimeError("le démon n'a pas démarré")
+                time.sleep(0.2)
+            host = papeete_daemon.DEFAULT_DAEMON_HOST
+            warm = _timeit(lambda: papeete_daemon.request_scrape(host, args.port, job), args.runs)
+        finally:
+            papeete_daemon.shutdown(port=args.port)
+            daemon.wait(timeout=30)
+
+    return {
+        "benchmark": "daemon",
+        "rows": args.rows,
+        "cold": cold,
+        "warm": warm,
+        "speedup": round(cold["median_s"] / warm["median_s"], 2) if warm["median_s"] else None,
+    }
+
+
+# Compare un chargement complet et un chargement avec la politique de blocage par défaut.
+def bench_block(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"benchmark": "block", "images": args.images}
+    with FixtureServer() as srv:
+        url = srv.add_page("/previsions", build_forecast_page(rows=args.rows, images=args.images))
+        add_asset_routes(srv, args.images)
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            for label, allow in (("unblocked", ["all"]), ("blocked", None)):
+                # "metrics": octets reçus mesurés (request.sizes()), comme avec --metrics
+                job = {"url": url, "timeout": 15000, "block": None, "allow": allow, "metrics": True}
+                networks: List[Dict[str, Any]] = []
+
+                def _run() -> None:
+                    # Contexte neuf à chaque run: pas de cache HTTP partagé entre mesures
+                    context = browser.new_context(locale="fr-FR")
+                    try:
+                        best = gp._scrape_page(context.new_page(), job)
+                        networks.append(best["network"])
+                    finally:
+                        context.close()
+
+                timing = _timeit(_run, args.runs)
+                timing["network"] = networks[-1]
+                results[label] = timing
+            browser.close()
+    unblocked, blocked = results["unblocked"], results["blocked"]
+    results["bytes_saved"] = unblocked["network"]["bytes_received"] - blocked["network"]["bytes_received"]
+    results["requests_saved"] = (
+        unblocked["network"]["requests_completed"] - blocked["network"]["requests_completed"]
+    )
+    return results
+
+
+# Temps jusqu'aux données pour chaque --wait-strategy sur une page remplie en différé.
+def bench_wait(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"benchmark": "wait", "delay_ms": args.delay_ms, "slow_ms": args.slow_ms}
+    page_html = build_delayed_page(rows=args.rows, delay_ms=args.delay_ms, slow_ms=args.slow_ms)
+    with FixtureServer() as srv:
+        url = srv.add_page("/previsions", page_html)
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            for strategy in gp.WAIT_STRATEGIES:
+                job = {"url": url, "timeout": 15000, "wait_strategy": strategy, "min_rows": gp.DEFAULT_MIN_ROWS}
+                row_counts: List[int] = []
+
+                def _run() -> None:
+                    context = browser.new_context(locale="fr-FR")
+                    try:
+                        best = gp._scrape_page(context.new_page(), job)
+                        row_counts.append(best["rowCount"] if best else 0)
+                    finally:
+                        context.close()
+
+                timing = _timeit(_run, args.runs)
+                timing["rows_seen"] = row_counts
+                results[strategy] = timing
+            browser.close()
+    return results
+
+
+# Débit du moteur asynchrone selon --concurrency, sur `urls` pages locales distinctes.
+def bench_concurrency(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"benchmark": "concurrency", "urls": args.urls, "rows": args.rows}
+    with FixtureServer() as srv:
+        # Rangées injectées après un délai: chaque page coûte un peu d'attente, comme en réel
+        urls = [
+            srv.add_page(f"/previsions/{i}", build_delayed_page(rows=args.rows, delay_ms=args.delay_ms))
+            for i in range(args.urls)
+        ]
+        for concurrency in args.levels:
+            jobs = [{"url": u, "timeout": 15000, "wait_strategy": "table"} for u in urls]
+            started = time.perf_counter()
+            outcomes = asyncio.run(gp._scrape_many(jobs, "browser", concurrency, headless=True))
+            elapsed = time.perf_counter() - started
+            results[f"c{concurrency}"] = {
+                "seconds": round(elapsed, 3),
+                "urls_per_s": round(len(urls) / elapsed, 2),
+                "failures": sum(1 for best, _err in outcomes if not best),
+            }
+    return results
+
+
+# Extraction complète (tous les tableaux) vs résumés + lignes du seul tableau retenu.
+def bench_payload(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"benchmark": "payload", "rows": args.rows, "decoys": args.decoys}
+    with FixtureServer() as srv:
+        url = srv.add_page("/previsions", build_forecast_page(rows=args.rows, decoys=args.decoys))
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.goto(url, wait_until="load")
+            sizes: Dict[str, int] = {}
+
+            def _full() -> None:
+                tables = [gp._collect_tables_from_frame(f) for f in page.frames]
+                sizes["full"] = len(json.dumps(tables, ensure_ascii=False).encode("utf-8"))
+
+            def _two_phase() -> None:
+                summaries = [f.evaluate(gp._SUMMARIZE_TABLES_JS, gp._extraction_options()) for f in page.frames]
+                best = gp._find_best_table(page)[0]
+                rows = best["rows"]
+                sizes["two_phase"] = len(json.dumps([summaries, rows], ensure_ascii=False).encode("utf-8"))
+
+            results["full"] = _timeit(_full, args.runs)
+            results["full"]["payload_bytes"] = sizes["full"]
+            # Chronométrage du chemin réel (_find_best_table), taille mesurée à part
+            _two_phase()
+            results["two_phase"] = _timeit(lambda: gp._find_best_table(page), args.runs)
+            results["two_phase"]["payload_bytes"] = sizes["two_phase"]
+            browser.close()
+    return results
+
+
+# Équivalence des deux modes de lecture sur les pages fixtures (et un relevé réel --har),
+# puis durée sur un grand tableau.
+def bench_textmode(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"benchmark": "textmode", "rows": args.rows}
+    with FixtureServer() as srv:
+        srv.add_page("/api/previsions", build_api_payload(rows=250), content_type="application/json")
+        fixtures = {
+            "plain": srv.add_page("/plain", build_forecast_page(rows=250, decoys=5)),
+            "rich": srv.add_page("/rich", build_forecast_page(rows=250, rich=True)),
+            "delayed": srv.add_page("/delayed", build_delayed_page(rows=250, delay_ms=0)),
+            "api": srv.add_page("/api", build_api_page()),
+        }
+        large = srv.add_page("/large", build_forecast_page(rows=args.rows, rich=True))
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            equivalence: Dict[str, bool] = {}
+            for name, url in fixtures.items():
+                page.goto(url, wait_until="networkidle")
+                extracted = [
+                    gp._find_best_table(page, {"textMode": mode})[0]["rows"] for mode in gp.TEXT_MODES
+                ]
+                equivalence[name] = extracted[0] == extracted[1]
+            if args.har:
+                differences = _textmode_differences_har(browser, args.har)
+                equivalence["har"] = not differences
+                results["har_differences"] = differences[:5]
+            results["equivalent"] = equivalence
+
+            page.goto(large, wait_until="load")
+            best = gp._find_best_table(page)[0]
+            frame = page.main_frame
+            results["cells"] = best["rowCount"] * best["colCount"]
+            for mode in gp.TEXT_MODES:
+                options = {"textMode": mode}
+                results[mode] = _timeit(lambda: gp._fetch_table_rows(frame, best["index"], options), args.runs)
+            browser.close()
+    return results
+
+
+# Lignes qui diffèrent entre les deux modes sur un relevé réel rejoué (CSS de la page compris).
+def _textmode_differences_har(browser, har_path: str) -> List[Dict[str, Any]]:
+    with open(har_path, encoding="utf-8") as f:
+        url = json.load(f)["log"]["entries"][0]["request"]["url"]
+    page = browser.new_page()
+    try:
+        page.route_from_har(har_path, not_found="abort")
+        page.goto(url, wait_until="load")
+        rows = {mode: gp._find_best_table(page, {"textMode": mode})[0]["rows"] for mode in gp.TEXT_MODES}
+    finally:
+        page.close()
+    text, inner = rows["textContent"], rows["innerText"]
+    return [
+        {"row": i, "textContent": text[i] if i < len(text) else None, "innerText": inner[i] if i < len(inner) else None}
+        for i in range(max(len(text), len(inner)))
+        if text[i:i + 1] != inner[i:i + 1]
+    ]
+
+
+# Appariement naïf (boucles imbriquées), référence pour --naive-rows.
+def _pair_calls_naive(headers: List[str], records: List[Dict[str, str]]) -> int:
+    f_date, f_vessel = headers[0], headers[1]
+    f_arrival, f_departure = find_field(headers, "arrivée"), find_field(headers, "départ")
+    used = set()
+    calls = 0
+    for rec in records:
+        if not rec[f_arrival]:
+            continue
+        ts = iso_datetime(rec[f_date])
+        best = None
+        for j, other in enumerate(records):
+            if j in used or not other[f_departure] or other[f_vessel] != rec[f_vessel]:
+                continue
+            other_ts = iso_datetime(other[f_date])
+            if other_ts >= ts and (best is None or other_ts < best[1]):
+                best = (j, other_ts)
+        if best:
+            used.add(best[0])
+        calls += 1
+    return calls
+
+
+# Appariement des escales sur un historique synthétique de plusieurs années.
+def bench_calls(args: argparse.Namespace) -> Dict[str, Any]:
+    started = time.perf_counter()
+    headers, records = gp._to_records({"headers": HEADERS, "rows": synthetic_rows(args.rows, seed=7)})
+    generated_s = time.perf_counter() - started
+    calls = pair_calls(headers, records)
+    span = [c["arrival"] or c["departure"] for c in (calls[0], calls[-1])]
+    result: Dict[str, Any] = {
+        "rows": len(records),
+        "calls": len(calls),
+        "unmatched": sum(1 for c in calls if c["arrival"] is None or c["departure"] is None),
+        "span": span,
+        "generate_s": round(generated_s, 2),
+        "sweep": _timeit(lambda: pair_calls(headers, records), args.runs),
+    }
+    if args.naive_rows:
+        sample = records[: args.naive_rows]
+        result["naive_sample_rows"] = len(sample)
+        result["sweep_sample"] = _timeit(lambda: pair_calls(headers, sample), args.runs)
+        result["naive_sample"] = _timeit(lambda: _pair_calls_naive(headers, sample), 1)
+    return result
+
+
+# Empreinte mémoire par ligne: liste de dicts (_to_records) vs MovementColumns.
+def bench_records(args: argparse.Namespace) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    rows = synthetic_rows(args.rows, seed=7)
+    started = time.perf_counter()
+    headers, records = gp._to_records({"headers": HEADERS, "rows": rows})
+    to_records_s = time.perf_counter() - started
+    # Les dicts ne gardent que les cellules des colonnes conservées
+    del rows
+    gc.collect()
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+    started = time.perf_counter()
+    columns = MovementColumns.from_records(headers, records)
+    encode_s = time.perf_counter() - started
+    expected = records
+    del records
+    gc.collect()
+    column_bytes = tracemalloc.get_traced_memory()[0] - base - dict_bytes
+    tracemalloc.stop()
+    started = time.perf_counter()
+    restored = columns.to_records()
+    decode_s = time.perf_counter() - started
+    return {
+        "rows": len(columns),
+        "round_trip_ok": restored == expected,
+        "exceptions": len(columns.raw),
+        "dicts_bytes_per_row": round(dict_bytes / len(columns), 1),
+        "columns_bytes_per_row": round(column_bytes / len(columns), 1),
+        "to_records_s": round(to_records_s, 2),
+        "from_records_s": round(encode_s, 2),
+        "to_dicts_s": round(decode_s, 2),
+    }
+
+
+# Analyse de la colonne Date: strptime ligne à ligne vs découpage en bloc (et NumPy si présent).
+def bench_dates(args: argparse.Namespace) -> Dict[str, Any]:
+    values = [row[0] for row in synthetic_rows(args.rows, seed=7)]
+
+    def _strptime() -> List[datetime]:
+        tz = papeete_dates.TAHITI
+        return [datetime.strptime(v, "%d/%m/%Y - %H:%M").replace(tzinfo=tz) for v in values]
+
+    result: Dict[str, Any] = {
+        "rows": len(values),
+        "distinct_days": len({v[:10] for v in values}),
+        "same_result": _strptime() == papeete_dates.datetime_column(values),
+        "strptime": _timeit(_strptime, args.runs),
+        "minutes_column": _timeit(lambda: papeete_dates.minutes_column(values), args.runs),
+        "datetime_column": _timeit(lambda: papeete_dates.datetime_column(values), args.runs),
+    }
+    if papeete_dates.np is not None:
+        result["datetime64_column"] = _timeit(lambda: papeete_dates.datetime64_column(values), args.runs)
+    return result
+
+
+# Écriture et relecture d'un historique: JSON indenté (sortie actuelle) vs Parquet et Arrow IPC.
+def bench_columnar(args: argparse.Namespace) -> Dict[str, Any]:
+    papeete_arrow.require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    headers, records = gp._to_records({"headers": HEADERS, "rows": synthetic_rows(args.rows, seed=7)})
+    out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = {fmt: out / f"bench.{fmt}" for fmt in ("json", "parquet", "arrow")}
+
+    def _write_json() -> None:
+        with open(paths["json"], "w", encoding="utf-8") as f:
+            json.dump({"meta": {"headers": headers}, "records": records}, f, ensure_ascii=False, indent=2)
+
+    def _read_json() -> None:
+        with open(paths["json"], "r", encoding="utf-8") as f:
+            json.load(f)
+
+    def _read_arrow() -> None:
+        with pa.memory_map(str(paths["arrow"])) as source:
+            pa.ipc.open_file(source).read_all()
+
+    result: Dict[str, Any] = {"rows": len(records)}
+    result["json_write"] = _timeit(_write_json, args.runs)
+    result["table_build"] = _timeit(lambda: papeete_arrow.movements_table(headers, records), args.runs)
+    table = papeete_arrow.movements_table(headers, records)
+    for fmt in papeete_arrow.FORMATS:
+        result[f"{fmt}_write"] = _timeit(lambda: papeete_arrow.write_table(table, str(paths[fmt]), fmt), args.runs)
+    result["json_read"] = _timeit(_read_json, args.runs)
+    result["parquet_read"] = _timeit(lambda: pq.read_table(paths["parquet"]), args.runs)
+    result["arrow_read"] = _timeit(_read_arrow, args.runs)
+    result["bytes"] = {fmt: path.stat().st_size for fmt, path in paths.items()}
+    return result
+
+
+# Sérialisation: JSON indenté actuel vs NDJSON compact (json, puis orjson si installé).
+def bench_ndjson(args: argparse.Namespace) -> Dict[str, Any]:
+    headers, records = gp._to_records({"headers": HEADERS, "rows": synthetic_rows(args.rows, seed=7)})
+    meta = {"headers": headers, "row_count": len(records)}
+
+    def _indented() -> str:
+        return json.dumps({"meta": meta, "records": records}, ensure_ascii=False, indent=2)
+
+    def _ndjson(backend: str) -> Callable[[], str]:
+        encode = papeete_ndjson.line_encoder(backend)
+        return lambda: encode({"meta": meta}) + "".join(encode(rec) for rec in records)
+
+    result: Dict[str, Any] = {
+        "rows": len(records),
+        "indent2": _timeit(_indented, args.runs),
+        "ndjson_json": _timeit(_ndjson("json"), args.runs),
+    }
+    sizes = {"indent2": len(_indented().encode("utf-8")), "ndjson": len(_ndjson("json")().encode("utf-8"))}
+    if papeete_ndjson.orjson is not None:
+        result["ndjson_orjson"] = _timeit(_ndjson("orjson"), args.runs)
+        result["orjson_identical"] = _ndjson("orjson")() == _ndjson("json")()
+    result["bytes"] = sizes
+    return result
+
+
+# Ancienne vérification: chaque entrée de IGNORED_HEADERS renormalisée à chaque appel.
+def _should_ignore_header_naive(name: str) -> bool:
+    norm = gp._normalize_header.__wrapped__(name)
+    return any(gp._normalize_header.__wrapped__(h) == norm for h in gp.IGNORED_HEADERS)
+
+
+# Ancienne conversion: indices recalculés par en-tête, liste intermédiaire par ligne.
+def _to_records_naive(table: Dict[str, Any]) -> tuple:
+    headers, rows = table["headers"], table["rows"]
+    orig_len = len(headers)
+    keep_indices = [i for i, h in enumerate(headers) if not _should_ignore_header_naive(h)]
+    headers = [headers[i] for i in keep_indices]
+    records = []
+    for r in rows:
+        if len(r) < orig_len:
+            r = r + [""] * (orig_len - len(r))
+        elif len(r) > orig_len:
+            r = r[: orig_len - 1] + [" | ".join(r[orig_len - 1 :])]
+        r = [r[i] for i in keep_indices]
+        records.append(dict(zip(headers, r)))
+    return headers, records
+
+
+# Tableau large: colonnes de la page puis colonnes supplémentaires (dont des variantes ignorées).
+def _wide_table(cols: int, rows: int) -> Dict[str, Any]:
+    extra = [f"N° Escale {i}" if i % 10 == 0 else f"Colonne {i}" for i in range(max(0, cols - len(HEADERS)))]
+    headers = HEADERS + extra + ["agent"]
+    body = [r + [f"v{j}" for j in range(len(extra))] + ["AGENCE"] for r in synthetic_rows(rows, seed=7)]
+    return {"headers": headers, "rows": body}
+
+
+# Vérification des en-têtes ignorés et projection de colonnes sur un tableau large.
+def bench_headers(args: argparse.Namespace) -> Dict[str, Any]:
+    table = _wide_table(args.cols, args.rows)
+    headers = table["headers"]
+    # Ensemble de relevés successifs: les mêmes en-têtes reviennent à chaque tableau
+    checks = headers * args.repeat
+    selected = ["Date", "Navire", "type", "Quai", "Colonne 5"]
+    result: Dict[str, Any] = {
+        "rows": args.rows,
+        "cols": len(headers),
+        "same_result": _to_records_naive(table) == gp._to_records(table),
+        "ignore_check_naive": _timeit(lambda: [_should_ignore_header_naive(h) for h in checks], args.runs),
+        "ignore_check": _timeit(lambda: [gp._should_ignore_header(h) for h in checks], args.runs),
+        "to_records_naive": _timeit(lambda: _to_records_naive(table), args.runs),
+        "to_records": _timeit(lambda: gp._to_records(table), args.runs),
+        "to_records_columns": _timeit(lambda: gp._to_records(table, selected), args.runs),
+        "kept_columns": len(gp._to_records({"headers": headers, "rows": []})[0]),
+        "selected_columns": gp._to_records({"headers": headers, "rows": []}, selected)[0],
+    }
+    return result
+
+
+# Lecture des lignes dans la page: toutes les cellules vs colonnes projetées (défaut, --columns)
+# et lignes filtrées par type (--type-only PAQUEBOT).
+def bench_projection(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"benchmark": "projection", "rows": args.rows}
+    variants = {
+        "full": {"project": False},
+        "default": {},
+        "columns": {"columns": [args.columns]},
+        "types": {"types": ["PAQUEBOT"]},
+    }
+    with FixtureServer() as srv:
+        url = srv.add_page("/previsions", build_forecast_page(rows=args.rows, rich=True))
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.goto(url, wait_until="load")
+            frame = page.main_frame
+            summary = gp._summarize_tables_in_frame(frame, gp._extraction_options())
+            # Référence: lignes complètes projetées en Python par _to_records
+            full_rows = gp._fetch_table_rows(frame, summary["index"], {**gp._extraction_options(), "project": False})
+            reference = gp._to_records({"headers": summary["headers"], "rows": full_rows}, [args.columns])
+            for name, job in variants.items():
+                options = gp._rows_options(summary, {**gp._extraction_options(), **job})
+                rows = gp._fetch_table_rows(frame, summary["index"], options)
+                timing = _timeit(lambda: gp._fetch_table_rows(frame, summary["index"], options), args.runs)
+                timing["columns"] = len(options.get("keep") or summary["headers"])
+                timing["payload_bytes"] = len(json.dumps(rows, ensure_ascii=False).encode("utf-8"))
+                results[name] = timing
+                if name == "columns":
+                    best = {"headers": summary["headers"], "rows": rows}
+                    gp._mark_projected(best, options)
+                    results["columns_same_records"] = gp._to_records(best, [args.columns]) == reference
+            browser.close()
+    results["payload_saved"] = round(1 - results["default"]["payload_bytes"] / results["full"]["payload_bytes"], 3)
+    return results
+
+
+# Durées de `runs` exécutions de `fn`, après `warmup` exécutions non comptées.
+def _sample(fn: Callable[[], Any], runs: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    durations: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+# Médiane et percentiles d'une série de durées (en secondes).
+def _distribution(durations: List[float]) -> Dict[str, Any]:
+    ordered = sorted(durations)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=20, method="inclusive")
+        p90, p95 = cuts[17], cuts[18]
+    else:
+        p90 = p95 = ordered[0]
+    return {
+        "runs": len(ordered),
+        "median_s": round(statistics.median(ordered), 6),
+        "p90_s": round(p90, 6),
+        "p95_s": round(p95, 6),
+        "min_s": round(ordered[0], 6),
+        "max_s": round(ordered[-1], 6),
+    }
+
+
+# Pages de la suite: relevé réel, tableau en iframe, tableaux parasites, grand tableau.
+def _suite_pages(srv: FixtureServer, large_rows: int) -> Dict[str, str]:
+    pages = {}
+    if RECORDED_CSV.exists():
+        pages["recorded"] = srv.add_page("/recorded", build_recorded_page(str(RECORDED_CSV)))
+    srv.add_page("/frame", build_frame_document(rows=250))
+    pages["iframe"] = srv.add_page("/iframe", build_forecast_page(iframe_src="/frame"))
+    pages["decoys"] = srv.add_page("/decoys", build_forecast_page(rows=250, decoys=60))
+    pages["large"] = srv.add_page("/large", build_forecast_page(rows=large_rows))
+    return pages
+
+
+# Appelle main() dans ce processus avec les arguments donnés (sans démarrage de l'interpréteur).
+def _run_main(argv: List[str]) -> None:
+    saved = sys.argv
+    sys.argv = ["getPrevNaviresPapeete.py", *argv]
+    try:
+        gp.main()
+    except SystemExit as exc:
+        if exc.code:
+            raise RuntimeError(f"main() a échoué (code {exc.code}): {' '.join(argv)}") from None
+    finally:
+        sys.argv = saved
+
+
+# Mesures d'une page: extraction dans le navigateur, chemin HTTP, _to_records et main() complet.
+def _suite_scenario(args: argparse.Namespace, url: str, browser, out: Path) -> Dict[str, Any]:
+    measures: Dict[str, List[float]] = {}
+    job = {"url": url, "timeout": 15000}
+    best = None
+    if browser is not None:
+        page = browser.new_page()
+        try:
+            page.goto(url, wait_until="load")
+            measures["collect_tables_from_frame"] = _sample(
+                lambda: [gp._collect_tables_from_frame(f) for f in page.frames], args.runs, args.warmup
+            )
+            measures["find_best_table"] = _sample(lambda: gp._find_best_table(page), args.runs, args.warmup)
+            best = gp._find_best_table(page)[0]
+        finally:
+            page.close()
+    measures["http_extract"] = _sample(lambda: gp._fetch_best_table_http(job), args.runs, args.warmup)
+    best = best or gp._fetch_best_table_http(job)
+    if best is None:
+        # Tableau rempli par JavaScript, sans navigateur (--skip-browser): scénario noté sauté,
+        # ses mesures manquantes apparaissent dans « missing » de la comparaison
+        return {
+            "rows": 0,
+            "skipped": "aucun tableau sans navigateur",
+            **{name: _distribution(d) for name, d in measures.items()},
+        }
+    measures["to_records"] = _sample(lambda: gp._to_records(best), args.runs, args.warmup)
+
+    common = ["--url", url, "--json", str(out / "suite-main.json"), "--log-level", "WARNING"]
+    engines = ["http"] if browser is None else ["http", "browser"]
+    for engine in engines:
+        argv = common + ["--engine", engine, "--no-daemon"]
+        measures[f"main_{engine}"] = _sample(lambda: _run_main(argv), args.main_runs, min(args.warmup, 1))
+    return {"rows": best["rowCount"], **{name: _distribution(d) for name, d in measures.items()}}
+
+
+# main() complet sur un relevé réel rejoué depuis une archive HAR (sans réseau).
+def _suite_har(args: argparse.Namespace, out: Path) -> Dict[str, Any]:
+    with open(args.replay_har, encoding="utf-8") as f:
+        # Première entrée: le document chargé par page.goto()
+        url = json.load(f)["log"]["entries"][0]["request"]["url"]
+    argv = ["--url", url, "--replay-har", args.replay_har, "--json", str(out / "suite-har.json"),
+            "--no-daemon", "--log-level", "WARNING"]
+    measures = {}
+    for latency in ("zero", "recorded"):
+        durations = _sample(lambda: _run_main(argv + ["--har-latency", latency]), args.main_runs, min(args.warmup, 1))
+        measures[f"main_replay_{latency}"] = _distribution(durations)
+    return measures
+
+
+# Met à plat {scénario: {mesure: distribution}} en {"scénario.mesure": distribution}.
+def _flatten(scenarios: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        f"{name}.{metric}": value
+        for name, measures in scenarios.items()
+        for metric, value in measures.items()
+        if isinstance(value, dict)
+    }
+
+
+# Compare les médianes à la référence; régression si plus lente de `threshold` et d'au moins `min_delta_s`.
+def _compare_suite(
+    baseline: Dict[str, Any], scenarios: Dict[str, Any], threshold: float, min_delta_s: float
+) -> Dict[str, Any]:
+    before, after = _flatten(baseline["scenarios"]), _flatten(scenarios)
+    regressions, improvements = [], []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key]["median_s"], after[key]["median_s"]
+        ratio = new / old if old else float("inf")
+        entry = {"measure": key, "baseline_s": old, "current_s": new, "ratio": round(ratio, 3)}
+        if ratio > 1 + threshold and new - old >= min_delta_s:
+            regressions.append(entry)
+        elif ratio < 1 - threshold and old - new >= min_delta_s:
+            improvements.append(entry)
+    return {
+        "baseline_created": baseline.get("created"),
+        "threshold": threshold,
+        "compared": len(before.keys() & after.keys()),
+        "missing": sorted(before.keys() - after.keys()),
+        "regressions": regressions,
+        "improvements": improvements,
+    }
+
+
+# Suite de référence hors-ligne: enregistre les distributions ou les compare à une référence.
+def bench_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    scenarios: Dict[str, Any] = {}
+    with FixtureServer() as srv:
+        pages = _suite_pages(srv, args.large_rows)
+        if args.only:
+            pages = {name: url for name, url in pages.items() if name in args.only}
+        if args.skip_browser:
+            for name, url in pages.items():
+                scenarios[name] = _suite_scenario(args, url, None, out)
+        else:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                try:
+                    for name, url in pages.items():
+                        scenarios[name] = _suite_scenario(args, url, browser, out)
+                finally:
+                    browser.close()
+            if args.replay_har:
+                scenarios["har"] = _suite_har(args, out)
+    result: Dict[str, Any] = {
+        "version": SUITE_VERSION,
+        "created": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "browser": not args.skip_browser,
+        "scenarios": scenarios,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("version") != SUITE_VERSION:
+            raise SystemExit(f"Référence {args.compare}: version {baseline.get('version')} non prise en charge")
+        result["comparison"] = _compare_suite(baseline, scenarios, args.threshold, args.min_delta_ms / 1000.0)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks hors-ligne du scraper Papeete.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_daemon = sub.add_parser("daemon", help="Latence à froid vs démon chaud")
+    p_daemon.add_argument("--runs", type=int, default=5)
+    p_daemon.add_argument("--rows", type=int, default=250)
+    p_daemon.add_argument("--port", type=int, default=8766, help="Port du démon de test")
+    p_daemon.set_defaults(func=bench_daemon)
+
+    p_block = sub.add_parser("block", help="Octets et latence avec/sans blocage des ressources")
+    p_block.add_argument("--runs", type=int, default=5)
+    p_block.add_argument("--rows", type=int, default=250)
+    p_block.add_argument("--images", type=int, default=40)
+    p_block.set_defaults(func=bench_block)
+
+    p_wait = sub.add_parser("wait", help="Temps jusqu'aux données selon --wait-strategy")
+    p_wait.add_argument("--runs", type=int, default=5)
+    p_wait.add_argument("--rows", type=int, default=250)
+    p_wait.add_argument("--delay-ms", type=int, default=800, help="Délai avant injection des lignes")
+    p_wait.add_argument("--slow-ms", type=int, default=2000, help="Ressource lente retardant networkidle")
+    p_wait.set_defaults(func=bench_wait)
+
+    p_conc = sub.add_parser("concurrency", help="Débit du moteur asynchrone multi-URL")
+    p_conc.add_argument("--urls", type=int, default=16)
+    p_conc.add_argument("--rows", type=int, default=250)
+    p_conc.add_argument("--delay-ms", type=int, default=300)
+    p_conc.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    p_conc.set_defaults(func=bench_concurrency)
+
+    p_payload = sub.add_parser("payload", help="Taille et durée des evaluate() avec tableaux parasites")
+    p_payload.add_argument("--runs", type=int, default=10)
+    p_payload.add_argument("--rows", type=int, default=250)
+    p_payload.add_argument("--decoys", type=int, default=60)
+    p_payload.set_defaults(func=bench_payload)
+
+    p_text = sub.add_parser("textmode", help="Équivalence et durée textContent vs innerText")
+    p_text.add_argument("--runs", type=int, default=10)
+    p_text.add_argument("--rows", type=int, default=1000, help="Lignes du grand tableau (12 colonnes)")
+    p_text.add_argument("--har", help="Archive HAR (.har) d'un relevé réel: équivalence sur le vrai DOM")
+    p_text.set_defaults(func=bench_textmode)
+
+    p_calls = sub.add_parser("calls", help="Appariement des escales (balayage trié vs boucles imbriquées)")
+    p_calls.add_argument("--runs", type=int, default=3)
+    p_calls.add_argument("--rows", type=int, default=1_000_000, help="Mouvements synthétiques")
+    p_calls.add_argument(
+        "--naive-rows", type=int, default=10_000, help="Échantillon pour l'appariement naïf (0: ignoré)"
+    )
+    p_calls.set_defaults(func=bench_calls)
+
+    p_records = sub.add_parser("records", help="Mémoire par ligne: dicts vs colonnes typées")
+    p_records.add_argument("--rows", type=int, default=1_000_000, help="Mouvements synthétiques")
+    p_records.set_defaults(func=bench_records)
+
+    p_dates = sub.add_parser("dates", help="Analyse de la colonne Date: en bloc vs strptime")
+    p_dates.add_argument("--runs", type=int, default=3)
+    p_dates.add_argument("--rows", type=int, default=1_000_000, help="Valeurs synthétiques")
+    p_dates.set_defaults(func=bench_dates)
+
+    p_columnar = sub.add_parser("columnar", help="Relecture JSON vs Parquet/Arrow (requiert pyarrow)")
+    p_columnar.add_argument("--runs", type=int, default=3)
+    p_columnar.add_argument("--rows", type=int, default=200_000, help="Mouvements synthétiques")
+    p_columnar.add_argument("--out-dir", default="bench-out", help="Dossier des fichiers produits")
+    p_columnar.set_defaults(func=bench_columnar)
+
+    p_ndjson = sub.add_parser("ndjson", help="Sérialisation NDJSON vs JSON indenté")
+    p_ndjson.add_argument("--runs", type=int, default=5)
+    p_ndjson.add_argument("--rows", type=int, default=200_000, help="Enregistrements synthétiques")
+    p_ndjson.set_defaults(func=bench_ndjson)
+
+    p_headers = sub.add_parser("headers", help="En-têtes ignorés et projection de colonnes sur un tableau large")
+    p_headers.add_argument("--runs", type=int, default=5)
+    p_headers.add_argument("--rows", type=int, default=20_000, help="Lignes synthétiques")
+    p_headers.add_argument("--cols", type=int, default=200, help="Colonnes du tableau")
+    p_headers.add_argument("--repeat", type=int, default=100, help="Passages sur les en-têtes (vérification seule)")
+    p_headers.set_defaults(func=bench_headers)
+
+    p_proj = sub.add_parser("projection", help="Taille et durée de la lecture des lignes avec projection")
+    p_proj.add_argument("--runs", type=int, default=10)
+    p_proj.add_argument("--rows", type=int, default=5000)
+    p_proj.add_argument("--columns", default="Date,Navire,Quai", help="Colonnes projetées (variante « columns »)")
+    p_proj.set_defaults(func=bench_projection)
+
+    p_suite = sub.add_parser("suite", help="Suite de référence: distributions enregistrées et comparées")
+    p_suite.add_argument("--runs", type=int, default=20, help="Mesures par fonction et par page")
+    p_suite.add_argument("--main-runs", type=int, default=5, help="Mesures de main() par page et par moteur")
+    p_suite.add_argument("--warmup", type=int, default=1, help="Exécutions non comptées avant mesure")
+    p_suite.add_argument("--large-rows", type=int, default=10_000, help="Lignes de la page « large »")
+    p_suite.add_argument("--only", nargs="+", help="Pages mesurées (recorded, iframe, decoys, large)")
+    p_suite.add_argument("--skip-browser", action="store_true", help="Sans Chromium: chemin HTTP et main() --engine http")
+    p_suite.add_argument("--save", help="Écrire les distributions dans ce fichier de référence JSON")
+    p_suite.add_argument("--compare", help="Comparer les médianes à ce fichier de référence (code 1 si régression)")
+    p_suite.add_argument("--threshold", type=float, default=0.15, help="Ralentissement relatif toléré (défaut: 0.15)")
+    p_suite.add_argument("--min-delta-ms", type=float, default=1.0, help="Écart absolu minimal signalé (défaut: 1 ms)")
+    p_suite.add_argument("--replay-har", help="Archive HAR (.har) d'un relevé réel: main() rejoué sans réseau")
+    p_suite.add_argument("--out-dir", default="bench-out", help="Dossier des fichiers produits par main()")
+    p_suite.set_defaults(func=bench_suite)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    result = args.func(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Pages de prévisions synthétiques et serveur HTTP local pour les benchmarks.
+
+Reproduit la structure de la page « Prévisions navires » du port de Papeete
+(mêmes en-têtes, mêmes formats de dates/quais) sans accès réseau.
+
+Exemple:
+  with FixtureServer() as srv:
+      srv.add_page("/previsions", build_forecast_page(rows=250))
+      url = srv.url("/previsions")
+"""
+
+import csv
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+# En-têtes tels qu'affichés sur la page réelle (dont les colonnes ignorées par le scraper)
+HEADERS = [
+    "Date",
+    "N° Escale",
+    "Navire",
+    "N° Voyage",
+    "Type CABOTEUR CARGO PAQUEBOT PECHE YACHT",
+    "Arrivées",
+    "Départs",
+    "Quai",
+    "Longueur",
+    "agent",
+    "acconier",
+    "Observations",
+]
+
+TYPES = ["CABOTEUR", "CARGO", "PAQUEBOT", "PECHE", "YACHT"]
+QUAYS = [
+    "QUAI DES PAQUEBOTS",
+    "EPI NORD (POSTE N. 1 NORD)",
+    "EPI SUD (POSTE N. 3 NORD)",
+    "QUAI D'HONNEUR",
+    "QUAI DES GOELETTES",
+    "QUAI MARINE MARCHANDE",
+]
+VESSELS = [
+    ("STAR BREEZE", "PAQUEBOT", "159"),
+    ("NORWEGIAN SUN", "PAQUEBOT", "258.6"),
+    ("PANORAMA II", "PAQUEBOT", "49.98"),
+    ("PAUL GAUGUIN", "PAQUEBOT", "156.5"),
+    ("ARANUI 5", "CABOTEUR", "126"),
+    ("TAPORO IX", "CABOTEUR", "80.5"),
+    ("KURA ORA VII", "CABOTEUR", "67.2"),
+    ("SOFRANA SURVILLE", "CARGO", "147"),
+    ("CAPITAINE WALLIS", "CARGO", "172"),
+    ("TAHITI NUI 1", "PECHE", "32.5"),
+    ("TIARE TAHITI", "YACHT", "54"),
+    ("AQUIJO", "YACHT", "85.9"),
+]
+
+
+# Génère des lignes de mouvements (une arrivée puis un départ par escale), déterministes.
+def synthetic_rows(count: int, seed: int = 42, start: Optional[datetime] = None) -> List[List[str]]:
+    rnd = random.Random(seed)
+    when = start or datetime(2025, 9, 18, 5, 30)
+    rows: List[List[str]] = []
+    escale = 250000
+    # Un navire ne revient qu'après son départ précédent (pas d'escales qui se chevauchent)
+    free_at = {name: when for name, _vtype, _length in VESSELS}
+    while len(rows) < count:
+        first = rnd.randrange(len(VESSELS))
+        free = [VESSELS[(first + i) % len(VESSELS)] for i in range(len(VESSELS))]
+        free = [v for v in free if free_at[v[0]] <= when]
+        if not free:
+            when = min(free_at.values())
+            continue
+        name, vtype, length = free[0]
+        quay_in = QUAYS[rnd.randrange(len(QUAYS))]
+        quay_out = quay_in if rnd.random() < 0.7 else QUAYS[rnd.randrange(len(QUAYS))]
+        depart = when + timedelta(hours=rnd.choice([6, 9, 12, 14, 30, 54]))
+        free_at[name] = depart + timedelta(minutes=30)
+        escale += 1
+        voyage = f"V{rnd.randrange(100, 999)}"
+        for ts, is_arrival, quay in ((when, True, quay_in), (depart, False, quay_out)):
+            day = ts.strftime("%d/%m/%Y")
+            rows.append(
+                [
+                    ts.strftime("%d/%m/%Y - %H:%M"),
+                    str(escale),
+                    name,
+                    voyage,
+                    vtype,
+                    day if is_arrival else "",
+                    "" if is_arrival else day,
+                    quay,
+                    length,
+                    "AGENCE MARITIME",
+                    "ACCONIER SA",
+                    "Accostage Lamanage," if is_arrival else "Appareillage Lamanage,",
+                ]
+            )
+        when += timedelta(minutes=rnd.choice([30, 90, 150, 240, 480]))
+    return rows[:count]
+
+
+# Balisage « riche » d'une cellule: lien, <br>, éléments masqués (comme sur le site réel).
+def _rich_cell(index: int, value: str) -> str:
+    text = html.escape(value)
+    if index == 2:
+        return f'<a href="#navire">{text}</a>'
+    if index == 7:
+        return f'{text}<span hidden>(poste)</span><span style="display:none">-</span>'
+    if index == 11:
+        return text.replace(" ", "<br>", 1)
+    return text
+
+
+# Rend un <table> HTML complet (thead + tbody).
+def render_table(
+    headers: List[str], rows: List[List[str]], table_id: str = "previsions", rich: bool = False
+) -> str:
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    cell = _rich_cell if rich else (lambda _i, c: html.escape(c))
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell(i, c)}</td>" for i, c in enumerate(r)) + "</tr>" for r in rows
+    )
+    return (
+        f'<table id="{table_id}" class="views-table">'
+        f"<thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+    )
+
+
+# Tableaux de mise en page parasites (menus, pied de page) qui concurrencent le vrai tableau.
+def render_decoys(count: int) -> str:
+    parts = []
+    for i in range(count):
+        cells = "".join(f"<td>menu {i}.{j}</td>" for j in range(3))
+        parts.append(f'<table class="layout-{i}"><tr>{cells}</tr><tr>{cells}</tr></table>')
+    return "".join(parts)
+
+
+# Balises de ressources lourdes (feuille de style, police, images) servies par add_asset_routes.
+def render_assets(images: int) -> str:
+    tags = ['<link rel="stylesheet" href="/assets/style.css">']
+    tags.extend(f'<img src="/assets/img-{i}.jpg" alt="">' for i in range(images))
+    return "".join(tags)
+
+
+# Enregistre sur le serveur les ressources référencées par render_assets.
+def add_asset_routes(srv: "FixtureServer", images: int, size: int = 200_000) -> None:
+    blob = bytes(random.Random(7).getrandbits(8) for _ in range(size))
+    srv.add_page(
+        "/assets/style.css",
+        "@font-face{font-family:f;src:url(/assets/font.woff2)} body{font-family:f}",
+        content_type="text/css",
+    )
+    srv.add_page("/assets/font.woff2", blob[: size // 4], content_type="font/woff2")
+    for i in range(images):
+        srv.add_page(f"/assets/img-{i}.jpg", blob, content_type="image/jpeg")
+
+
+# Page complète, éventuellement avec le tableau dans un iframe et des tableaux parasites.
+def build_forecast_page(
+    rows: int = 250,
+    decoys: int = 0,
+    iframe_src: Optional[str] = None,
+    seed: int = 42,
+    images: int = 0,
+    rich: bool = False,
+) -> str:
+    if iframe_src:
+        content = f'<iframe src="{html.escape(iframe_src)}" width="100%" height="800"></iframe>'
+    else:
+        content = render_table(HEADERS, synthetic_rows(rows, seed=seed), rich=rich)
+    return (
+        "<!DOCTYPE html><html lang=\"fr\"><head><meta charset=\"utf-8\">"
+        "<title>Prévisions navires</title></head><body>"
+        f"{render_assets(images) if images else ''}{render_decoys(decoys)}<h1>Prévisions navires</h1>{content}</body></html>"
+    )
+
+
+# Document de l'iframe hébergeant le tableau.
+def build_frame_document(rows: int = 250, seed: int = 42) -> str:
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>"
+        f"{render_table(HEADERS, synthetic_rows(rows, seed=seed))}</body></html>"
+    )
+
+
+# Page rendue à partir d'un relevé réel exporté en CSV (ex. out.csv: en-têtes et cellules d'origine).
+def build_recorded_page(csv_path: str, decoys: int = 0) -> str:
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        headers, *rows = list(csv.reader(f))
+    return (
+        "<!DOCTYPE html><html lang=\"fr\"><head><meta charset=\"utf-8\">"
+        "<title>Prévisions navires</title></head><body>"
+        f"{render_decoys(decoys)}<h1>Prévisions navires</h1>{render_table(headers, rows)}</body></html>"
+    )
+
+
+# Page dont le tableau est rempli par JavaScript: lignes injectées par lots après `delay_ms`.
+# `slow_ms` ajoute une ressource lente (type beacon) qui retarde le « networkidle ».
+def build_delayed_page(
+    rows: int = 250, delay_ms: int = 500, batch: int = 50, batch_interval_ms: int = 50, slow_ms: int = 0
+) -> str:
+    data = json.dumps(synthetic_rows(rows), ensure_ascii=False).replace("</", "<\\/")
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in HEADERS)
+    slow = f'<img src="/slow?ms={slow_ms}" alt="">' if slow_ms else ""
+    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
+<title>Prévisions navires</title></head><body>{slow}
+<table id="previsions" class="views-table"><thead><tr>{head}</tr></thead><tbody></tbody></table>
+<script>
+const DATA = {data};
+const tbody = document.querySelector('#previsions tbody');
+function inject(start) {{
+  const frag = document.createDocumentFragment();
+  for (const r of DATA.slice(start, start + {batch})) {{
+    const tr = document.createElement('tr');
+    for (const c of r) {{ const td = document.createElement('td'); td.textContent = c; tr.appendChild(td); }}
+    frag.appendChild(tr);
+  }}
+  tbody.appendChild(frag);
+  if (start + {batch} < DATA.length) setTimeout(() => inject(start + {batch}), {batch_interval_ms});
+}}
+setTimeout(() => inject(0), {delay_ms});
+</script></body></html>"""
+
+
+# Corps JSON d'un point d'accès « API » (dates ISO, nombres) équivalent à synthetic_rows.
+def build_api_payload(rows: int = 250, seed: int = 42) -> str:
+    items = []
+    for r in synthetic_rows(rows, seed=seed):
+        when = datetime.strptime(r[0], "%d/%m/%Y - %H:%M")
+        items.append(
+            {
+                "date": when.isoformat(),
+                "escale": int(r[1]),
+                "navire": {"nom": r[2], "type": r[4], "longueur": float(r[8])},
+                "voyage": r[3],
+                "arrivee": when.date().isoformat() if r[5] else None,
+                "depart": when.date().isoformat() if r[6] else None,
+                "quai": r[7],
+                "agent": r[9],
+                "acconier": r[10],
+                "observations": r[11],
+            }
+        )
+    return json.dumps({"status": "ok", "data": {"previsions": items}}, ensure_ascii=False)
+
+
+# Page qui construit le tableau à partir du point d'accès JSON `api_path` (fetch au chargement).
+def build_api_page(api_path: str = "/api/previsions") -> str:
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in HEADERS)
+    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
+<title>Prévisions navires</title></head><body>
+<table id="previsions" class="views-table"><thead><tr>{head}</tr></thead><tbody></tbody></table>
+<script>
+const pad = n => String(n).padStart(2, '0');
+const day = s => s ? `${{s.slice(8, 10)}}/${{s.slice(5, 7)}}/${{s.slice(0, 4)}}` : '';
+fetch('{api_path}', {{ headers: {{ 'X-Requested-With': 'XMLHttpRequest' }} }})
+  .then(r => r.json())
+  .then(j => {{
+    const tbody = document.querySelector('#previsions tbody');
+    for (const p of j.data.previsions) {{
+      const cells = [`${{day(p.date)}} - ${{p.date.slice(11, 16)}}`, p.escale, p.navire.nom, p.voyage,
+        p.navire.type, day(p.arrivee), day(p.depart), p.quai, p.navire.longueur, p.agent, p.acconier,
+        p.observations];
+      const tr = document.createElement('tr');
+      for (const c of cells) {{ const td = document.createElement('td'); td.textContent = c; tr.appendChild(td); }}
+      tbody.appendChild(tr);
+    }}
+  }});
+</script></body></html>"""
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        path, _, query = self.path.partition("?")
+        if path == "/slow":
+            # Ressource lente: ?ms=<durée> avant de répondre un GIF vide
+            params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+            time.sleep(int(params.get("ms", "1000")) / 1000.0)
+            self._reply("image/gif", b"GIF89a")
+            return
+        route = self.server.routes.get(path)
+        if route is None:
+            self.send_error(404)
+            return
+        self._reply(*route, etag=True)
+
+    def _reply(self, content_type: str, body, etag: bool = False) -> None:
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        tag = f'"{hashlib.blake2b(payload, digest_size=8).hexdigest()}"' if etag else None
+        # Validateur ETag comme un serveur statique (réponses 304 de la pré-vérification)
+        if tag and self.headers.get("If-None-Match") == tag:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if tag:
+            self.send_header("ETag", tag)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args) -> None:  # silence: les benchmarks mesurent, pas de logs
+        pass
+
+
+# Serveur HTTP local (thread dédié) servant des routes statiques en mémoire.
+class FixtureServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self._server.daemon_threads = True
+        self._server.routes = {}
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def add_page(self, path: str, body, content_type: str = "text/html; charset=utf-8") -> str:
+        self._server.routes[path] = (content_type, body)
+        return self.url(path)
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -16,16 +16,48 @@ Notes:
 """
 
 import argparse
+import asyncio
 import csv
+import functools
+import http.client
 import json
 import logging
+import operator
+import os
 import sys
 import time
-from typing import Any, Dict, List, Tuple
+import zlib
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit, urlunsplit
 
+from playwright.async_api import async_playwright
+from playwright.sync_api import Error as PlaywrightError
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import sync_playwright
 
+from papeete_blocking import BlockingPolicy, install_blocking, install_blocking_async
+from papeete_api import ResponseRecorder, discover_recipe, fetch_table, load_recipe, save_recipe
+from papeete_http import HttpError, collect_tables
+from papeete_arrow import FORMATS as COLUMNAR_FORMATS, export_history, movements_table, pa, write_table
+from papeete_calls import pair_calls, write_calls
+from papeete_dates import minutes_column, sort_chronologically
+from papeete_diff import diff_with_state, load_state, save_state, table_hash, write_events
+from papeete_fields import MovementFields
+from papeete_har import LATENCIES as HAR_LATENCIES, install_replay, record_options
+from papeete_metrics import NULL_METRICS, new_metrics, write_prometheus, write_summary
+from papeete_ndjson import BACKENDS as JSON_BACKENDS, NdjsonWriter, line_encoder
+from papeete_occupancy import OccupancyIndex, write_report
+from papeete_preflight import preflight, record_outcome
+from papeete_watch import AdaptiveSchedule
+from papeete_store import HistoryStore
+from papeete_daemon import (
+    DEFAULT_DAEMON_HOST,
+    DEFAULT_DAEMON_PORT,
+    DaemonUnavailable,
+    request_scrape,
+    serve,
+)
+
 
 logger = logging.getLogger(__name__)
 
@@ -37,35 +69,93 @@ IGNORED_HEADERS = {
     "acconier",
 }
 
-# Normalise un en-tête: minuscule, espaces uniques, retire les caractères °/º
+DEFAULT_URL = "https://www.portdepapeete.pf/fr/previsions-navires"
+
+# Moteurs d'extraction: API JSON découverte, HTTP seul, navigateur seul,
+# ou dans cet ordre jusqu'au premier tableau plausible (auto)
+ENGINES = ("auto", "api", "http", "browser")
+DEFAULT_API_RECIPE = "papeete_api.json"
+
+# Stratégies d'attente après navigation (voir --wait-strategy)
+WAIT_STRATEGIES = ("networkidle", "domcontentloaded", "table")
+# Nombre minimal de lignes de corps pour qu'un tableau soit jugé « prêt »
+DEFAULT_MIN_ROWS = 5
+# Durée sans nouvelle ligne avant de juger « prêt » un tableau rempli par lots (--wait-strategy table)
+TABLE_QUIET_MS = 300
+# Pause avant de réévaluer un frame indisponible (navigation, détachement) pendant l'attente
+FRAME_RETRY_MS = 100
+# Lecture du texte des cellules: innerText (défaut) ou textContent (sans reflow, sur option).
+# textContent ne voit pas les règles CSS (display:none d'une feuille de style): à valider
+# sur un relevé réel (bench_papeete.py textmode --har) avant d'en faire le défaut.
+TEXT_MODES = ("textContent", "innerText")
+DEFAULT_TEXT_MODE = "innerText"
+# Marge ajoutée au timeout de navigation pour le délai global d'une URL (mode multi-URL)
+URL_TIMEOUT_GRACE_S = 10.0
+# Code de sortie quand --hash-file constate un tableau identique au précédent
+EXIT_UNCHANGED = 3
+HASH_STATE_VERSION = 1
+
+# Normalise un en-tête: minuscule, espaces uniques, retire les caractères °/º (mémorisé: peu d'en-têtes distincts)
+@functools.lru_cache(maxsize=1024)
 def _normalize_header(name: str) -> str:
     base = " ".join((name or "").lower().split())
     return base.replace("\u00b0", "").replace("\u00ba", "").strip()
 
+
+_IGNORED_NORMALIZED = frozenset(_normalize_header(h) for h in IGNORED_HEADERS)
+
+
 # Indique si un en-tête doit être ignoré
 def _should_ignore_header(name: str) -> bool:
-    norm = _normalize_header(name)
-    for h in IGNORED_HEADERS:
-        if _normalize_header(h) == norm:
-            return True
-    return False
+    return _normalize_header(name) in _IGNORED_NORMALIZED
 
 
+# Éclate les valeurs répétables « a,b » de --columns / --drop-columns.
+def _split_columns(values: List[str]) -> List[str]:
+    return [item.strip() for value in values or [] for item in value.split(",") if item.strip()]
 
 
-# Recupere les tableaux detectes dans un frame Playwright.
-def _collect_tables_from_frame(frame) -> List[Dict[str, Any]]:
-    """Collecte tous les tableaux HTML prÃ©sents dans un frame.
+# Indice de l'en-tête désigné par `name` (égalité normalisée, puis préfixe); None si absent.
+def _match_column(normalized: List[str], name: str) -> Optional[int]:
+    wanted = _normalize_header(name)
+    for match in (str.__eq__, str.startswith):
+        for i, header in enumerate(normalized):
+            if match(header, wanted):
+                return i
+    return None
 
-    Retourne une liste de dictionnaires contenant:
-      - headers: en-tÃªtes dÃ©tectÃ©s (si disponibles)
-      - rows: lignes du tableau (listes de cellules en texte)
-      - rowCount/colCount: dimensions estimÃ©es
-      - score: mÃ©trique simple pour classer les tableaux
+
+# Résout la projection en indices de colonnes conservées, une fois par tableau.
+def _resolve_projection(headers: List[str], columns: List[str] = None, drop_columns: List[str] = None) -> List[int]:
+    """Sans --columns: toutes les colonnes sauf IGNORED_HEADERS, dans l'ordre du tableau.
+
+    --columns choisit les colonnes et leur ordre (une colonne ignorée par défaut
+    peut y être demandée); --drop-columns en retire ensuite.
     """
-    try:
-        tables = frame.evaluate(
-            """
+    normalized = [_normalize_header(h) for h in headers]
+    if columns:
+        keep = []
+        for name in _split_columns(columns):
+            index = _match_column(normalized, name)
+            if index is None:
+                logger.warning("Colonne demandée absente du tableau: %s", name)
+            elif index not in keep:
+                keep.append(index)
+    else:
+        keep = [i for i, norm in enumerate(normalized) if norm not in _IGNORED_NORMALIZED]
+    for name in _split_columns(drop_columns):
+        index = _match_column(normalized, name)
+        if index is None:
+            logger.warning("Colonne à retirer absente du tableau: %s", name)
+        elif index in keep:
+            keep.remove(index)
+    return keep
+
+
+
+
+# Script injecté dans chaque frame: extrait en-têtes, lignes et score de chaque <table>.
+_COLLECT_TABLES_JS = """
 () => {
   // Petite helper pour normaliser le texte d'une cellule
   function getText(cell) {
@@ -115,28 +205,334 @@ def _collect_tables_from_frame(frame) -> List[Dict[str, Any]]:
   return results;
 }
 """
-        )
+
+
+# Fonctions communes aux scripts en deux temps (résumés puis lignes du tableau retenu).
+# Mêmes règles d'en-têtes et de corps que _COLLECT_TABLES_JS, limitées aux lignes propres
+# de chaque tableau (les lignes d'un tableau imbriqué ne comptent que pour lui).
+_TABLE_HELPERS_JS = r"""
+  // innerText force le calcul de style/layout de chaque cellule; textContent non.
+  // Le mode textContent traite explicitement <br>, blocs et éléments masqués
+  // (attribut hidden, style en ligne display:none / visibility:hidden).
+  const SKIPPED = { SCRIPT: 1, STYLE: 1, TEMPLATE: 1, NOSCRIPT: 1 };
+  const BLOCKS = { DIV: 1, P: 1, LI: 1, UL: 1, OL: 1, TABLE: 1, TR: 1, H1: 1, H2: 1, H3: 1, H4: 1 };
+  function getInnerText(cell) {
+    return cell.innerText.trim().replace(/\s+/g, ' ');
+  }
+  function appendText(node, out) {
+    for (let n = node.firstChild; n; n = n.nextSibling) {
+      if (n.nodeType === 3) {
+        out.push(n.nodeValue);
+      } else if (n.nodeType === 1) {
+        const tag = n.tagName;
+        if (tag === 'BR') { out.push(' '); continue; }
+        if (SKIPPED[tag] || n.hidden) continue;
+        const style = n.style;
+        if (style && (style.display === 'none' || style.visibility === 'hidden')) continue;
+        if (BLOCKS[tag]) { out.push(' '); appendText(n, out); out.push(' '); }
+        else appendText(n, out);
+      }
+    }
+  }
+  function getTextContent(cell) {
+    // Cas courant: cellule sans élément enfant, lecture directe
+    if (cell.childElementCount === 0) return cell.textContent.trim().replace(/\s+/g, ' ');
+    const out = [];
+    appendText(cell, out);
+    return out.join('').trim().replace(/\s+/g, ' ');
+  }
+  const getText = (opts && opts.textMode === 'textContent') ? getTextContent : getInnerText;
+  // Lignes propres au tableau (tHead, tBodies, rows): celles d'un tableau imbriqué n'en font
+  // pas partie, comme dans TableParser (chemin HTTP)
+  function hasTh(tr) {
+    for (const cell of tr.cells) if (cell.tagName === 'TH') return true;
+    return false;
+  }
+  function headerRowOf(tbl) {
+    const head = tbl.tHead;
+    if (head && head.rows.length) return head.rows[head.rows.length - 1];
+    for (const tr of tbl.rows) if (hasTh(tr)) return tr;
+    return null;
+  }
+  function bodyRowsOf(tbl, hasHeaders) {
+    let bodyTrs = [];
+    for (const body of tbl.tBodies) for (const tr of body.rows) bodyTrs.push(tr);
+    if (bodyTrs.length === 0) {
+      bodyTrs = Array.from(tbl.rows);
+      if (hasHeaders) {
+        const headerIndex = bodyTrs.findIndex(hasTh);
+        if (headerIndex !== -1) bodyTrs.splice(headerIndex, 1);
+      }
+    }
+    return bodyTrs;
+  }
+"""
+
+# Premier temps: score et plausibilité calculés dans la page, sans lire le texte des
+# cellules; seul le résumé du meilleur tableau du frame traverse le pont CDP.
+_SUMMARIZE_TABLES_JS = (
+    "(opts) => {"
+    + _TABLE_HELPERS_JS
+    + r"""
+  function better(a, b) {
+    for (let i = 0; i < a.length; i++) if (a[i] !== b[i]) return a[i] > b[i];
+    return false;
+  }
+  const tables = document.querySelectorAll('table');
+  let best = null;
+  for (let index = 0; index < tables.length; index++) {
+    const tbl = tables[index];
+    const headerRow = headerRowOf(tbl);
+    const headerCount = headerRow ? headerRow.cells.length : 0;
+    let rowCount = 0, colCount = 0;
+    for (const tr of bodyRowsOf(tbl, headerCount > 0)) {
+      const n = tr.cells.length;
+      if (!n) continue;
+      if (!rowCount) colCount = n;
+      rowCount++;
+    }
+    if (!rowCount) colCount = headerCount;
+    const score = rowCount * (colCount || 1) + (headerCount ? 5 : 0);
+    const plausible = rowCount >= 1 && (colCount >= 2 || headerCount >= 2);
+    // Même ordre que le tri Python: plausible, score, lignes, colonnes (1er gagnant si égalité)
+    const rank = [plausible ? 1 : 0, score, rowCount, colCount];
+    if (best && !better(rank, best.rank)) continue;
+    best = { index, tbl, headerRow, rank, plausible, score, rowCount, colCount };
+  }
+  if (!best) return { tableCount: 0, best: null };
+  const tbl = best.tbl;
+  return {
+    tableCount: tables.length,
+    best: {
+      index: best.index,
+      caption: tbl.caption ? tbl.caption.innerText.trim() : null,
+      id: tbl.id || null,
+      classes: tbl.className || null,
+      headers: best.headerRow ? Array.from(best.headerRow.cells).map(getText) : [],
+      rowCount: best.rowCount,
+      colCount: best.colCount,
+      score: best.score,
+      plausible: best.plausible,
+      typeControl: typeControl(opts && opts.types),
+    },
+  };
+  // Filtre exposé par la page (liste ou cases à cocher proposant l'un des types voulus):
+  // nom du paramètre et couples [libellé, valeur], pour --type-query
+  function typeControl(types) {
+    if (!types || !types.length) return null;
+    const wanted = new Set(types);
+    const groups = new Map();
+    for (const select of document.querySelectorAll('select[name]')) {
+      groups.set(select.name, Array.from(select.options).map(o => [o.text.trim().toUpperCase(), o.value]));
+    }
+    for (const input of document.querySelectorAll('input[name][type=checkbox], input[name][type=radio]')) {
+      const label = input.labels && input.labels.length ? input.labels[0].textContent : input.value;
+      if (!groups.has(input.name)) groups.set(input.name, []);
+      groups.get(input.name).push([label.trim().toUpperCase(), input.value]);
+    }
+    for (const [name, values] of groups) {
+      if (values.some(v => wanted.has(v[0]))) return { name, values };
+    }
+    return null;
+  }
+}
+"""
+)
+
+# Second temps: lignes du seul tableau retenu (repéré par son rang dans le document).
+# Avec opts.keep (indices des colonnes conservées) et opts.width (nombre d'en-têtes), seules
+# les cellules projetées sont lues et transférées, déjà alignées sur les en-têtes.
+_TABLE_ROWS_JS = (
+    "([index, opts]) => {"
+    + _TABLE_HELPERS_JS
+    + r"""
+  const tbl = document.querySelectorAll('table')[index];
+  if (!tbl) return null;
+  const keep = opts && opts.keep;
+  const width = keep ? opts.width : 0;
+  // Filtre par type (opts.typeIndex, opts.types): seule la cellule de type des lignes écartées est lue
+  const types = keep && opts.types ? new Set(opts.types) : null;
+  // Comme _to_records: cellule absente -> '', la dernière colonne absorbe les cellules excédentaires
+  function cellAt(cells, i) {
+    if (i === width - 1 && cells.length > width) {
+      const parts = [];
+      for (let j = i; j < cells.length; j++) parts.push(getText(cells[j]));
+      return parts.join(' | ');
+    }
+    return i < cells.length ? getText(cells[i]) : '';
+  }
+  function project(cells) {
+    const out = new Array(keep.length);
+    for (let k = 0; k < keep.length; k++) out[k] = cellAt(cells, keep[k]);
+    return out;
+  }
+  const headerRow = headerRowOf(tbl);
+  const rows = [];
+  for (const tr of bodyRowsOf(tbl, !!headerRow && headerRow.cells.length > 0)) {
+    const cells = tr.cells;
+    if (!cells.length) continue;
+    if (types && !types.has(cellAt(cells, opts.typeIndex).trim().toUpperCase())) continue;
+    rows.push(keep ? project(cells) : Array.from(cells).map(getText));
+  }
+  return rows;
+}
+"""
+)
+
+
+# Recupere les tableaux detectes dans un frame Playwright.
+def _collect_tables_from_frame(frame) -> List[Dict[str, Any]]:
+    """Collecte tous les tableaux HTML prÃ©sents dans un frame.
+
+    Retourne une liste de dictionnaires contenant:
+      - headers: en-tÃªtes dÃ©tectÃ©s (si disponibles)
+      - rows: lignes du tableau (listes de cellules en texte)
+      - rowCount/colCount: dimensions estimÃ©es
+      - score: mÃ©trique simple pour classer les tableaux
+    """
+    try:
+        tables = frame.evaluate(_COLLECT_TABLES_JS)
         return tables or []
     except Exception:
         logger.debug("Aucune table ou erreur lors de l'Ã©valuation dans le frame: %s", frame.url)
         return []
 
 
+# Options transmises aux scripts d'extraction (mode de lecture du texte, projection des colonnes).
+def _extraction_options(job: Dict[str, Any] = None) -> Dict[str, Any]:
+    job = job or {}
+    return {
+        "textMode": job.get("text_mode") or DEFAULT_TEXT_MODE,
+        "columns": job.get("columns"),
+        "drop_columns": job.get("drop_columns"),
+        # La découverte d'API compare toutes les colonnes aux réponses XHR: pas de projection
+        "project": job.get("project", True) and not job.get("discover_api"),
+        "types": job.get("types"),
+    }
+
+
+# Indice de la colonne portant le type de navire (premier en-tête contenant « type »).
+def _type_column(headers: List[str]) -> Optional[int]:
+    for i, h in enumerate(headers):
+        if "type" in h.lower():
+            return i
+    return None
+
+
+# « PAQUEBOT,yacht » -> {"PAQUEBOT", "YACHT"} (vide: aucun filtrage).
+def _wanted_types(type_only: str) -> FrozenSet[str]:
+    return frozenset(t.strip().upper() for t in (type_only or "").split(",") if t.strip())
+
+
+# Options de lecture des lignes du tableau retenu: indices projetés et filtre par type
+# si ses en-têtes sont connus et que la colonne de type est gardée (sinon, comme
+# _build_result pour les moteurs http/api, aucun filtrage par type).
+def _rows_options(best: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    headers = best.get("headers") or []
+    if not headers or not options.get("project", True):
+        return options
+    keep = _resolve_projection(headers, options.get("columns"), options.get("drop_columns"))
+    rows_options = {**options, "keep": keep, "width": len(headers)}
+    type_index = _type_column(headers)
+    if options.get("types") and type_index is not None and type_index in keep:
+        rows_options["typeIndex"] = type_index
+    else:
+        rows_options["types"] = None
+    return rows_options
+
+
+# Après une lecture projetée: en-têtes réduits aux colonnes lues (voir _to_records),
+# types retenus notés si le filtre a été appliqué dans la page.
+def _mark_projected(best: Dict[str, Any], rows_options: Dict[str, Any]) -> None:
+    control = best.pop("typeControl", None)
+    if control:
+        _log_type_control(control, rows_options.get("types") or [])
+    keep = rows_options.get("keep")
+    if keep is None:
+        return
+    best["headers"] = [best["headers"][i] for i in keep]
+    best["projected"] = True
+    if rows_options.get("types"):
+        best["types_filtered"] = sorted(rows_options["types"])
+
+
+# Signale le filtre exposé par la page: --type-query le fait appliquer par le serveur.
+def _log_type_control(control: Dict[str, Any], types: List[str]) -> None:
+    values = [value for label, value in control["values"] if label in types]
+    if values:
+        logger.info(
+            "Filtre de type exposé par la page (%s): --type-query '%s' réduirait la page servie",
+            control["name"],
+            urlencode([(control["name"], v) for v in values]),
+        )
+
+
+# Résume le meilleur tableau d'un frame (sans ses lignes); None si aucun tableau.
+def _summarize_tables_in_frame(frame, options: Dict[str, Any], metrics=NULL_METRICS) -> Dict[str, Any]:
+    try:
+        result = frame.evaluate(_SUMMARIZE_TABLES_JS, options)
+    except Exception:
+        logger.debug("Aucune table ou erreur lors de l'évaluation dans le frame: %s", frame.url)
+        return None
+    metrics.add("tables_found", result["tableCount"])
+    logger.debug("%d table(s) détectée(s) dans le frame: %s", result["tableCount"], frame.url)
+    return result["best"]
+
+
+# Lit les lignes du tableau n° `index` d'un frame; None si le DOM a changé entre-temps.
+def _fetch_table_rows(frame, index: int, options: Dict[str, Any]) -> List[List[str]]:
+    try:
+        return frame.evaluate(_TABLE_ROWS_JS, [index, options])
+    except Exception:
+        logger.debug("Lecture des lignes impossible dans le frame: %s", frame.url)
+        return None
+
+
+# Classe les résumés par frame (plausibles d'abord) comme _pick_best_table.
+def _rank_summaries(summaries: List[Tuple[Dict[str, Any], Any]]) -> List[Tuple[Dict[str, Any], Any]]:
+    ranked = [sf for sf in summaries if sf[0]["plausible"]] or summaries
+    ranked.sort(key=lambda sf: (sf[0]["score"], sf[0]["rowCount"], sf[0]["colCount"]), reverse=True)
+    return ranked
+
+
 # Selectionne le meilleur tableau a partir des candidats.
-def _find_best_table(page) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+def _find_best_table(
+    page, options: Dict[str, Any] = None, metrics=NULL_METRICS
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """Parcourt la page et tous ses frames pour trouver le meilleur tableau.
 
     Renvoie un tuple (tableau_sÃ©lectionnÃ©, tous_les_candidats). Si aucun tableau
     plausible n'est trouvÃ©, renvoie (None, []).
+
+    En deux temps: chaque frame renvoie le résumé de son meilleur tableau
+    (score et plausibilité calculés dans la page), puis seules les lignes du
+    tableau gagnant sont transférées. `options`: voir _extraction_options.
     """
-    candidates: List[Dict[str, Any]] = []
-    for frame in page.frames:
-        tables = _collect_tables_from_frame(frame)
-        for t in tables:
-            t["frame_url"] = frame.url
-        logger.debug("%d table(s) dÃ©tectÃ©e(s) dans le frame: %s", len(tables), frame.url)
-        candidates.extend(tables)
+    options = options or _extraction_options()
+    summaries = []
+    frames = page.frames
+    metrics.add("frames_scanned", len(frames))
+    for frame in frames:
+        summary = _summarize_tables_in_frame(frame, options, metrics)
+        if summary:
+            summary["frame_url"] = frame.url
+            summaries.append((summary, frame))
+    if not summaries:
+        return None, []
+    ranked = _rank_summaries(summaries)
+    best, frame = ranked[0]
+    rows_options = _rows_options(best, options)
+    rows = _fetch_table_rows(frame, best["index"], rows_options)
+    if rows is None:
+        return None, []
+    best["rows"] = rows
+    _mark_projected(best, rows_options)
+    return best, [s for s, _frame in ranked]
+
 
+# Classe les candidats (navigateur ou HTTP) et retient le meilleur tableau.
+def _pick_best_table(candidates: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Filtre les tableaux plausibles puis les classe par score et dimensions."""
     plausible = [
         t
         for t in candidates
@@ -155,12 +551,92 @@ def _find_best_table(page) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     return plausible[0], plausible
 
 
+# Attend qu'un frame contienne un tableau d'au moins `min_rows` lignes de corps.
+def _wait_for_table(page, min_rows: int, timeout_ms: int) -> bool:
+    """Attente de « readiness » sans extraire le contenu des tableaux.
+
+    Chaque frame reçoit un MutationObserver qui résout quand un tableau
+    plausible (>= 2 cellules par ligne) a au moins `min_rows` lignes et que son
+    nombre de lignes n'a plus changé depuis TABLE_QUIET_MS (tableau rempli par
+    lots: l'extraction n'en prend pas qu'une partie). Avec plusieurs
+    frames, l'attente est découpée en tranches courtes pour surveiller aussi les
+    iframes chargées tardivement. Renvoie False si le délai est écoulé.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    while True:
+        frames = page.frames
+        slice_ms = 1000 if len(frames) == 1 else max(50, 250 // len(frames))
+        for frame in frames:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                return False
+            try:
+                if frame.evaluate(_TABLE_READY_JS, [min_rows, min(slice_ms, remaining_ms), TABLE_QUIET_MS]):
+                    logger.debug("Tableau prêt dans le frame: %s", frame.url)
+                    return True
+            except Exception:
+                # Frame détaché ou en cours de navigation: courte pause (pas d'attente active),
+                # puis nouvel essai au tour suivant
+                logger.debug("Frame indisponible pendant l'attente: %s", frame.url)
+                time.sleep(min(slice_ms, FRAME_RETRY_MS, remaining_ms) / 1000.0)
+
+
+_TABLE_READY_JS = """
+([minRows, waitMs, quietMs]) => new Promise(resolve => {
+  // Lignes de corps du plus grand tableau plausible (>= 2 cellules, sans <th>)
+  function bodyRows() {
+    let best = 0;
+    for (const tbl of document.querySelectorAll('table')) {
+      if (tbl.rows.length < minRows || tbl.rows.length <= best) continue;
+      let n = 0;
+      for (const tr of tbl.rows) {
+        if (tr.cells.length >= 2 && !tr.querySelector('th')) n++;
+      }
+      if (n > best) best = n;
+    }
+    return best;
+  }
+  // Prêt: au moins minRows lignes, nombre inchangé depuis quietMs (tableau rempli par lots).
+  // L'état est gardé dans la page: l'attente est découpée en plusieurs appels.
+  const state = window.__papeeteTableWait || (window.__papeeteTableWait = { rows: -1, since: 0 });
+  let obs = null, timer = null, quietTimer = null;
+  function finish(value) {
+    if (obs) obs.disconnect();
+    clearTimeout(timer);
+    clearTimeout(quietTimer);
+    resolve(value);
+    return true;
+  }
+  function check() {
+    const rows = bodyRows();
+    const now = performance.now();
+    if (rows !== state.rows) { state.rows = rows; state.since = now; }
+    if (rows < minRows) return false;
+    const left = quietMs - (now - state.since);
+    if (left <= 0) return finish(true);
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(check, left);
+    return false;
+  }
+  if (check()) return;
+  if (!waitMs) return finish(false);
+  obs = new MutationObserver(check);
+  obs.observe(document, { childList: true, subtree: true });
+  timer = setTimeout(() => finish(false), waitMs);
+})
+"""
+
+
 # Convertit le tableau retenu en dictionnaires lignes/colonnes.
-def _to_records(table: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, str]]]:
+def _to_records(
+    table: Dict[str, Any], columns: List[str] = None, drop_columns: List[str] = None
+) -> Tuple[List[str], List[Dict[str, str]]]:
     """Convertit un tableau brut en enregistrements structurÃ©s.
 
     - Si aucun en-tÃªte n'est dÃ©tectÃ©, gÃ©nÃ¨re des noms Â« col_1 Â», Â« col_2 Â», ...
     - Tronque/concatÃ¨ne les cellules excÃ©dentaires pour s'aligner sur les entÃªtes
+    - Ne garde que les colonnes de la projection (voir _resolve_projection), sauf si
+      le tableau a déjà été projeté dans la page (clé « projected »)
     """
     headers = table.get("headers") or []
     rows: List[List[str]] = table.get("rows", [])
@@ -168,37 +644,145 @@ def _to_records(table: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, str]]]
         maxcols = max((len(r) for r in rows), default=0)
         headers = [f"col_{i+1}" for i in range(maxcols)]
 
-    # Indices des colonnes à conserver après filtrage
-    # Indices des colonnes à conserver après filtrage
+    # Indices des colonnes à conserver, résolus avant la boucle sur les lignes
     orig_len = len(headers)
-    keep_indices = [i for i, h in enumerate(headers) if not _should_ignore_header(h)]
+    if table.get("projected"):
+        keep_indices = list(range(orig_len))
+    else:
+        keep_indices = _resolve_projection(headers, columns, drop_columns)
     headers = [headers[i] for i in keep_indices]
+    if not keep_indices:
+        return headers, [{} for _r in rows]
+    # itemgetter renvoie un scalaire pour un seul indice: on garde un tuple dans tous les cas
+    pick = operator.itemgetter(*keep_indices) if len(keep_indices) > 1 else lambda r: (r[keep_indices[0]],)
     records: List[Dict[str, str]] = []
+    append = records.append
     for r in rows:
         if len(r) < orig_len:
             r = r + [""] * (orig_len - len(r))
         elif len(r) > orig_len:
             r = r[: orig_len - 1] + [" | ".join(r[orig_len - 1 :])]
-        r = [r[i] for i in keep_indices]
-        records.append(dict(zip(headers, r)))
+        append(dict(zip(headers, pick(r))))
     return headers, records
 
 
-# Point dentree CLI qui orchestre le scraping et les sorties.
-def main() -> None:
-    """Point d'entrÃ©e CLI: parse les arguments, lance le navigateur, extrait et exporte."""
+# Construit le parseur d'arguments de la CLI.
+def _build_parser() -> argparse.ArgumentParser:
+    """Déclare les options de la CLI (scraping, sorties, démon, logs)."""
     parser = argparse.ArgumentParser(
         description="Scraper Playwright pour la page 'PrÃ©visions navires' (Port de Papeete)."
     )
+    # --url répétable: plusieurs URLs sont scrapées en parallèle (moteur asynchrone)
     parser.add_argument(
         "--url",
-        default="https://www.portdepapeete.pf/fr/previsions-navires",
+        action="append",
         help="URL Ã  parser",
     )
     parser.add_argument("--timeout", type=int, default=45000, help="Timeout navigation en ms")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Pages ouvertes simultanément quand plusieurs --url sont données (défaut: 4)",
+    )
+    parser.add_argument(
+        "--engine",
+        default="auto",
+        choices=ENGINES,
+        help="auto: API JSON connue, puis HTTP sans navigateur, puis Playwright (défaut)",
+    )
+    parser.add_argument(
+        "--discover-api",
+        action="store_true",
+        help="Charger la page dans Chromium et enregistrer le point d'accès JSON qui alimente le tableau",
+    )
+    parser.add_argument(
+        "--api-recipe",
+        default=DEFAULT_API_RECIPE,
+        help=f"Fichier de la recette API (défaut: {DEFAULT_API_RECIPE})",
+    )
+    parser.add_argument(
+        "--wait-strategy",
+        default="table",
+        choices=WAIT_STRATEGIES,
+        help=(
+            "Attente après navigation: dès qu'un tableau est prêt, c.-à-d. a --min-rows lignes et n'en reçoit "
+            f"plus depuis {TABLE_QUIET_MS} ms (défaut), DOMContentLoaded ou networkidle"
+        ),
+    )
+    parser.add_argument(
+        "--text-mode",
+        default=DEFAULT_TEXT_MODE,
+        choices=TEXT_MODES,
+        help="Lecture des cellules: innerText (défaut) ou textContent, sans calcul de layout mais aveugle au CSS",
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=DEFAULT_MIN_ROWS,
+        help=f"Lignes minimales d'un tableau « prêt » pour --wait-strategy table (défaut: {DEFAULT_MIN_ROWS})",
+    )
     parser.add_argument("--headful", action="store_true", help="Lancer le navigateur en mode visible")
     parser.add_argument("--csv", help="Chemin de sortie CSV")
     parser.add_argument("--json", help="Chemin de sortie JSON")
+    parser.add_argument(
+        "--ndjson",
+        help="Sortie NDJSON: ligne meta puis un enregistrement compact par ligne ('-' pour stdout)",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=JSON_BACKENDS,
+        default="auto",
+        help="Encodeur de --ndjson: orjson si installé (auto), ou forcé (défaut: auto)",
+    )
+    parser.add_argument("--parquet", help="Chemin de sortie Parquet (schéma typé, requiert pyarrow)")
+    parser.add_argument("--arrow", help="Chemin de sortie Arrow IPC (schéma typé, requiert pyarrow)")
+    parser.add_argument(
+        "--db", help="Base SQLite d'historique: fusionne les mouvements de chaque exécution"
+    )
+    parser.add_argument(
+        "--export-history",
+        metavar="DIR",
+        help="Exporter toute la base --db dans DIR, un fichier par mois, puis quitter (requiert pyarrow)",
+    )
+    parser.add_argument(
+        "--export-format",
+        choices=COLUMNAR_FORMATS,
+        default="parquet",
+        help="Format de --export-history (défaut: parquet)",
+    )
+    parser.add_argument(
+        "--chronological",
+        action="store_true",
+        help="Trier les enregistrements par date-heure (colonne Date, heure de Papeete)",
+    )
+    parser.add_argument(
+        "--calls",
+        help="Chemin de sortie des escales (arrivée + départ appariés); CSV si .csv, JSON sinon",
+    )
+    parser.add_argument(
+        "--occupancy",
+        help="Rapport d'occupation des quais (frise par quai, chevauchements); JSON si .json, texte sinon",
+    )
+    parser.add_argument(
+        "--hash-file",
+        help=f"Empreintes des tableaux précédents: si rien n'a changé, aucune conversion ni écriture (code de sortie {EXIT_UNCHANGED})",
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="GET conditionnel (ETag/Last-Modified) de la page et du document du tableau avant tout scraping; "
+        "rien n'est extrait s'ils n'ont pas changé (requiert --hash-file)",
+    )
+    parser.add_argument(
+        "--diff-state",
+        help="Fichier d'état du différentiel: émet les ajouts/suppressions/modifications depuis le relevé précédent",
+    )
+    parser.add_argument(
+        "--diff-out",
+        default="-",
+        help="Destination des événements du différentiel en lignes JSON (défaut: stdout; fichier: ajout en fin)",
+    )
     parser.add_argument(
         "--print", action="store_true", help="Afficher les enregistrements dans la console"
     )
@@ -206,121 +790,1074 @@ def main() -> None:
     parser.add_argument(
         "--type-only",
         default="PAQUEBOT",
-        help="Filtrer sur un type (dÃ©faut: PAQUEBOT)",
+        help="Filtrer sur un ou plusieurs types séparés par des virgules (ex: PAQUEBOT,YACHT; défaut: PAQUEBOT)",
+    )
+    parser.add_argument(
+        "--type-query",
+        help="Requête ajoutée à l'URL pour que le serveur filtre lui-même les types (ex: 'type=PAQUEBOT'; voir les logs)",
     )
     parser.add_argument(
         "--no-type-filter",
         action="store_true",
         help="DÃ©sactive le filtrage par type",
     )
+    # Projection des colonnes (remplace la liste IGNORED_HEADERS si --columns est donné)
+    parser.add_argument(
+        "--columns",
+        action="append",
+        help="Colonnes à garder, dans cet ordre (ex: Date,Navire,Quai; préfixe accepté: « type »)",
+    )
+    parser.add_argument(
+        "--drop-columns",
+        action="append",
+        help="Colonnes à retirer en plus (ex: Observations,Longueur)",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         help="Niveau de logs (dÃ©faut: INFO)",
     )
+    # Enregistrement / rejeu HAR hors-ligne (voir papeete_har)
+    parser.add_argument(
+        "--record-har",
+        help="Enregistrer le chargement complet (document, iframes, XHR) dans cette archive HAR (.har ou .zip)",
+    )
+    parser.add_argument(
+        "--replay-har",
+        help="Rejouer cette archive HAR sans accès réseau (moteur navigateur)",
+    )
+    parser.add_argument(
+        "--har-latency",
+        choices=HAR_LATENCIES,
+        default="zero",
+        help="Latence du rejeu: zero (immédiat) ou recorded (durées enregistrées) (défaut: zero)",
+    )
+    # Chronométrage par phase (voir papeete_metrics)
+    parser.add_argument(
+        "--metrics",
+        help="Écrire le résumé JSON des durées par phase et des compteurs (« - »: stderr)",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        help="Écrire les mêmes mesures au format texte Prometheus (collecteur textfile de node_exporter)",
+    )
+    # Relevés en boucle à cadence adaptative (voir papeete_watch)
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Relever en boucle en gardant Chromium ouvert; intervalle adapté à l'activité du port",
+    )
+    parser.add_argument(
+        "--watch-min", type=float, default=60.0, help="Intervalle minimal en secondes (défaut: 60)"
+    )
+    parser.add_argument(
+        "--watch-max", type=float, default=1800.0, help="Intervalle maximal en secondes (défaut: 1800)"
+    )
+    parser.add_argument(
+        "--watch-horizon",
+        type=float,
+        default=3.0,
+        help="Heures avant un mouvement où l'intervalle reste minimal (défaut: 3)",
+    )
+    parser.add_argument(
+        "--watch-iterations", type=int, default=0, help="Nombre de relevés puis arrêt (défaut: 0, sans fin)"
+    )
+    # Démon Playwright persistant (voir papeete_daemon)
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Lancer le démon Playwright persistant (Chromium gardé au chaud)",
+    )
+    parser.add_argument(
+        "--daemon-host", default=DEFAULT_DAEMON_HOST, help="Hôte du démon (défaut: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--daemon-port", type=int, default=DEFAULT_DAEMON_PORT, help="Port du démon (défaut: 8765)"
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Ne pas contacter le démon: lancer Chromium dans ce processus",
+    )
+    # Blocage des ressources (voir papeete_blocking pour la syntaxe)
+    parser.add_argument(
+        "--block",
+        action="append",
+        help=(
+            "Types de ressources ou hôtes à bloquer en plus des défauts (ex: script,cdn.example.com; 'none' pour "
+            "tout laisser passer). meta.network compte les requêtes bloquées; les octets évités ne sont pas "
+            "connus (aucune réponse), seule la comparaison de bench_papeete.py block les mesure"
+        ),
+    )
+    parser.add_argument(
+        "--allow",
+        action="append",
+        help="Types de ressources ou hôtes à laisser passer (ex: stylesheet,tracker; 'all' pour désactiver le blocage)",
+    )
+    return parser
 
-    args = parser.parse_args()
 
-    # Configure logging
-    # Configuration simple du logging (niveau et format)
-    logging.basicConfig(
-        level=getattr(logging, args.log_level),
-        format="%(levelname)s %(message)s",
+# Extrait les paramètres de scraping, transmis tels quels au démon.
+def _job_from_args(args: argparse.Namespace, url: str = None) -> Dict[str, Any]:
+    """Construit le job de scraping (sérialisable en JSON) à partir des arguments CLI."""
+    return {
+        "url": url or args.url,
+        "timeout": args.timeout,
+        "block": args.block,
+        "allow": args.allow,
+        "wait_strategy": args.wait_strategy,
+        "min_rows": args.min_rows,
+        "discover_api": args.discover_api,
+        "text_mode": args.text_mode,
+        "columns": args.columns,
+        "drop_columns": args.drop_columns,
+        # --db: l'historique reçoit toutes les colonnes (clé du mouvement), pas de projection dans la page
+        "project": not args.db,
+        "types": _pushed_types(args),
+        "metrics": bool(args.metrics or args.metrics_prom),
+        "record_har": args.record_har,
+        "replay_har": args.replay_har,
+        "har_latency": args.har_latency,
+    }
+
+
+# Types filtrés dans la page; aucun si l'historique --db doit recevoir tous les types.
+def _pushed_types(args: argparse.Namespace) -> List[str]:
+    if args.no_type_filter or args.db:
+        return None
+    return sorted(_wanted_types(args.type_only)) or None
+
+
+# Ajoute la requête --type-query à l'URL (filtre appliqué par le serveur).
+def _with_query(url: str, query: str) -> str:
+    if not query:
+        return url
+    parts = urlsplit(url)
+    merged = "&".join(q for q in (parts.query, query.lstrip("?&")) if q)
+    return urlunsplit(parts._replace(query=merged))
+
+
+# Charge l'URL dans une page ouverte et y recherche le meilleur tableau.
+def _scrape_page(page, job: Dict[str, Any], metrics=None) -> Dict[str, Any]:
+    """Navigue vers job["url"] puis cherche le meilleur tableau (page + iframes).
+
+    Utilisé aussi bien en local que par le démon. Renvoie None si aucun tableau;
+    sinon le tableau porte aussi les compteurs réseau (clé « network ») et, si
+    job["metrics"], les spans de la navigation et de l'extraction (clé « metrics »).
+    """
+    if metrics is None:
+        metrics = new_metrics(job.get("metrics"))
+    if job.get("replay_har"):
+        # Avant le blocage: les routes installées en dernier sont évaluées en premier
+        install_replay(page, job["replay_har"], job.get("har_latency", "zero"))
+    stats = install_blocking(page, BlockingPolicy.from_lists(job.get("block"), job.get("allow")))
+    recorder = None
+    if job.get("discover_api"):
+        recorder = ResponseRecorder()
+        page.on("response", recorder.on_response)
+    strategy = job.get("wait_strategy", "table")
+    # « table »: le DOMContentLoaded suffit, l'attente porte ensuite sur le tableau lui-même.
+    # « networkidle »: attend la fin de toute activité réseau (plus lent, plus prudent).
+    wait_until = "domcontentloaded" if strategy == "table" else strategy
+    started = time.monotonic()
+    try:
+        logger.info("Navigation vers l'URL: %s", job["url"])
+        with metrics.span("goto"):
+            page.goto(job["url"], wait_until=wait_until, timeout=job["timeout"])
+        logger.debug("Navigation terminée (%s)", wait_until)
+    except PlaywrightTimeoutError:
+        logger.warning(
+            "Timeout atteint lors du chargement de la page; tentative de rÃ©cupÃ©ration des donnÃ©es malgrÃ© tout."
+        )
+
+    attempts = 4
+    if strategy == "table":
+        min_rows = job.get("min_rows", DEFAULT_MIN_ROWS)
+        remaining_ms = max(0, job["timeout"] - int((time.monotonic() - started) * 1000))
+        with metrics.span("wait_for_table"):
+            ready = _wait_for_table(page, min_rows, remaining_ms)
+        if not ready:
+            logger.warning("Aucun tableau d'au moins %d ligne(s) avant le timeout; extraction en l'état.", min_rows)
+        # Le tableau est prêt (ou le délai épuisé): un seul passage d'extraction
+        attempts = 1
+
+    best = None
+    for attempt in range(attempts):
+        logger.debug("Recherche de tableaux dans la page et les iframes...")
+        with metrics.span("find_best_table"):
+            best, _all = _find_best_table(page, _extraction_options(job), metrics)
+        if best:
+            logger.info(
+                "Tableau sÃ©lectionnÃ©: id=%s, classes=%s, lignes=%s, colonnes=%s",
+                best.get("id"),
+                best.get("classes"),
+                best.get("rowCount"),
+                best.get("colCount"),
+            )
+            break
+        if attempt + 1 < attempts:
+            time.sleep(1.0)
+
+    # Octets exacts: un aller-retour par requête, seulement si --metrics ou le niveau DEBUG;
+    # sinon estimation par Content-Length (voir NetworkStats)
+    network = stats.summary(with_sizes=metrics.enabled or logger.isEnabledFor(logging.DEBUG))
+    logger.info(
+        "Réseau: %d requête(s) bloquée(s) %s, %d servie(s), %s%d octets reçus",
+        network["requests_blocked"],
+        network["blocked_by_reason"],
+        network["requests_completed"],
+        "" if network["bytes_exact"] else "~",
+        network["bytes_received"],
     )
-    logger.debug("Arguments: %s", vars(args))
+    if best:
+        best["network"] = network
+        if metrics.enabled:
+            metrics.add("bytes_received", network["bytes_received"])
+            best["metrics"] = metrics.to_dict()
+        if recorder is not None:
+            best["api_recipe"] = discover_recipe(recorder, best, job["url"])
+    return best
+
 
+# Lance Chromium dans ce processus pour un seul job (démarrage à froid).
+def _run_in_process(job: Dict[str, Any], headless: bool) -> Dict[str, Any]:
+    """Démarre Playwright et Chromium, exécute le job puis ferme le navigateur."""
+    metrics = new_metrics(job.get("metrics"))
     with sync_playwright() as p:
         # Lancement de Chromium (headless par dÃ©faut) et crÃ©ation d'un contexte/page
-        logger.info("DÃ©marrage de Chromium (headless=%s)", str(not args.headful).lower())
-        browser = p.chromium.launch(headless=not args.headful)
-        context = browser.new_context(locale="fr-FR")
-        page = context.new_page()
+        logger.info("DÃ©marrage de Chromium (headless=%s)", str(headless).lower())
+        with metrics.span("launch"):
+            browser = p.chromium.launch(headless=headless)
+        with metrics.span("context"):
+            context = browser.new_context(locale="fr-FR", **record_options(job.get("record_har")))
+            page = context.new_page()
         try:
-            logger.info("Navigation vers l'URL: %s", args.url)
-            # On attend le state Â« networkidle Â» pour maximiser les chances que
-            # le tableau soit peuplÃ©. Certains contenus peuvent encore arriver ensuite.
-            page.goto(args.url, wait_until="networkidle", timeout=args.timeout)
-            logger.debug("Navigation terminÃ©e (networkidle)")
-        except PlaywrightTimeoutError:
-            logger.warning(
-                "Timeout atteint lors du chargement de la page; tentative de rÃ©cupÃ©ration des donnÃ©es malgrÃ© tout."
-            )
-
-        best = None
-        for _ in range(4):
-            logger.debug("Recherche de tableaux dans la page et les iframes...")
-            best, _all = _find_best_table(page)
-            if best:
-                logger.info(
-                    "Tableau sÃ©lectionnÃ©: id=%s, classes=%s, lignes=%s, colonnes=%s",
-                    best.get("id"),
-                    best.get("classes"),
-                    best.get("rowCount"),
-                    best.get("colCount"),
-                )
-                break
-            time.sleep(1.0)
-
-        if not best:
-            logger.error("Aucun tableau dÃ©tectÃ© sur la page (ou dans ses iframes).")
+            return _scrape_page(page, job, metrics)
+        finally:
+            logger.debug("Fermeture du contexte et du navigateur")
+            # L'archive HAR n'est écrite qu'à la fermeture du contexte
             context.close()
             browser.close()
-            sys.exit(2)
-
-        # Mise en forme des donnÃ©es (entÃªtes + enregistrements)
-        headers, records = _to_records(best)
-        logger.info("Extraction terminÃ©e: %d enregistrements", len(records))
-        # DÃ©termine la colonne Â« type Â» et applique le filtrage si demandÃ©
-        # Repere la colonne portante pour le type de navire.
-        def _guess_type_field(hdrs: List[str]):
-            for h in hdrs:
-                if "type" in h.lower():
-                    return h
+            if job.get("record_har"):
+                logger.info("Archive HAR enregistrée: %s", job["record_har"])
+
+
+# Tente l'extraction sans navigateur; renvoie None si aucun tableau plausible.
+def _fetch_best_table_http(job: Dict[str, Any], metrics=NULL_METRICS) -> Dict[str, Any]:
+    """Chemin rapide: HTTP + analyse HTML, même classement que dans le navigateur.
+
+    Le tableau n'est retenu que s'il a au moins `min_rows` lignes et 2 colonnes,
+    sinon il est probablement rempli par JavaScript (ou absent du HTML).
+    """
+    try:
+        candidates = collect_tables(job["url"], job["timeout"])
+    except (HttpError, OSError, http.client.HTTPException, zlib.error, UnicodeError) as exc:
+        # zlib.error: corps gzip/deflate tronqué ou corrompu; repli sur le navigateur
+        logger.info("Chemin HTTP indisponible (%s)", exc)
+        return None
+    metrics.add("tables_found", len(candidates))
+    best, _all = _pick_best_table(candidates)
+    min_rows = job.get("min_rows", DEFAULT_MIN_ROWS)
+    if not best or best.get("rowCount", 0) < min_rows or best.get("colCount", 0) < 2:
+        logger.info("Aucun tableau plausible dans le HTML servi (%d candidat(s))", len(candidates))
+        return None
+    logger.info(
+        "Tableau extrait sans navigateur: id=%s, lignes=%s, colonnes=%s",
+        best.get("id"),
+        best.get("rowCount"),
+        best.get("colCount"),
+    )
+    return best
+
+
+# Appelle le point d'accès JSON d'une recette déjà découverte; None si absent ou en échec.
+def _fetch_best_table_api(args: argparse.Namespace, job: Dict[str, Any]) -> Dict[str, Any]:
+    recipe = load_recipe(args.api_recipe, args.url)
+    if recipe is None:
+        logger.debug("Aucune recette API pour cette URL: %s", args.api_recipe)
+        return None
+    try:
+        best = fetch_table(recipe, job["timeout"])
+    except (HttpError, OSError, http.client.HTTPException, zlib.error, ValueError, LookupError, TypeError) as exc:
+        logger.warning("Recette API obsolète ou point d'accès en échec (%s); relancer --discover-api", exc)
+        return None
+    if not best:
+        logger.warning("Le point d'accès JSON n'a renvoyé aucune ligne: %s", recipe["endpoint"]["url"])
+        return None
+    logger.info("Tableau obtenu par l'API JSON: %d lignes (%s)", best["rowCount"], recipe["endpoint"]["url"])
+    return best
+
+
+# Obtient le tableau par Chromium; ses spans (clé « metrics ») rejoignent ceux du relevé.
+def _fetch_best_table_browser(args: argparse.Namespace, job: Dict[str, Any], metrics=NULL_METRICS) -> Dict[str, Any]:
+    with metrics.span("browser"):
+        best = _scrape_with_browser(args, job)
+    if best:
+        metrics.merge(best.pop("metrics", None))
+    return best
+
+
+# Obtient le tableau via le démon si disponible, sinon en local.
+def _scrape_with_browser(args: argparse.Namespace, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Client léger: délègue au démon, avec repli sur un lancement local de Chromium."""
+    warm = getattr(args, "warm_browser", None)
+    if warm is not None:
+        return warm.scrape(job)
+    # Enregistrement et rejeu HAR: contexte propre à ce processus, jamais le démon
+    if not args.no_daemon and not (job.get("record_har") or job.get("replay_har")):
+        try:
+            best = request_scrape(args.daemon_host, args.daemon_port, job)
+            logger.info("Tableau obtenu via le démon %s:%d", args.daemon_host, args.daemon_port)
+            return best
+        except DaemonUnavailable as exc:
+            logger.debug("Démon indisponible, lancement local: %s", exc)
+    return _run_in_process(job, headless=not args.headful)
+
+
+# Choisit le moteur d'extraction selon --engine.
+def _fetch_best_table(args: argparse.Namespace, metrics=NULL_METRICS) -> Dict[str, Any]:
+    """Essaie l'API JSON (auto/api), le chemin HTTP (auto/http), puis Playwright (auto/browser).
+
+    --discover-api impose le navigateur: la découverte écoute ses réponses XHR.
+    """
+    job = _job_from_args(args)
+    if args.discover_api:
+        best = _fetch_best_table_browser(args, job, metrics)
+        if best:
+            best["engine"] = "browser"
+            recipe = best.pop("api_recipe", None)
+            if recipe:
+                save_recipe(args.api_recipe, recipe)
+                logger.info("Recette API enregistrée: %s", args.api_recipe)
+        return best
+    if args.engine in ("auto", "api"):
+        with metrics.span("api"):
+            best = _fetch_best_table_api(args, job)
+        if best:
+            best["engine"] = "api"
+            return best
+        if args.engine == "api":
             return None
-        type_field = _guess_type_field(headers)
-        if type_field:
-            logger.debug("Colonne de type dÃ©tectÃ©e: %s", type_field)
-        else:
-            logger.warning("Aucune colonne contenant 'type' dÃ©tectÃ©e: filtrage ignorÃ©")
-        if not args.no_type_filter and type_field:
+    if args.engine != "browser":
+        with metrics.span("http"):
+            best = _fetch_best_table_http(job, metrics)
+        if best:
+            best["engine"] = "http"
+            return best
+        if args.engine == "http":
+            return None
+    best = _fetch_best_table_browser(args, job, metrics)
+    if best:
+        best["engine"] = "browser"
+    return best
+
+
+# Met en forme le tableau retenu: enregistrements, filtrage par type et méta-données.
+def _build_result(
+    best: Dict[str, Any], args: argparse.Namespace, source_url: str, metrics=NULL_METRICS
+) -> Tuple[List[str], List[Dict[str, str]], List[Dict[str, str]], Dict[str, Any]]:
+    """Renvoie (entêtes, tous les enregistrements, enregistrements filtrés, meta).
+
+    Avec --db, « tous les enregistrements » gardent toutes les colonnes (hors
+    IGNORED_HEADERS) quelle que soit la projection: la clé de l'historique
+    (date-heure, navire, sens, quai) ne doit pas perdre de colonne.
+    """
+    # Mise en forme des donnÃ©es (entÃªtes + enregistrements)
+    with metrics.span("to_records"):
+        headers, records = _to_records(best, args.columns, args.drop_columns)
+        all_records = records
+        if args.db and (args.columns or args.drop_columns):
+            _all_headers, all_records = _to_records(best)
+    metrics.add("rows", len(records))
+    logger.info("Extraction terminÃ©e: %d enregistrements", len(records))
+    # DÃ©termine la colonne Â« type Â» et applique le filtrage si demandÃ©
+    type_index = _type_column(headers)
+    type_field = headers[type_index] if type_index is not None else None
+    wanted = _wanted_types(args.type_only)
+    if best.get("types_filtered"):
+        # Lignes déjà filtrées par le script injecté (voir _rows_options)
+        logger.info(
+            "Filtrage par type='%s' dans la page: %d -> %d enregistrements",
+            ",".join(best["types_filtered"]),
+            best.get("rowCount", len(records)),
+            len(records),
+        )
+    elif type_field:
+        logger.debug("Colonne de type dÃ©tectÃ©e: %s", type_field)
+    elif args.columns or args.drop_columns:
+        logger.warning("Colonne de type exclue par --columns/--drop-columns: filtrage par type ignoré")
+    else:
+        logger.warning("Aucune colonne contenant 'type' dÃ©tectÃ©e: filtrage ignorÃ©")
+    with metrics.span("filter"):
+        if not args.no_type_filter and type_field and not best.get("types_filtered"):
             before = len(records)
-            wanted = (args.type_only or "").strip().upper()
             if wanted:
-                records = [r for r in records if r.get(type_field, "").strip().upper() == wanted]
-                logger.info("Filtrage par type='%s': %d -> %d enregistrements", wanted, before, len(records))
+                records = [r for r in records if r.get(type_field, "").strip().upper() in wanted]
+                logger.info(
+                    "Filtrage par type='%s': %d -> %d enregistrements", ",".join(sorted(wanted)), before, len(records)
+                )
             else:
                 logger.debug("Type cible vide: aucun filtrage appliquÃ©")
-        meta = {
-            "source_url": args.url,
-            "frame_url": best.get("frame_url"),
-            "headers": headers,
-            "row_count": len(records),
-            "table_id": best.get("id"),
-            "table_classes": best.get("classes"),
-            "table_caption": best.get("caption"),
-        }
-
-        if args.json:
-            logger.info("Ã‰criture JSON: %s", args.json)
-            with open(args.json, "w", encoding="utf-8") as f:
-                json.dump({"meta": meta, "records": records}, f, ensure_ascii=False, indent=2)
-
-        if args.csv:
-            logger.info("Ã‰criture CSV: %s", args.csv)
-            with open(args.csv, "w", encoding="utf-8", newline="") as f:
+    if args.chronological:
+        with metrics.span("sort"):
+            records = sort_chronologically(records, MovementFields.from_headers(headers).date)
+    metrics.add("rows_output", len(records))
+    meta = {
+        "source_url": source_url,
+        "frame_url": best.get("frame_url"),
+        "headers": headers,
+        "row_count": len(records),
+        "table_id": best.get("id"),
+        "table_classes": best.get("classes"),
+        "table_caption": best.get("caption"),
+        "engine": best.get("engine"),
+        "network": best.get("network"),
+        "content_hash": best.get("content_hash"),
+    }
+    return headers, all_records, records, meta
+
+
+# Options qui changent les enregistrements produits à tableau identique.
+def _record_options(args: argparse.Namespace) -> List[Any]:
+    return [args.no_type_filter, args.type_only, args.chronological, args.columns, args.drop_columns, args.type_query]
+
+
+# État de --hash-file: {"tables": {url: {"content_hash", "options", "frame_url", "validators", "run_s"}},
+# "preflight": compteurs cumulés de la pré-vérification}.
+def _load_hash_state(path: str) -> Dict[str, Any]:
+    state = load_state(path) or {}
+    return {"tables": state.get("tables", {}), "preflight": state.get("preflight", {})}
+
+
+def _save_hash_state(path: str, state: Dict[str, Any]) -> None:
+    save_state(path, {"version": HASH_STATE_VERSION, **state})
+
+
+# True si l'empreinte du tableau est celle mémorisée pour cette URL (mêmes options); met la mémoire à jour.
+def _is_unchanged(args: argparse.Namespace, tables: Dict[str, Dict[str, Any]], url: str, best: Dict[str, Any]) -> bool:
+    previous = tables.get(url)
+    unchanged = bool(
+        previous
+        and previous.get("content_hash") == best["content_hash"]
+        and previous.get("options") == _record_options(args)
+    )
+    if unchanged:
+        logger.info("Tableau inchangé (%s): conversion et écritures ignorées", best["content_hash"][:12])
+    entry = tables.setdefault(url, {})
+    entry.update(
+        {"content_hash": best["content_hash"], "options": _record_options(args), "frame_url": best.get("frame_url")}
+    )
+    return unchanged
+
+
+# Pré-vérification conditionnelle de l'URL et du document du tableau connu.
+def _preflight(
+    args: argparse.Namespace, state: Dict[str, Any], url: str
+) -> Tuple[bool, Dict[str, Any], Dict[str, Any]]:
+    """Renvoie (rien n'a changé, validateurs à mémoriser après le scraping, résumé)."""
+    entry = state["tables"].get(url) or {}
+    known = bool(entry.get("content_hash")) and entry.get("options") == _record_options(args)
+    same, validators, elapsed = preflight([url, entry.get("frame_url")], entry.get("validators") or {}, args.timeout)
+    hit = known and same
+    summary = record_outcome(state["preflight"], hit, elapsed, entry.get("run_s"))
+    logger.info(
+        "Pré-vérification %s: %s en %.3f s (taux de succès %.0f %%, %.1f s économisées au total)",
+        url,
+        "inchangé" if hit else "à extraire",
+        elapsed,
+        summary["hit_rate"] * 100,
+        summary["total_saved_s"],
+    )
+    return hit, validators, summary
+
+
+# Mémorise, après un scraping complet, ce qui servira à la prochaine pré-vérification.
+def _remember_run(state: Dict[str, Any], url: str, validators: Dict[str, Any], run_s: float) -> None:
+    entry = state["tables"].setdefault(url, {})
+    if validators:
+        entry["validators"] = validators
+    entry["run_s"] = round(run_s, 3)
+
+
+# Méta réduite renvoyée pour un tableau inchangé.
+def _unchanged_meta(source_url: str, content_hash: str, engine: str = None) -> Dict[str, Any]:
+    return {
+        "source_url": source_url,
+        "status": "unchanged",
+        "content_hash": content_hash,
+        "engine": engine,
+    }
+
+
+# Fusionne tous les enregistrements (avant filtrage par type et projection) dans l'historique SQLite.
+def _store_history(path: str, records: List[Dict[str, str]], meta: Dict[str, Any]) -> None:
+    # En-têtes des enregistrements non projetés (voir _build_result), dans l'ordre du tableau
+    headers = list(records[0]) if records else []
+    with HistoryStore(path) as store:
+        meta["history"] = store.record_run(headers, records, meta)
+
+
+# Compare les enregistrements au relevé précédent et émet les événements (rien si inchangé).
+def _emit_diff(
+    args: argparse.Namespace, state_path: str, headers: List[str], records: List[Dict[str, str]], meta: Dict[str, Any]
+) -> None:
+    digest, events = diff_with_state(state_path, headers, records)
+    meta["diff"] = {"content_hash": digest, "changed": events is not None, "events": len(events or [])}
+    if events:
+        write_events(args.diff_out, events, {"source_url": meta.get("source_url")})
+
+
+# Apparie arrivées et départs en escales puis écrit --calls et/ou --occupancy.
+def _export_calls(
+    args: argparse.Namespace, headers: List[str], records: List[Dict[str, str]], meta: Dict[str, Any], index: int = None
+) -> None:
+    calls = pair_calls(headers, records)
+    meta["call_count"] = len(calls)
+    if args.calls:
+        path = _indexed_path(args.calls, index) if index else args.calls
+        logger.info("Écriture des escales (%d): %s", len(calls), path)
+        write_calls(path, calls, meta)
+    if args.occupancy:
+        path = _indexed_path(args.occupancy, index) if index else args.occupancy
+        occupancy = OccupancyIndex(calls)
+        logger.info("Écriture de l'occupation des quais (%d quai(s)): %s", len(occupancy.quays), path)
+        write_report(path, occupancy)
+
+
+# Écrit les exports Parquet / Arrow IPC demandés (chemins suffixés en multi-URL).
+def _write_columnar(
+    args: argparse.Namespace, headers: List[str], records: List[Dict[str, str]], index: int = None, metrics=NULL_METRICS
+) -> None:
+    table = None
+    for fmt in COLUMNAR_FORMATS:
+        path = getattr(args, fmt)
+        if not path:
+            continue
+        path = _indexed_path(path, index) if index else path
+        with metrics.span(f"write_{fmt}"):
+            table = table or movements_table(headers, records)
+            logger.info("Écriture %s: %s", fmt.capitalize(), path)
+            write_table(table, path, fmt)
+        _count_bytes(metrics, path)
+
+
+# Sans fichier de sortie, le JSON complet n'est affiché que si le différentiel n'occupe pas stdout.
+def _print_records(args: argparse.Namespace) -> bool:
+    if args.print:
+        return True
+    if args.json or args.csv or args.parquet or args.arrow or args.ndjson:
+        return False
+    return not (args.diff_state and args.diff_out == "-")
+
+
+# Ajoute la taille d'un fichier écrit au compteur bytes_written.
+def _count_bytes(metrics, path: str) -> None:
+    if metrics.enabled and path != "-":
+        metrics.add("bytes_written", os.path.getsize(path))
+
+
+# Écrit les sorties demandées (JSON, CSV, stdout).
+def _write_outputs(
+    args: argparse.Namespace, headers: List[str], records: List[Dict[str, str]], meta: Dict[str, Any], metrics=NULL_METRICS
+) -> None:
+    """Écrit le JSON/CSV demandés et affiche le JSON si aucun fichier n'est visé."""
+    if args.json:
+        logger.info("Ã‰criture JSON: %s", args.json)
+        with metrics.span("write_json"), open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "records": records}, f, ensure_ascii=False, indent=2)
+        _count_bytes(metrics, args.json)
+
+    if args.csv:
+        logger.info("Ã‰criture CSV: %s", args.csv)
+        with metrics.span("write_csv"), open(args.csv, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=headers)
+            writer.writeheader()
+            for rec in records:
+                writer.writerow(rec)
+        _count_bytes(metrics, args.csv)
+
+    _write_columnar(args, headers, records, metrics=metrics)
+
+    if args.ndjson:
+        logger.info("Écriture NDJSON: %s", args.ndjson)
+        with metrics.span("write_ndjson"), NdjsonWriter(args.ndjson, args.json_backend) as writer:
+            writer.write(meta, records)
+        _count_bytes(metrics, args.ndjson)
+
+    if _print_records(args):
+        logger.debug("Affichage JSON sur stdout")
+        with metrics.span("write_stdout"):
+            print(json.dumps({"meta": meta, "records": records}, ensure_ascii=False, indent=2))
+
+
+# Variante asynchrone de _find_best_table (mêmes scripts en deux temps).
+async def _find_best_table_async(page, options: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    summaries = []
+    for frame in page.frames:
+        try:
+            result = await frame.evaluate(_SUMMARIZE_TABLES_JS, options)
+        except Exception:
+            logger.debug("Aucune table ou erreur lors de l'évaluation dans le frame: %s", frame.url)
+            continue
+        if result["best"]:
+            result["best"]["frame_url"] = frame.url
+            summaries.append((result["best"], frame))
+    if not summaries:
+        return None, []
+    ranked = _rank_summaries(summaries)
+    best, frame = ranked[0]
+    rows_options = _rows_options(best, options)
+    try:
+        best["rows"] = await frame.evaluate(_TABLE_ROWS_JS, [best["index"], rows_options])
+    except Exception:
+        logger.debug("Lecture des lignes impossible dans le frame: %s", frame.url)
+        return None, []
+    if best["rows"] is None:
+        return None, []
+    _mark_projected(best, rows_options)
+    return best, [s for s, _frame in ranked]
+
+
+# Variante asynchrone de _wait_for_table.
+async def _wait_for_table_async(page, min_rows: int, timeout_ms: int) -> bool:
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    while True:
+        frames = page.frames
+        slice_ms = 1000 if len(frames) == 1 else max(50, 250 // len(frames))
+        for frame in frames:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                return False
+            try:
+                if await frame.evaluate(_TABLE_READY_JS, [min_rows, min(slice_ms, remaining_ms), TABLE_QUIET_MS]):
+                    return True
+            except Exception:
+                logger.debug("Frame indisponible pendant l'attente: %s", frame.url)
+                await asyncio.sleep(min(slice_ms, FRAME_RETRY_MS, remaining_ms) / 1000.0)
+
+
+# Variante asynchrone de _scrape_page (blocage, stratégie d'attente, extraction).
+async def _scrape_page_async(page, job: Dict[str, Any]) -> Dict[str, Any]:
+    stats = await install_blocking_async(page, BlockingPolicy.from_lists(job.get("block"), job.get("allow")))
+    strategy = job.get("wait_strategy", "table")
+    wait_until = "domcontentloaded" if strategy == "table" else strategy
+    started = time.monotonic()
+    try:
+        await page.goto(job["url"], wait_until=wait_until, timeout=job["timeout"])
+    except PlaywrightTimeoutError:
+        logger.warning("Timeout au chargement de %s; extraction en l'état.", job["url"])
+
+    attempts = 4
+    if strategy == "table":
+        min_rows = job.get("min_rows", DEFAULT_MIN_ROWS)
+        remaining_ms = max(0, job["timeout"] - int((time.monotonic() - started) * 1000))
+        if not await _wait_for_table_async(page, min_rows, remaining_ms):
+            logger.warning("Aucun tableau d'au moins %d ligne(s) avant le timeout: %s", min_rows, job["url"])
+        attempts = 1
+
+    best = None
+    for attempt in range(attempts):
+        best, _all = await _find_best_table_async(page, _extraction_options(job))
+        if best:
+            break
+        if attempt + 1 < attempts:
+            await asyncio.sleep(1.0)
+
+    if best:
+        best["network"] = await stats.summary_async(
+            with_sizes=bool(job.get("metrics")) or logger.isEnabledFor(logging.DEBUG)
+        )
+    return best
+
+
+# Scrape plusieurs URLs en parallèle: un navigateur, un contexte, `concurrency` pages au plus.
+async def _scrape_many(
+    jobs: List[Dict[str, Any]], engine: str, concurrency: int, headless: bool
+) -> List[Tuple[Dict[str, Any], str]]:
+    """Renvoie, dans l'ordre des jobs, des couples (tableau_retenu, erreur).
+
+    Le chemin HTTP (auto/http) est tenté d'abord dans un thread; Chromium n'est
+    lancé qu'au premier job qui en a besoin. Chaque URL a son propre délai
+    (timeout du job + marge pour l'extraction).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    launch_lock = asyncio.Lock()
+    browser_state: Dict[str, Any] = {}
+
+    async with async_playwright() as p:
+
+        async def _context():
+            async with launch_lock:
+                if "context" not in browser_state:
+                    logger.info("Démarrage de Chromium (headless=%s)", str(headless).lower())
+                    browser_state["browser"] = await p.chromium.launch(headless=headless)
+                    browser_state["context"] = await browser_state["browser"].new_context(locale="fr-FR")
+                return browser_state["context"]
+
+        async def _one(job: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+            async with semaphore:
+                started = time.perf_counter()
+                if engine in ("auto", "http"):
+                    best = await asyncio.to_thread(_fetch_best_table_http, job)
+                    if best:
+                        best["engine"] = "http"
+                        return best, None
+                    if engine == "http":
+                        return None, "aucun tableau plausible dans le HTML servi"
+                page = await (await _context()).new_page()
+                try:
+                    best = await asyncio.wait_for(
+                        _scrape_page_async(page, job), timeout=job["timeout"] / 1000.0 + URL_TIMEOUT_GRACE_S
+                    )
+                except asyncio.TimeoutError:
+                    return None, "timeout"
+                except Exception as exc:
+                    logger.warning("Échec du scraping de %s: %s", job["url"], exc)
+                    return None, f"{type(exc).__name__}: {exc}"
+                finally:
+                    await page.close()
+                logger.info("%s: %.3f s", job["url"], time.perf_counter() - started)
+                if not best:
+                    return None, "aucun tableau détecté"
+                best["engine"] = "browser"
+                return best, None
+
+        try:
+            return await asyncio.gather(*(_one(job) for job in jobs))
+        finally:
+            if "browser" in browser_state:
+                await browser_state["context"].close()
+                await browser_state["browser"].close()
+
+
+# Chemin de sortie propre à la n-ième URL (« out.csv » -> « out-2.csv »).
+def _indexed_path(path: str, index: int) -> str:
+    if "{index}" in path:
+        return path.replace("{index}", str(index))
+    stem, dot, ext = path.rpartition(".")
+    return f"{stem}-{index}.{ext}" if dot else f"{path}-{index}"
+
+
+# Mode multi-URL: scraping asynchrone puis un jeu de résultats (meta + records) par URL.
+def _run_many(args: argparse.Namespace) -> None:
+    state = _load_hash_state(args.hash_file) if args.hash_file else None
+    checks = [_preflight(args, state, url) if args.preflight else (False, {}, None) for url in args.urls]
+    jobs = [_job_from_args(args, url) for url, check in zip(args.urls, checks) if not check[0]]
+    started = time.perf_counter()
+    scraped = iter(
+        asyncio.run(_scrape_many(jobs, args.engine, args.concurrency, headless=not args.headful)) if jobs else []
+    )
+    # Durée moyenne par URL (les pages sont extraites en parallèle)
+    run_s = (time.perf_counter() - started) / max(1, len(jobs))
+    results = []
+    for index, (url, (hit, validators, preflight_info)) in enumerate(zip(args.urls, checks), start=1):
+        if hit:
+            entry = state["tables"][url]
+            meta = _unchanged_meta(url, entry["content_hash"])
+            meta["preflight"] = preflight_info
+            results.append({"meta": meta, "records": []})
+            continue
+        best, error = next(scraped)
+        if state is not None:
+            _remember_run(state, url, validators, run_s)
+        if best:
+            best["content_hash"] = table_hash(best)
+        if best and state is not None and _is_unchanged(args, state["tables"], url, best):
+            results.append({"meta": _unchanged_meta(url, best["content_hash"], best.get("engine")), "records": []})
+            continue
+        if best:
+            headers, all_records, records, meta = _build_result(best, args, url)
+            if args.db:
+                _store_history(args.db, all_records, meta)
+            if args.diff_state:
+                _emit_diff(args, _indexed_path(args.diff_state, index), headers, records, meta)
+            if args.calls or args.occupancy:
+                _export_calls(args, headers, records, meta, index)
+            if preflight_info:
+                meta["preflight"] = preflight_info
+        else:
+            logger.error("Aucun tableau pour %s: %s", url, error)
+            headers, records, meta = [], [], {"source_url": url, "row_count": 0, "error": error}
+        results.append({"meta": meta, "records": records})
+        if args.csv and best:
+            path = _indexed_path(args.csv, index)
+            logger.info("Écriture CSV: %s", path)
+            with open(path, "w", encoding="utf-8", newline="") as f:
                 writer = csv.DictWriter(f, fieldnames=headers)
                 writer.writeheader()
-                for rec in records:
-                    writer.writerow(rec)
+                writer.writerows(records)
+        if best:
+            _write_columnar(args, headers, records, index)
 
-        if args.print or (not args.json and not args.csv):
-            logger.debug("Affichage JSON sur stdout")
-            print(json.dumps({"meta": meta, "records": records}, ensure_ascii=False, indent=2))
+    if all(r["meta"].get("status") == "unchanged" for r in results):
+        # Rien de neuf: les sorties agrégées de l'exécution précédente restent valables
+        if state is not None:
+            _save_hash_state(args.hash_file, state)
+        sys.exit(EXIT_UNCHANGED)
+    if args.ndjson:
+        logger.info("Écriture NDJSON: %s", args.ndjson)
+        with NdjsonWriter(args.ndjson, args.json_backend) as writer:
+            for result in results:
+                writer.write(result["meta"], result["records"])
+    if args.json:
+        logger.info("Écriture JSON: %s", args.json)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if _print_records(args):
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    if state is not None:
+        _save_hash_state(args.hash_file, state)
+    if all(r["meta"].get("error") for r in results):
+        sys.exit(2)
+
+
+# Un relevé mono-URL complet; renvoie (code de sortie, résumé pour --watch).
+def _run_once(args: argparse.Namespace) -> Tuple[int, Dict[str, Any]]:
+    """Codes: 0 (extrait), 2 (aucun tableau), EXIT_UNCHANGED (tableau inchangé).
+
+    Avec --metrics / --metrics-prom, le résumé des phases est écrit à la fin du
+    relevé, quelle qu'en soit l'issue.
+    """
+    metrics = new_metrics(bool(args.metrics or args.metrics_prom))
+    code = 2
+    try:
+        code, outcome = _run_pipeline(args, metrics)
+        return code, outcome
+    finally:
+        if metrics.enabled:
+            _emit_metrics(args, metrics, code)
+
+
+# Écrit le résumé des phases (JSON et/ou Prometheus) d'un relevé.
+def _emit_metrics(args: argparse.Namespace, metrics, code: int) -> None:
+    summary = metrics.to_dict()
+    summary.update({"source_url": args.url, "exit_code": code})
+    slowest = sorted(summary["phases"].items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:3]
+    logger.info(
+        "Relevé en %.3f s; phases les plus longues: %s",
+        summary["total_s"],
+        ", ".join(f"{name}={phase['total_s']:.3f}s" for name, phase in slowest) or "-",
+    )
+    if args.metrics:
+        write_summary(args.metrics, summary)
+    if args.metrics_prom:
+        write_prometheus(args.metrics_prom, summary, {"url": args.url})
+
+
+def _run_pipeline(args: argparse.Namespace, metrics) -> Tuple[int, Dict[str, Any]]:
+    state = _load_hash_state(args.hash_file) if args.hash_file else None
+    validators, preflight_info = {}, None
+    if args.preflight:
+        with metrics.span("preflight"):
+            hit, validators, preflight_info = _preflight(args, state, args.url)
+        if hit:
+            _save_hash_state(args.hash_file, state)
+            meta = _unchanged_meta(args.url, state["tables"][args.url]["content_hash"])
+            meta["preflight"] = preflight_info
+            if _print_records(args):
+                print(json.dumps({"meta": meta}, ensure_ascii=False, indent=2))
+            return EXIT_UNCHANGED, {"content_hash": meta["content_hash"]}
+
+    started = time.perf_counter()
+    with metrics.span("fetch"):
+        best = _fetch_best_table(args, metrics)
+    if not best:
+        logger.error("Aucun tableau dÃ©tectÃ© sur la page (ou dans ses iframes).")
+        return 2, {}
+
+    with metrics.span("hash"):
+        best["content_hash"] = table_hash(best)
+    if state is not None and _is_unchanged(args, state["tables"], args.url, best):
+        _remember_run(state, args.url, validators, time.perf_counter() - started)
+        _save_hash_state(args.hash_file, state)
+        if _print_records(args):
+            meta = _unchanged_meta(args.url, best["content_hash"], best.get("engine"))
+            print(json.dumps({"meta": meta}, ensure_ascii=False, indent=2))
+        return EXIT_UNCHANGED, {"content_hash": best["content_hash"]}
+
+    headers, all_records, records, meta = _build_result(best, args, args.url, metrics)
+    if preflight_info:
+        meta["preflight"] = preflight_info
+    if args.db:
+        with metrics.span("write_db"):
+            _store_history(args.db, all_records, meta)
+    if args.diff_state:
+        with metrics.span("diff"):
+            _emit_diff(args, args.diff_state, headers, records, meta)
+    if args.calls or args.occupancy:
+        with metrics.span("write_calls"):
+            _export_calls(args, headers, records, meta)
+    _write_outputs(args, headers, records, meta, metrics)
+    if state is not None:
+        _remember_run(state, args.url, validators, time.perf_counter() - started)
+        _save_hash_state(args.hash_file, state)
+    return 0, {
+        "content_hash": best["content_hash"],
+        "movements": minutes_column(r.get(MovementFields.from_headers(headers).date, "") for r in records),
+        "events": (meta.get("diff") or {}).get("events"),
+    }
+
+
+# Navigateur gardé ouvert entre les relevés de --watch (lancé au premier besoin).
+class _WarmBrowser:
+    def __init__(self, headless: bool) -> None:
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    def __enter__(self) -> "_WarmBrowser":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def scrape(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        metrics = new_metrics(job.get("metrics"))
+        if self._context is None:
+            logger.info("Démarrage de Chromium pour --watch (headless=%s)", str(self.headless).lower())
+            with metrics.span("launch"):
+                self._playwright = sync_playwright().start()
+                self._browser = self._playwright.chromium.launch(headless=self.headless)
+            with metrics.span("context"):
+                self._context = self._browser.new_context(locale="fr-FR")
+        page = self._context.new_page()
+        try:
+            return _scrape_page(page, job, metrics)
+        finally:
+            page.close()
+
+    # Ferme tout; le prochain scrape relancera Chromium (utile après un plantage).
+    def close(self) -> None:
+        for closer in (self._context, self._browser):
+            if closer is not None:
+                try:
+                    closer.close()
+                except Exception:
+                    logger.debug("Fermeture du navigateur en échec", exc_info=True)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                logger.debug("Arrêt de Playwright en échec", exc_info=True)
+        self._playwright = self._browser = self._context = None
+
+
+# Mode --watch: relevés en boucle, cadence adaptative, navigateur réutilisé.
+def _watch(args: argparse.Namespace) -> None:
+    schedule = AdaptiveSchedule(args.watch_min, args.watch_max, args.watch_horizon)
+    previous_hash = None
+    iteration = 0
+    with _WarmBrowser(headless=not args.headful) as browser:
+        args.warm_browser = browser
+        try:
+            while True:
+                iteration += 1
+                try:
+                    code, outcome = _run_once(args)
+                except PlaywrightTimeoutError as exc:
+                    logger.warning("Timeout Playwright au relevé %d: %s", iteration, exc)
+                    browser.close()
+                    code, outcome = 2, {}
+                except PlaywrightError as exc:
+                    # Chromium planté ou cible fermée: relancé au prochain relevé
+                    logger.warning("Erreur Playwright au relevé %d, navigateur relancé au suivant: %s", iteration, exc)
+                    browser.close()
+                    code, outcome = 2, {}
+                if code == 2:
+                    delay = schedule.after_failure()
+                else:
+                    content_hash = outcome.get("content_hash")
+                    changed = bool(outcome.get("events")) or (
+                        previous_hash is not None and content_hash != previous_hash
+                    )
+                    previous_hash = content_hash
+                    delay = schedule.after_success(outcome.get("movements"), changed)
+                if args.watch_iterations and iteration >= args.watch_iterations:
+                    break
+                logger.info("Relevé %d terminé (code %d); prochain dans %.1f s", iteration, code, delay)
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            logger.info("Arrêt de --watch après %d relevé(s)", iteration)
+
+
+# Point dentree CLI qui orchestre le scraping et les sorties.
+def main() -> None:
+    """Point d'entrÃ©e CLI: parse les arguments, lance le navigateur, extrait et exporte."""
+    parser = _build_parser()
+    args = parser.parse_args()
+
+    # Configure logging
+    # Configuration simple du logging (niveau et format)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level),
+        format="%(levelname)s %(message)s",
+    )
+    # --url répétable: la première URL reste args.url pour le mode mono-URL.
+    # --type-query est ajoutée ici une fois pour toutes: navigation, recette d'API,
+    # pré-vérification et --hash-file utilisent la même URL effective.
+    args.urls = [_with_query(url, args.type_query) for url in args.url or [DEFAULT_URL]]
+    args.url = args.urls[0]
+    logger.debug("Arguments: %s", vars(args))
+    try:
+        BlockingPolicy.from_lists(args.block, args.allow)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.ndjson:
+        try:
+            line_encoder(args.json_backend)
+        except RuntimeError as exc:
+            parser.error(str(exc))
+
+    if args.preflight and not args.hash_file:
+        parser.error("--preflight requiert --hash-file (validateurs et empreintes du relevé précédent)")
+    if (args.parquet or args.arrow or args.export_history) and pa is None:
+        parser.error("--parquet, --arrow et --export-history requièrent pyarrow (pip install pyarrow)")
+    if args.export_history:
+        if not args.db:
+            parser.error("--export-history requiert --db")
+        counts = export_history(args.db, args.export_history, args.export_format)
+        print(json.dumps({"months": counts, "rows": sum(counts.values())}, ensure_ascii=False, indent=2))
+        return
+
+    if args.record_har or args.replay_har:
+        if args.record_har and args.replay_har:
+            parser.error("--record-har et --replay-har s'excluent")
+        if len(args.urls) > 1 or args.daemon:
+            parser.error("--record-har et --replay-har ne s'appliquent qu'à une seule --url, sans --daemon")
+        if args.record_har and args.watch:
+            parser.error("--record-har ne s'applique pas à --watch")
+        if args.engine in ("api", "http"):
+            parser.error("--record-har et --replay-har requièrent le moteur navigateur")
+        if args.replay_har and args.preflight:
+            parser.error("--preflight interroge le site: incompatible avec --replay-har (rejeu sans réseau)")
+        # Les chemins API et HTTP iraient sur le réseau: le navigateur seul enregistre ou rejoue
+        args.engine = "browser"
+    if args.daemon:
+        serve(args.daemon_host, args.daemon_port, headless=not args.headful, scrape=_scrape_page)
+        return
+    if args.headful and not args.no_daemon:
+        logger.warning(
+            "--headful est ignoré si un démon répond (son navigateur garde le mode de son lancement): "
+            "ajouter --no-daemon pour voir le navigateur"
+        )
+    if args.watch and len(args.urls) > 1:
+        parser.error("--watch ne s'applique qu'à une seule --url")
+    if (args.metrics or args.metrics_prom) and len(args.urls) > 1:
+        parser.error("--metrics et --metrics-prom ne s'appliquent qu'à une seule --url")
+    if len(args.urls) > 1:
+        if args.engine == "api" or args.discover_api:
+            parser.error("--engine api et --discover-api ne s'appliquent qu'à une seule --url")
+        _run_many(args)
+        return
 
-        logger.debug("Fermeture du contexte et du navigateur")
-        context.close()
-        browser.close()
+    if args.watch:
+        _watch(args)
+        return
+    code, _outcome = _run_once(args)
+    if code:
+        sys.exit(code)
 
 
 if __name__ == "__main__":
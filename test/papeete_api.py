@@ -0,0 +1,254 @@
+"""Découverte et appel direct de l'API JSON qui alimente le tableau.
+
+Beaucoup de sites portuaires remplissent la grille des prévisions via une
+requête XHR/fetch renvoyant du JSON. En mode découverte (--discover-api), les
+réponses JSON reçues pendant le premier chargement sont comparées au tableau
+retenu: si une liste d'objets reproduit exactement ses lignes, une « recette »
+est enregistrée (URL, méthode, corps, chemin de la liste et champ de chaque
+colonne). Les exécutions suivantes appellent directement ce point d'accès,
+sans navigateur, et reconstruisent un tableau identique pour ``_to_records``.
+
+Format de la recette (JSON):
+  {"source_url", "endpoint": {"url", "method", "post_data", "headers"},
+   "list_path": [...], "headers": [...], "fields": [{"path": [...], "format": ...} | null],
+   "table": {"id", "classes", "caption", "frame_url"}}
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from papeete_http import HttpPool, iter_body, response_charset
+
+
+logger = logging.getLogger(__name__)
+
+RECIPE_VERSION = 1
+# En-têtes de requête rejoués tels quels (les autres dépendent du navigateur)
+REPLAYED_HEADERS = ("accept", "content-type", "x-requested-with")
+
+Path = List[Any]
+
+
+# Mémorise les réponses XHR/fetch JSON pendant le chargement de la page.
+class ResponseRecorder:
+    def __init__(self) -> None:
+        self.responses: List[Any] = []
+
+    def on_response(self, response) -> None:
+        request = response.request
+        if request.resource_type not in ("xhr", "fetch"):
+            return
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        self.responses.append(response)
+
+
+# Texte d'une valeur JSON tel qu'il apparaîtrait dans une cellule.
+def _cell(value: Any) -> str:
+    if value is None or isinstance(value, bool):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return " ".join(str(value).split())
+
+
+# Convertit une date ISO (« 2025-09-18T05:30:00 ») dans les formats affichés par la page.
+def _iso_to(value: Any, fmt: str) -> Optional[str]:
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.strftime(fmt)
+
+
+FORMATS = {
+    "fr_datetime": "%d/%m/%Y - %H:%M",
+    "fr_date": "%d/%m/%Y",
+}
+
+
+# Applique le format d'un champ de recette à une valeur JSON.
+def _render(value: Any, fmt: Optional[str]) -> str:
+    if fmt in FORMATS:
+        rendered = _iso_to(value, FORMATS[fmt])
+        return rendered if rendered is not None else _cell(value)
+    return _cell(value)
+
+
+# Aplatis un objet JSON en {chemin: valeur} (chemins = tuples de clés/indices).
+def _flatten(item: Any, prefix: Tuple[Any, ...] = ()) -> Dict[Tuple[Any, ...], Any]:
+    flat: Dict[Tuple[Any, ...], Any] = {}
+    if isinstance(item, dict):
+        for key, value in item.items():
+            flat.update(_flatten(value, prefix + (key,)))
+    elif isinstance(item, list):
+        for i, value in enumerate(item):
+            flat.update(_flatten(value, prefix + (i,)))
+    else:
+        flat[prefix] = item
+    return flat
+
+
+# Parcourt le JSON à la recherche de listes d'objets/lignes d'une longueur donnée.
+def _find_lists(obj: Any, length: int, path: Tuple[Any, ...] = ()) -> Iterator[Tuple[Path, list]]:
+    if isinstance(obj, list):
+        if len(obj) == length and all(isinstance(x, (dict, list)) for x in obj):
+            yield list(path), obj
+        for i, value in enumerate(obj[:1]):
+            yield from _find_lists(value, length, path + (i,))
+    elif isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _find_lists(value, length, path + (key,))
+
+
+# Suit un chemin de clés/indices dans un document JSON.
+def _follow(obj: Any, path: Path) -> Any:
+    for key in path:
+        obj = obj[key]
+    return obj
+
+
+# Associe chaque colonne du tableau à un champ JSON dont les valeurs coïncident exactement.
+def _map_columns(rows: List[List[str]], items: list, width: int) -> Optional[List[Optional[Dict[str, Any]]]]:
+    flats = [_flatten(item) for item in items]
+    keys = list(flats[0].keys())
+    fields: List[Optional[Dict[str, Any]]] = []
+    for j in range(width):
+        column = [r[j] for r in rows]
+        found = None
+        for key in keys:
+            for fmt in (None, "fr_datetime", "fr_date"):
+                if all(_render(flat.get(key), fmt) == cell for flat, cell in zip(flats, column)):
+                    found = {"path": list(key), "format": fmt}
+                    break
+            if found:
+                break
+        if found is None and any(column):
+            logger.debug("Colonne %d sans correspondance JSON", j)
+            return None
+        fields.append(found)
+    return fields
+
+
+# Reconstruit les lignes du tableau à partir des objets JSON et de la correspondance des colonnes.
+def _rows_from_items(items: list, fields: List[Optional[Dict[str, Any]]]) -> List[List[str]]:
+    rows = []
+    for item in items:
+        row = []
+        for field in fields:
+            if field is None:
+                row.append("")
+                continue
+            try:
+                value = _follow(item, field["path"])
+            except (KeyError, IndexError, TypeError):
+                value = None
+            row.append(_render(value, field.get("format")))
+        rows.append(row)
+    return rows
+
+
+# Cherche, parmi les réponses enregistrées, celle qui reproduit le tableau retenu.
+def discover_recipe(recorder: ResponseRecorder, table: Dict[str, Any], source_url: str) -> Optional[Dict[str, Any]]:
+    """Renvoie une recette si une réponse JSON reproduit exactement les lignes du tableau."""
+    rows: List[List[str]] = table.get("rows") or []
+    headers: List[str] = table.get("headers") or []
+    width = len(headers) or max((len(r) for r in rows), default=0)
+    if not rows or any(len(r) != width for r in rows):
+        logger.info("Découverte API: tableau irrégulier, correspondance exacte impossible")
+        return None
+    for response in recorder.responses:
+        try:
+            payload = response.json()
+        except Exception:
+            continue
+        for list_path, items in _find_lists(payload, len(rows)):
+            fields = _map_columns(rows, items, width)
+            if fields is None or _rows_from_items(items, fields) != rows:
+                continue
+            request = response.request
+            logger.info("Point d'accès JSON découvert: %s %s", request.method, response.url)
+            return {
+                "version": RECIPE_VERSION,
+                "source_url": source_url,
+                "endpoint": {
+                    "url": response.url,
+                    "method": request.method,
+                    "post_data": request.post_data,
+                    "headers": {k: v for k, v in request.headers.items() if k.lower() in REPLAYED_HEADERS},
+                },
+                "list_path": list_path,
+                "headers": headers,
+                "fields": fields,
+                "table": {
+                    "id": table.get("id"),
+                    "classes": table.get("classes"),
+                    "caption": table.get("caption"),
+                    "frame_url": table.get("frame_url"),
+                },
+            }
+    logger.info("Découverte API: aucune des %d réponse(s) JSON ne reproduit le tableau", len(recorder.responses))
+    return None
+
+
+# Charge la recette si elle existe et correspond à l'URL demandée.
+def load_recipe(path: str, source_url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            recipe = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Recette API illisible (%s): %s", path, exc)
+        return None
+    if recipe.get("version") != RECIPE_VERSION or recipe.get("source_url") != source_url:
+        logger.debug("Recette API ignorée (version ou URL différente): %s", path)
+        return None
+    return recipe
+
+
+def save_recipe(path: str, recipe: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recipe, f, ensure_ascii=False, indent=2)
+
+
+# Appelle directement le point d'accès de la recette et reconstruit le tableau.
+def fetch_table(recipe: Dict[str, Any], timeout_ms: int) -> Optional[Dict[str, Any]]:
+    """Renvoie un tableau au format de ``_collect_tables_from_frame`` (ou None si vide)."""
+    endpoint = recipe["endpoint"]
+    headers = {"Accept": "application/json"}
+    headers.update(endpoint.get("headers") or {})
+    post_data = endpoint.get("post_data")
+    pool = HttpPool(timeout=timeout_ms / 1000.0)
+    try:
+        _url, response = pool.open(
+            endpoint["url"],
+            headers=headers,
+            method=endpoint.get("method") or "GET",
+            body=post_data.encode("utf-8") if post_data else None,
+        )
+        raw = b"".join(iter_body(response))
+        payload = json.loads(raw.decode(response_charset(response)))
+    finally:
+        pool.close()
+    items = _follow(payload, recipe["list_path"])
+    if not isinstance(items, list) or not items:
+        return None
+    rows = _rows_from_items(items, recipe["fields"])
+    headers_out = recipe["headers"]
+    col_count = len(rows[0]) if rows else len(headers_out)
+    table = dict(recipe.get("table") or {})
+    table.update(
+        {
+            "headers": headers_out,
+            "rows": rows,
+            "rowCount": len(rows),
+            "colCount": col_count,
+            "score": len(rows) * (col_count or 1) + (5 if headers_out else 0),
+        }
+    )
+    return table
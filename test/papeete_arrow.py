@@ -0,0 +1,189 @@
+"""Export Parquet / Arrow IPC des mouvements (dépendance optionnelle: pyarrow).
+
+Les carnets d'analyse relisent un historique de plusieurs années: le JSON
+indenté et le CSV imposent de réanalyser chaque date et chaque nombre. Ici
+les colonnes sont typées par un schéma explicite:
+
+  when          timestamp[s, Pacific/Tahiti]  (colonne Date; ms une fois en Parquet)
+  vessel        dictionary<int32, string>
+  vessel_type   dictionary<int32, string>
+  direction     dictionary<int32, string>     (arrival / departure)
+  arrival       date32                        (colonne Arrivées)
+  departure     date32                        (colonne Départs)
+  quay          dictionary<int32, string>
+  length        float64
+  observations  string
+
+L'export de l'historique (``export_history``) ajoute first_seen / last_seen
+(timestamp UTC) et écrit un fichier par mois (``month=AAAA-MM/part-0.parquet``,
+partitionnement « hive » relu directement par ``pyarrow.dataset``).
+
+Exemples:
+  python getPrevNaviresPapeete.py --parquet previsions.parquet
+  python getPrevNaviresPapeete.py --db historique.sqlite --export-history export/
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from papeete_dates import EPOCH, EPOCH_ORDINAL, TAHITI, day_column, minutes_column, parse_iso_minutes
+from papeete_fields import MovementFields, find_field
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("parquet", "arrow")
+TIMEZONE = "Pacific/Tahiti"
+# Papeete n'a pas d'heure d'été: un seul décalage pour convertir l'heure locale en UTC
+_OFFSET_MINUTES = int(TAHITI.utcoffset(EPOCH).total_seconds() // 60)
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow n'est pas installé (pip install pyarrow)")
+
+
+def movement_schema(with_history: bool = False) -> "pa.Schema":
+    require_pyarrow()
+    label = pa.dictionary(pa.int32(), pa.string())
+    fields = [
+        ("when", pa.timestamp("s", tz=TIMEZONE)),
+        ("vessel", label),
+        ("vessel_type", label),
+        ("direction", label),
+        ("arrival", pa.date32()),
+        ("departure", pa.date32()),
+        ("quay", label),
+        ("length", pa.float64()),
+        ("observations", pa.string()),
+    ]
+    if with_history:
+        fields += [
+            ("first_seen", pa.timestamp("s", tz="UTC")),
+            ("last_seen", pa.timestamp("s", tz="UTC")),
+        ]
+    return pa.schema(fields)
+
+
+def _utc_seconds(local_minutes: Optional[int]) -> Optional[int]:
+    return None if local_minutes is None else (local_minutes - _OFFSET_MINUTES) * 60
+
+
+def _epoch_days(ordinal: Optional[int]) -> Optional[int]:
+    return None if ordinal is None else ordinal - EPOCH_ORDINAL
+
+
+def _label(values: Iterable[str]) -> "pa.DictionaryArray":
+    return pa.array([v or None for v in values], pa.string()).dictionary_encode()
+
+
+# Colonnes typées (dans l'ordre du schéma, sans l'historique) à partir des enregistrements.
+def _movement_arrays(headers: List[str], records: List[Dict[str, str]]) -> List["pa.Array"]:
+    fields = MovementFields.from_headers(headers)
+    f_obs = find_field(headers, "observ")
+
+    def column(field: Optional[str]) -> List[str]:
+        return [fields.get(rec, field) for rec in records]
+
+    lengths = []
+    for value in column(fields.length):
+        try:
+            lengths.append(float(value) if value else None)
+        except ValueError:
+            lengths.append(None)
+    return [
+        pa.array([_utc_seconds(m) for m in minutes_column(column(fields.date))], pa.timestamp("s", tz=TIMEZONE)),
+        _label(column(fields.vessel)),
+        _label(column(fields.vessel_type)),
+        _label(fields.direction(rec) for rec in records),
+        pa.array([_epoch_days(d) for d in day_column(column(fields.arrival))], pa.date32()),
+        pa.array([_epoch_days(d) for d in day_column(column(fields.departure))], pa.date32()),
+        _label(column(fields.quay)),
+        pa.array(lengths, pa.float64()),
+        pa.array([v or None for v in column(f_obs)], pa.string()),
+    ]
+
+
+# Tableau Arrow des enregistrements de ``_to_records``.
+def movements_table(headers: List[str], records: List[Dict[str, str]]) -> "pa.Table":
+    require_pyarrow()
+    return pa.Table.from_arrays(_movement_arrays(headers, records), schema=movement_schema())
+
+
+def write_table(table: "pa.Table", path: str, fmt: str) -> None:
+    if fmt == "parquet":
+        pq.write_table(table, path, compression="zstd")
+        return
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+# Lignes de l'historique -> tableau Arrow (date-heure et clés stockées, reste depuis l'enregistrement JSON).
+def _history_table(rows: List[Tuple[Any, ...]]) -> "pa.Table":
+    records: List[Dict[str, str]] = []
+    headers: List[str] = []
+    seen = set()
+    for row in rows:
+        rec = json.loads(row[5])
+        for h in rec:
+            if h not in seen:
+                seen.add(h)
+                headers.append(h)
+        records.append(rec)
+    arrays = _movement_arrays(headers, records)
+    # Les clés normalisées de la base priment sur l'enregistrement brut
+    arrays[0] = pa.array([_utc_seconds(parse_iso_minutes(r[0])) for r in rows], pa.timestamp("s", tz=TIMEZONE))
+    arrays[1] = _label(r[1] for r in rows)
+    arrays[2] = _label(r[4] or "" for r in rows)
+    arrays[3] = _label(r[2] for r in rows)
+    arrays[6] = _label(r[3] for r in rows)
+    for index in (6, 7):
+        arrays.append(
+            pa.array([datetime.fromisoformat(r[index]) for r in rows], pa.timestamp("s", tz="UTC"))
+        )
+    return pa.Table.from_arrays(arrays, schema=movement_schema(with_history=True))
+
+
+# Exporte toute la base d'historique, un fichier par mois de date-heure; renvoie {mois: lignes}.
+def export_history(db_path: str, out_dir: str, fmt: str = "parquet") -> Dict[str, int]:
+    require_pyarrow()
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(
+            "SELECT ts, vessel, direction, quay, vessel_type, record, first_seen, last_seen,"
+            " CASE WHEN ts GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN substr(ts, 1, 7) ELSE 'inconnu' END AS month"
+            " FROM movements ORDER BY month, ts"
+        )
+        counts: Dict[str, int] = {}
+        month: Optional[str] = None
+        batch: List[Tuple[Any, ...]] = []
+        for row in cursor:
+            if row[8] != month and batch:
+                counts[month] = _write_partition(out_dir, month, batch, fmt)
+                batch = []
+            month = row[8]
+            batch.append(row)
+        if batch:
+            counts[month] = _write_partition(out_dir, month, batch, fmt)
+    finally:
+        conn.close()
+    logger.info("Historique exporté (%s): %d mois, %d mouvement(s) -> %s", fmt, len(counts), sum(counts.values()), out_dir)
+    return counts
+
+
+def _write_partition(out_dir: str, month: str, rows: List[Tuple[Any, ...]], fmt: str) -> int:
+    folder = os.path.join(out_dir, f"month={month}")
+    os.makedirs(folder, exist_ok=True)
+    write_table(_history_table(rows), os.path.join(folder, f"part-0.{fmt}"), fmt)
+    return len(rows)
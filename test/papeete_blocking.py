@@ -0,0 +1,252 @@
+"""Blocage des ressources inutiles au chargement de la page des prévisions.
+
+Le tableau n'a besoin que du document, de ses iframes et des requêtes XHR/fetch.
+Une route Playwright (``page.route``) interrompt le reste: images, médias,
+polices, feuilles de style, traqueurs et tuiles cartographiques.
+
+Syntaxe de --block / --allow (listes séparées par des virgules):
+  - un type de ressource Playwright:  image, media, font, stylesheet, script...
+  - le mot-clé « tracker »:          la liste TRACKER_HOSTS
+  - un nom d'hôte (contient un point): bloqué/autorisé avec ses sous-domaines
+  - « none » (--block) / « all » (--allow): aucun blocage
+"""
+
+import logging
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_TYPES = frozenset(
+    {
+        "document",
+        "stylesheet",
+        "image",
+        "media",
+        "font",
+        "script",
+        "texttrack",
+        "xhr",
+        "fetch",
+        "eventsource",
+        "websocket",
+        "manifest",
+        "other",
+    }
+)
+
+DEFAULT_BLOCKED_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# Traqueurs, réseaux sociaux et fournisseurs de tuiles cartographiques connus
+TRACKER_HOSTS = frozenset(
+    {
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "googleadservices.com",
+        "facebook.net",
+        "connect.facebook.com",
+        "hotjar.com",
+        "matomo.cloud",
+        "stats.wp.com",
+        "addtoany.com",
+        "tile.openstreetmap.org",
+        "maps.googleapis.com",
+        "maps.gstatic.com",
+        "api.mapbox.com",
+        "server.arcgisonline.com",
+    }
+)
+
+# Jamais bloqués: sans document (page ou iframe) il n'y a pas de tableau
+NEVER_BLOCKED_TYPES = frozenset({"document"})
+
+
+# Découpe une liste « a,b,c » (ou plusieurs occurrences de l'option) en éléments normalisés.
+def _split_items(values: Optional[Iterable[str]]) -> List[str]:
+    items: List[str] = []
+    for value in values or []:
+        items.extend(v.strip().lower() for v in value.split(",") if v.strip())
+    return items
+
+
+# Indique si `host` est `domain` ou l'un de ses sous-domaines.
+def _host_matches(host: str, domains: FrozenSet[str]) -> bool:
+    while host:
+        if host in domains:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+class BlockingPolicy:
+    """Politique de blocage résolue une fois, puis appliquée à chaque requête."""
+
+    def __init__(
+        self, types: FrozenSet[str], hosts: FrozenSet[str], allowed_hosts: FrozenSet[str]
+    ) -> None:
+        self.types = types - NEVER_BLOCKED_TYPES
+        self.hosts = hosts
+        self.allowed_hosts = allowed_hosts
+
+    @classmethod
+    def from_lists(cls, block: Optional[Iterable[str]], allow: Optional[Iterable[str]]) -> "BlockingPolicy":
+        """Construit la politique: défauts + --block, moins --allow.
+
+        Lève ValueError sur un type de ressource inconnu.
+        """
+        types = set(DEFAULT_BLOCKED_TYPES)
+        hosts = set(TRACKER_HOSTS)
+        allowed_hosts = set()
+        for item in _split_items(block):
+            if item == "none":
+                types.clear()
+                hosts.clear()
+            elif item in ("tracker", "trackers"):
+                hosts |= TRACKER_HOSTS
+            elif "." in item:
+                hosts.add(item)
+            elif item in RESOURCE_TYPES:
+                types.add(item)
+            else:
+                raise ValueError(f"type de ressource inconnu pour --block: {item!r}")
+        for item in _split_items(allow):
+            if item == "all":
+                types.clear()
+                hosts.clear()
+            elif item in ("tracker", "trackers"):
+                hosts -= TRACKER_HOSTS
+            elif "." in item:
+                allowed_hosts.add(item)
+            elif item in RESOURCE_TYPES:
+                types.discard(item)
+            else:
+                raise ValueError(f"type de ressource inconnu pour --allow: {item!r}")
+        return cls(frozenset(types), frozenset(hosts), frozenset(allowed_hosts))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.types or self.hosts)
+
+    def reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Renvoie la raison du blocage (type ou hôte), ou None si la requête passe."""
+        if resource_type in NEVER_BLOCKED_TYPES:
+            return None
+        host = (urlsplit(url).hostname or "").lower()
+        if self.allowed_hosts and _host_matches(host, self.allowed_hosts):
+            return None
+        if self.hosts and _host_matches(host, self.hosts):
+            return "tracker"
+        if resource_type in self.types:
+            return resource_type
+        return None
+
+
+class NetworkStats:
+    """Compteurs par exécution: requêtes bloquées/servies et octets reçus.
+
+    Par défaut, ``bytes_received`` est la somme des en-têtes Content-Length
+    des réponses (lus sans aller-retour avec le navigateur; réponses « chunked »
+    non comptées, ``bytes_exact`` faux). Les tailles exactes demandent un
+    aller-retour par requête (``request.sizes()``): elles ne sont lues que sur
+    demande (``with_sizes``). Une requête bloquée n'ayant pas de réponse, les
+    octets qu'elle aurait coûtés ne sont pas connus: seul son nombre l'est.
+    """
+
+    def __init__(self) -> None:
+        self.blocked: Counter = Counter()
+        self._finished: List[Any] = []
+        self._content_length = 0
+
+    def on_response(self, response) -> None:
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            self._content_length += int(length)
+
+    def on_request_finished(self, request) -> None:
+        # Les tailles sont lues à la fin (summary) pour ne pas ralentir le chargement
+        self._finished.append(request)
+
+    def summary(self, with_sizes: bool = False) -> Dict[str, Any]:
+        if not with_sizes:
+            return self._summary(self._content_length, exact=False)
+        received = 0
+        for request in self._finished:
+            try:
+                sizes = request.sizes()
+            except Exception:
+                continue
+            received += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        return self._summary(received)
+
+    async def summary_async(self, with_sizes: bool = False) -> Dict[str, Any]:
+        """Variante pour playwright.async_api (request.sizes() y est une coroutine)."""
+        if not with_sizes:
+            return self._summary(self._content_length, exact=False)
+        received = 0
+        for request in self._finished:
+            try:
+                sizes = await request.sizes()
+            except Exception:
+                continue
+            received += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        return self._summary(received)
+
+    def _summary(self, received: int, exact: bool = True) -> Dict[str, Any]:
+        return {
+            "requests_blocked": sum(self.blocked.values()),
+            "requests_completed": len(self._finished),
+            "blocked_by_reason": dict(self.blocked),
+            "bytes_received": received,
+            "bytes_exact": exact,
+        }
+
+
+# Installe la route de blocage sur la page (iframes comprises) et renvoie les compteurs.
+def install_blocking(page, policy: BlockingPolicy) -> NetworkStats:
+    stats = NetworkStats()
+    page.on("requestfinished", stats.on_request_finished)
+    page.on("response", stats.on_response)
+    if not policy.enabled:
+        return stats
+
+    def _handle(route, request) -> None:
+        reason = policy.reason(request.resource_type, request.url)
+        if reason:
+            stats.blocked[reason] += 1
+            route.abort("blockedbyclient")
+        else:
+            # fallback: la requête passe aux routes installées avant (rejeu HAR), sinon au réseau
+            route.fallback()
+
+    page.route("**/*", _handle)
+    logger.debug(
+        "Blocage actif: types=%s, hôtes=%d, hôtes autorisés=%s",
+        sorted(policy.types),
+        len(policy.hosts),
+        sorted(policy.allowed_hosts),
+    )
+    return stats
+
+
+# Variante asynchrone de install_blocking (playwright.async_api).
+async def install_blocking_async(page, policy: BlockingPolicy) -> NetworkStats:
+    stats = NetworkStats()
+    page.on("requestfinished", stats.on_request_finished)
+    page.on("response", stats.on_response)
+    if not policy.enabled:
+        return stats
+
+    async def _handle(route, request) -> None:
+        reason = policy.reason(request.resource_type, request.url)
+        if reason:
+            stats.blocked[reason] += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    await page.route("**/*", _handle)
+    return stats
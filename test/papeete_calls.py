@@ -0,0 +1,120 @@
+"""Escales: appariement des mouvements d'arrivée et de départ.
+
+Le tableau publie chaque escale en deux lignes (« Arrivées » renseigné puis
+« Départs » renseigné). Ce module les regroupe en objets escale:
+
+  {"vessel", "vessel_type", "arrival", "departure", "arrival_quay",
+   "departure_quay", "length", "dwell_minutes"}
+
+Les mouvements sont répartis par navire (une passe), puis chaque groupe est
+trié par date-heure et balayé une fois: une arrivée ouvre une escale, le
+départ suivant la ferme. Les escales sur plusieurs jours sont naturelles
+(seule la date-heure compte); une arrivée sans départ (navire encore à quai
+ou départ hors fenêtre) ou un départ sans arrivée (arrivée antérieure à la
+fenêtre) donnent une escale incomplète (champ à None).
+"""
+
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from papeete_fields import ARRIVAL, DEPARTURE, MovementFields, iso_datetime
+
+
+CALL_FIELDS = [
+    "vessel",
+    "vessel_type",
+    "arrival",
+    "departure",
+    "arrival_quay",
+    "departure_quay",
+    "length",
+    "dwell_minutes",
+]
+
+# (date-heure ISO, sens, quai, type, longueur)
+Movement = Tuple[str, str, str, str, str]
+
+
+# « 159 » / « 49,98 » -> 159.0 / 49.98 (None si vide ou illisible).
+def parse_length(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ".")) if value else None
+    except ValueError:
+        return None
+
+
+# Durée d'escale en minutes entre deux dates-heures ISO (None si l'une manque ou n'a pas d'heure).
+def _dwell_minutes(arrival: str, departure: str) -> Optional[int]:
+    if len(arrival) < 16 or len(departure) < 16:
+        return None
+    try:
+        delta = datetime.fromisoformat(departure) - datetime.fromisoformat(arrival)
+    except ValueError:
+        return None
+    return int(delta.total_seconds() // 60)
+
+
+def _call(vessel: str, arrival: Optional[Movement], departure: Optional[Movement]) -> Dict[str, Any]:
+    ref = arrival or departure
+    return {
+        "vessel": vessel,
+        "vessel_type": ref[3] or None,
+        "arrival": arrival[0] if arrival else None,
+        "departure": departure[0] if departure else None,
+        "arrival_quay": arrival[2] if arrival else None,
+        "departure_quay": departure[2] if departure else None,
+        "length": parse_length(ref[4]),
+        "dwell_minutes": _dwell_minutes(arrival[0], departure[0]) if arrival and departure else None,
+    }
+
+
+# Apparie les mouvements en escales, triées par date-heure (arrivée, sinon départ).
+def pair_calls(headers: List[str], records: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    fields = MovementFields.from_headers(headers)
+    by_vessel: Dict[str, List[Movement]] = defaultdict(list)
+    for rec in records:
+        direction = fields.direction(rec)
+        if not direction:
+            continue
+        by_vessel[fields.get(rec, fields.vessel)].append(
+            (
+                iso_datetime(fields.get(rec, fields.date)),
+                direction,
+                fields.get(rec, fields.quay),
+                fields.get(rec, fields.vessel_type),
+                fields.get(rec, fields.length),
+            )
+        )
+
+    calls: List[Dict[str, Any]] = []
+    for vessel, movements in by_vessel.items():
+        # À date-heure égale, le départ précède l'arrivée (escale précédente close d'abord)
+        movements.sort(key=lambda m: (m[0], m[1] == ARRIVAL))
+        pending: Optional[Movement] = None
+        for movement in movements:
+            if movement[1] == ARRIVAL:
+                if pending is not None:
+                    calls.append(_call(vessel, pending, None))
+                pending = movement
+            elif movement[1] == DEPARTURE:
+                calls.append(_call(vessel, pending, movement))
+                pending = None
+        if pending is not None:
+            calls.append(_call(vessel, pending, None))
+    calls.sort(key=lambda c: (c["arrival"] or c["departure"] or "", c["vessel"]))
+    return calls
+
+
+# Écrit les escales en CSV si le chemin se termine par .csv, en JSON sinon.
+def write_calls(path: str, calls: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+    if path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CALL_FIELDS)
+            writer.writeheader()
+            writer.writerows(calls)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "calls": calls}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,192 @@
+"""Démon Playwright persistant pour getPrevNaviresPapeete.
+
+Le démarrage de Chromium (``sync_playwright()``, ``chromium.launch()`` puis
+``new_context()``) domine le temps d'un scraping isolé. Ce module garde un
+navigateur et un contexte « chauds » dans un processus longue durée et accepte
+des jobs de scraping sur une socket TCP locale.
+
+Protocole: une requête JSON par connexion, sur une seule ligne, et une réponse
+JSON sur une ligne.
+  - job:      {"url": ..., "timeout": ...}      -> {"ok": true, "table": {...} | null}
+  - commande: {"command": "ping" | "shutdown"}  -> {"ok": true}
+  - erreur:                                      -> {"ok": false, "error": "..."}
+
+Tout client local peut soumettre un job: le démon refuse ceux qui lui
+feraient lire ou écrire des fichiers (clés HAR, URL autre que http/https).
+
+Exemples:
+  - Lancer le démon:    python getPrevNaviresPapeete.py --daemon
+  - Client (auto):      python getPrevNaviresPapeete.py --csv out.csv
+"""
+
+import json
+import logging
+import socket
+import socketserver
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from playwright.sync_api import sync_playwright
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 8765
+
+# Clés de job réservées au processus local (chemins de fichiers lus ou écrits)
+LOCAL_ONLY_KEYS = ("record_har", "replay_har")
+# Délai de connexion court: sans démon, le client doit retomber vite sur le mode local
+CONNECT_TIMEOUT_S = 0.5
+# Marge ajoutée au timeout de navigation pour la lecture de la réponse
+RESPONSE_MARGIN_S = 30.0
+
+
+class DaemonUnavailable(RuntimeError):
+    """Le démon est absent ou n'a pas pu traiter le job (le client retombe en local)."""
+
+
+# Gestionnaire d'une connexion: lit un job, le traite et renvoie la réponse.
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            job = json.loads(line.decode("utf-8"))
+            response = self.server.process(job)
+        except Exception as exc:  # le démon doit survivre à un job en échec
+            logger.exception("Échec du job")
+            response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+# Serveur mono-thread: l'API sync de Playwright doit rester sur le thread qui l'a démarrée.
+class _DaemonServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+    def __init__(self, address, playwright, headless: bool, scrape: Callable) -> None:
+        super().__init__(address, _JobHandler)
+        # handle_request() rend la main régulièrement pour vérifier « stopping »
+        self.timeout = 0.5
+        self.playwright = playwright
+        self.headless = headless
+        self.scrape = scrape
+        self.browser = None
+        self.context = None
+        self.jobs = 0
+        self.stopping = False
+
+    # (Re)lance Chromium et le contexte si nécessaire (premier job ou crash du navigateur).
+    def ensure_browser(self) -> None:
+        if self.browser is not None and self.browser.is_connected():
+            return
+        logger.info("Démarrage de Chromium (headless=%s)", str(self.headless).lower())
+        self.browser = self.playwright.chromium.launch(headless=self.headless)
+        self.context = self.browser.new_context(locale="fr-FR")
+
+    def process(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        command = job.get("command")
+        if command == "ping":
+            return {"ok": True, "jobs": self.jobs}
+        if command == "shutdown":
+            logger.info("Arrêt du démon demandé")
+            self.stopping = True
+            return {"ok": True}
+        _check_job(job)
+        self.ensure_browser()
+        # Une page neuve par job: le contexte (cache, cookies) reste chaud entre les jobs
+        page = self.context.new_page()
+        started = time.perf_counter()
+        try:
+            table = self.scrape(page, job)
+        finally:
+            page.close()
+        self.jobs += 1
+        logger.info("Job #%d traité en %.3f s: %s", self.jobs, time.perf_counter() - started, job.get("url"))
+        return {"ok": True, "table": table}
+
+    def close_browser(self) -> None:
+        if self.context is not None:
+            self.context.close()
+        if self.browser is not None:
+            self.browser.close()
+
+
+# Refuse un job qui ferait accéder le démon aux fichiers de son utilisateur.
+def _check_job(job: Dict[str, Any]) -> None:
+    local = [key for key in LOCAL_ONLY_KEYS if job.get(key)]
+    if local:
+        raise ValueError(f"clé(s) refusée(s) par le démon: {', '.join(local)}")
+    scheme = urlsplit(str(job.get("url") or "")).scheme.lower()
+    if scheme not in ("http", "https"):
+        raise ValueError(f"URL refusée par le démon (schéma {scheme or 'absent'!r}): {job.get('url')}")
+
+
+# Lance le démon et bloque jusqu'à une commande « shutdown » ou Ctrl+C.
+def serve(host: str, port: int, headless: bool, scrape: Callable) -> None:
+    """Sert les jobs de scraping avec un Chromium persistant.
+
+    ``scrape(page, job)`` est la fonction de scraping du script principal;
+    elle reçoit une page neuve du contexte chaud et renvoie le tableau retenu.
+    """
+    with sync_playwright() as p:
+        server = _DaemonServer((host, port), p, headless, scrape)
+        try:
+            # Préchauffage: le premier job ne paie pas le lancement du navigateur
+            server.ensure_browser()
+            logger.info("Démon en écoute sur %s:%d", host, port)
+            while not server.stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            logger.info("Interruption: arrêt du démon")
+        finally:
+            server.server_close()
+            server.close_browser()
+
+
+# Envoie un message au démon et renvoie sa réponse décodée.
+def _send(host: str, port: int, message: Dict[str, Any], read_timeout: float) -> Dict[str, Any]:
+    try:
+        sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT_S)
+    except OSError as exc:
+        raise DaemonUnavailable(f"démon injoignable sur {host}:{port} ({exc})") from exc
+    with sock:
+        sock.settimeout(read_timeout)
+        try:
+            sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        except OSError as exc:
+            raise DaemonUnavailable(f"échange interrompu avec le démon ({exc})") from exc
+    if not line:
+        raise DaemonUnavailable("réponse vide du démon")
+    response = json.loads(line.decode("utf-8"))
+    if not response.get("ok"):
+        raise DaemonUnavailable(f"le démon a signalé une erreur: {response.get('error')}")
+    return response
+
+
+# Soumet un job de scraping au démon (client léger de la CLI).
+def request_scrape(host: str, port: int, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Renvoie le tableau retenu par le démon (ou None si aucun tableau).
+
+    Lève DaemonUnavailable si aucun démon n'écoute ou si le job a échoué.
+    """
+    read_timeout = job.get("timeout", 45000) / 1000.0 + RESPONSE_MARGIN_S
+    return _send(host, port, job, read_timeout).get("table")
+
+
+# Vérifie qu'un démon répond (utilisé par les benchmarks et scripts de supervision).
+def ping(host: str = DEFAULT_DAEMON_HOST, port: int = DEFAULT_DAEMON_PORT) -> bool:
+    try:
+        _send(host, port, {"command": "ping"}, read_timeout=5.0)
+    except DaemonUnavailable:
+        return False
+    return True
+
+
+# Demande l'arrêt propre du démon.
+def shutdown(host: str = DEFAULT_DAEMON_HOST, port: int = DEFAULT_DAEMON_PORT) -> None:
+    _send(host, port, {"command": "shutdown"}, read_timeout=5.0)
@@ -0,0 +1,146 @@
+"""Analyse des dates du tableau par colonne entière.
+
+Formats publiés par la page: « 18/09/2025 - 05:30 » (colonne Date) et
+« 18/09/2025 » (Arrivées, Départs), en heure locale de Papeete. Plutôt qu'un
+``datetime.strptime`` par cellule, les colonnes sont converties en bloc par
+découpage à positions fixes, la partie « jour » étant mémorisée (quelques
+centaines de jours distincts pour des centaines de milliers de lignes). Si
+NumPy est installé, ``datetime64_column`` fournit la même conversion en
+``datetime64[m]``.
+
+Les dates-heures sont des minutes depuis 1970 (heure locale, None si la
+cellule est vide ou mal formée); ``to_datetime`` y attache le fuseau
+Pacific/Tahiti (UTC-10, sans heure d'été).
+"""
+
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Dict, Iterable, List, Optional, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+# Fuseau de Papeete; décalage fixe si la base tz n'est pas disponible (Windows sans tzdata).
+def _tahiti() -> tzinfo:
+    try:
+        return ZoneInfo("Pacific/Tahiti")
+    except ZoneInfoNotFoundError:
+        return timezone(timedelta(hours=-10), "Pacific/Tahiti")
+
+
+TAHITI = _tahiti()
+
+
+# « 18/09/2025 » -> numéro de jour (date.toordinal), None si le format diffère.
+def parse_day(value: str) -> Optional[int]:
+    if len(value) != 10 or value[2] != "/" or value[5] != "/":
+        return None
+    dd, mo, yyyy = value[0:2], value[3:5], value[6:10]
+    if not (dd.isdigit() and mo.isdigit() and yyyy.isdigit()) or yyyy < "1000":
+        return None
+    try:
+        return date(int(yyyy), int(mo), int(dd)).toordinal()
+    except ValueError:
+        return None
+
+
+# « 05:30 » (positions 13 à 17 de la colonne Date) -> minutes depuis minuit.
+def _parse_clock(value: str) -> Optional[int]:
+    if len(value) != 18 or value[10:13] != " - " or value[15] != ":":
+        return None
+    hh, mm = value[13:15], value[16:18]
+    if not (hh.isdigit() and mm.isdigit()) or hh > "23" or mm > "59":
+        return None
+    return int(hh) * 60 + int(mm)
+
+
+# « 18/09/2025 - 05:30 » -> minutes depuis 1970 (None si le format diffère).
+def parse_minutes(value: str) -> Optional[int]:
+    day = parse_day(value[:10])
+    clock = _parse_clock(value) if day is not None else None
+    if clock is None:
+        return None
+    return (day - EPOCH_ORDINAL) * 1440 + clock
+
+
+# « 2025-09-18T05:30 » / « 2025-09-18 » (forme stockée dans l'historique) -> minutes depuis 1970.
+def parse_iso_minutes(value: str) -> Optional[int]:
+    if len(value) not in (10, 16) or value[4] != "-" or value[7] != "-" or value[10:11] not in ("", "T"):
+        return None
+    day = parse_day(f"{value[8:10]}/{value[5:7]}/{value[0:4]}")
+    if day is None:
+        return None
+    if len(value) == 10:
+        return (day - EPOCH_ORDINAL) * 1440
+    return parse_minutes(f"{value[8:10]}/{value[5:7]}/{value[0:4]} - {value[11:16]}")
+
+
+# Colonne Date entière -> minutes depuis 1970 (jour mémorisé, heure découpée).
+def minutes_column(values: Iterable[str]) -> List[Optional[int]]:
+    days: Dict[str, Optional[int]] = {}
+    out: List[Optional[int]] = []
+    append = out.append
+    for value in values:
+        head = value[:10]
+        day = days.get(head, -1)
+        if day == -1:
+            ordinal = parse_day(head)
+            day = days[head] = None if ordinal is None else (ordinal - EPOCH_ORDINAL) * 1440
+        if day is None:
+            append(None)
+            continue
+        clock = _parse_clock(value)
+        append(None if clock is None else day + clock)
+    return out
+
+
+# Colonne Arrivées/Départs entière -> numéros de jour (None si vide ou mal formée).
+def day_column(values: Iterable[str]) -> List[Optional[int]]:
+    days: Dict[str, Optional[int]] = {}
+    out: List[Optional[int]] = []
+    for value in values:
+        day = days.get(value, -1)
+        if day == -1:
+            day = days[value] = parse_day(value)
+        out.append(day)
+    return out
+
+
+# Minutes depuis 1970 -> datetime avec fuseau Pacific/Tahiti.
+def to_datetime(minutes: Optional[int], tz: tzinfo = TAHITI) -> Optional[datetime]:
+    if minutes is None:
+        return None
+    return (EPOCH + timedelta(minutes=minutes)).replace(tzinfo=tz)
+
+
+# Colonne Date entière -> datetimes avec fuseau (None si vide ou mal formée).
+def datetime_column(values: Iterable[str], tz: tzinfo = TAHITI) -> List[Optional[datetime]]:
+    return [to_datetime(m, tz) for m in minutes_column(values)]
+
+
+# Colonne Date -> numpy datetime64[m] (NaT si le format diffère); requiert NumPy.
+def datetime64_column(values: Sequence[str]):
+    if np is None:
+        raise RuntimeError("NumPy n'est pas installé (pip install numpy)")
+    iso = [
+        f"{v[6:10]}-{v[3:5]}-{v[0:2]}T{v[13:15]}:{v[16:18]}" if len(v) == 18 and v[10:13] == " - " else "NaT"
+        for v in values
+    ]
+    return np.array(iso, dtype="datetime64[m]")
+
+
+# Trie les enregistrements par date-heure (tri stable; cellules illisibles en fin).
+def sort_chronologically(records: List[Dict[str, str]], field: Optional[str]) -> List[Dict[str, str]]:
+    if not field:
+        return list(records)
+    keys = minutes_column([rec.get(field, "") for rec in records])
+    last = max((k for k in keys if k is not None), default=0) + 1
+    order = sorted(range(len(records)), key=lambda i: last if keys[i] is None else keys[i])
+    return [records[i] for i in order]
@@ -0,0 +1,247 @@
+"""Différentiel entre deux relevés successifs du tableau.
+
+Seuls les changements intéressent les consommateurs (escale ajoutée ou
+annulée, départ retardé, changement de quai...). Le relevé précédent est
+conservé dans un fichier d'état JSON (``--diff-state``); à chaque exécution,
+les enregistrements sont comparés à ce relevé et des événements sont émis en
+lignes JSON:
+
+  {"event": "added",    "key": {...}, "record": {...}}
+  {"event": "removed",  "key": {...}, "record": {...}}
+  {"event": "modified", "key": {...}, "changes": {"Quai": ["ancien", "nouveau"]}, "record": {...}}
+
+Les lignes identiques s'annulent via leur empreinte (multiensemble, temps
+linéaire), les restantes sont appariées par (navire, sens du mouvement) à la
+Date la plus proche, à ``PAIR_TOLERANCE_MIN`` près: tri des restantes de
+chaque clé puis fusion à deux curseurs, soit O(n log n) au pire et
+quasi linéaire en pratique (peu de restantes par clé). Au-delà,
+il s'agit d'une autre escale du même navire: l'ancienne est supprimée et la
+nouvelle ajoutée (escale sortie de la fenêtre glissante puis réapparue).
+Si une Date est illisible, l'appariement se fait dans l'ordre du tableau.
+Si l'empreinte globale est inchangée, rien n'est émis ni réécrit.
+
+``table_hash`` donne l'empreinte du tableau brut (avant ``_to_records``):
+avec ``--hash-file``, une exécution dont le tableau n'a pas changé s'arrête
+là, sans conversion ni écriture.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections import Counter, defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from papeete_dates import parse_minutes
+from papeete_fields import MovementFields
+
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+# Écart de Date maximal pour qu'une ligne soit une modification (retard, avance) et non une autre escale
+PAIR_TOLERANCE_MIN = 2 * 1440
+
+
+# Empreinte d'un enregistrement (indépendante de l'ordre des clés).
+def row_hash(rec: Dict[str, str]) -> str:
+    data = json.dumps(rec, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Empreinte de l'ensemble du relevé (en-têtes + lignes, dans l'ordre).
+def content_hash(headers: List[str], row_hashes: Iterable[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps(headers, ensure_ascii=False).encode("utf-8"))
+    for rh in row_hashes:
+        h.update(rh.encode("ascii"))
+    return h.hexdigest()
+
+
+# Empreinte du tableau brut retenu (en-têtes + lignes), calculée avant ``_to_records``.
+def table_hash(table: Dict[str, Any]) -> str:
+    data = json.dumps([table.get("headers") or [], table.get("rows") or []], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# Charge le relevé précédent (None si absent, illisible ou d'une autre version).
+def load_state(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("État du différentiel illisible (%s): %s", path, exc)
+        return None
+    if state.get("version") != STATE_VERSION:
+        logger.debug("État du différentiel ignoré (version différente): %s", path)
+        return None
+    return state
+
+
+# Écrit l'état de façon atomique (fichier temporaire puis renommage).
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# Clé métier d'un enregistrement: navire et sens du mouvement.
+def _movement_key(fields: MovementFields, rec: Dict[str, str]) -> Tuple[str, str]:
+    return fields.get(rec, fields.vessel), fields.direction(rec)
+
+
+def _key_dict(key: Tuple[str, str]) -> Dict[str, str]:
+    return {"vessel": key[0], "direction": key[1]}
+
+
+# Apparie les lignes restantes d'une même clé; renvoie {indice nouveau: indice ancien}.
+def _pair_by_date(
+    old_items: List[Tuple[Optional[int], int]], new_items: List[Tuple[Optional[int], int]], tolerance_min: int
+) -> Dict[int, int]:
+    """Éléments: (minutes ou None, indice dans la liste des restantes), dans l'ordre du tableau.
+
+    Les Dates lisibles sont triées puis fusionnées (deux curseurs): chaque
+    nouvelle ligne prend l'ancienne la plus proche dans la tolérance, une
+    ancienne plus proche de la ligne suivante lui étant laissée. Les lignes à
+    Date illisible sont ensuite appariées dans l'ordre du tableau avec les
+    restantes de l'autre côté.
+    """
+    old_dated = sorted((m, i) for m, i in old_items if m is not None)
+    new_dated = sorted((m, i) for m, i in new_items if m is not None)
+    pairs: Dict[int, int] = {}
+    paired_old = set()
+    o = n = 0
+    while o < len(old_dated) and n < len(new_dated):
+        (before, i_old), (when, i_new) = old_dated[o], new_dated[n]
+        if before < when - tolerance_min:
+            o += 1
+        elif when < before - tolerance_min:
+            n += 1
+        elif o + 1 < len(old_dated) and abs(old_dated[o + 1][0] - when) < abs(before - when):
+            o += 1
+        elif n + 1 < len(new_dated) and abs(new_dated[n + 1][0] - before) < abs(when - before):
+            n += 1
+        else:
+            pairs[i_new] = i_old
+            paired_old.add(i_old)
+            o += 1
+            n += 1
+    # Date illisible d'un côté: appariement dans l'ordre du tableau, en dernier recours
+    old_undated = deque(i for m, i in old_items if m is None)
+    old_rest = deque(i for m, i in old_items if m is not None and i not in paired_old)
+    for when, i_new in new_items:
+        if i_new in pairs:
+            continue
+        if old_undated:
+            pairs[i_new] = old_undated.popleft()
+        elif when is None and old_rest:
+            pairs[i_new] = old_rest.popleft()
+    return pairs
+
+
+# Compare deux listes d'enregistrements; renvoie les événements dans l'ordre du nouveau relevé.
+def diff_records(
+    headers: List[str],
+    old: List[Dict[str, str]],
+    new: List[Dict[str, str]],
+    old_hashes: Optional[List[str]] = None,
+    new_hashes: Optional[List[str]] = None,
+    tolerance_min: int = PAIR_TOLERANCE_MIN,
+) -> List[Dict[str, Any]]:
+    old_hashes = old_hashes if old_hashes is not None else [row_hash(r) for r in old]
+    new_hashes = new_hashes if new_hashes is not None else [row_hash(r) for r in new]
+    # Lignes identiques des deux côtés: elles s'annulent (doublons compris)
+    common = Counter(old_hashes) & Counter(new_hashes)
+    pending = common.copy()
+    old_left = []
+    for rec, rh in zip(old, old_hashes):
+        if pending[rh]:
+            pending[rh] -= 1
+        else:
+            old_left.append(rec)
+    pending = common
+    new_left = []
+    for rec, rh in zip(new, new_hashes):
+        if pending[rh]:
+            pending[rh] -= 1
+        else:
+            new_left.append(rec)
+
+    fields = MovementFields.from_headers(headers)
+    old_by_key: Dict[Tuple[str, str], List[Tuple[Optional[int], int]]] = defaultdict(list)
+    for i, rec in enumerate(old_left):
+        old_by_key[_movement_key(fields, rec)].append((parse_minutes(fields.get(rec, fields.date)), i))
+    new_keys = [_movement_key(fields, rec) for rec in new_left]
+    new_by_key: Dict[Tuple[str, str], List[Tuple[Optional[int], int]]] = defaultdict(list)
+    for i, (key, rec) in enumerate(zip(new_keys, new_left)):
+        if key in old_by_key:
+            new_by_key[key].append((parse_minutes(fields.get(rec, fields.date)), i))
+    pairs: Dict[int, int] = {}
+    for key, new_items in new_by_key.items():
+        pairs.update(_pair_by_date(old_by_key[key], new_items, tolerance_min))
+
+    events: List[Dict[str, Any]] = []
+    for i, (key, rec) in enumerate(zip(new_keys, new_left)):
+        if i not in pairs:
+            events.append({"event": ADDED, "key": _key_dict(key), "record": rec})
+            continue
+        before = old_left[pairs[i]]
+        changes = {
+            h: [before.get(h, ""), rec.get(h, "")]
+            for h in headers
+            if before.get(h, "") != rec.get(h, "")
+        }
+        events.append({"event": MODIFIED, "key": _key_dict(key), "changes": changes, "record": rec})
+    paired = set(pairs.values())
+    for key, old_items in old_by_key.items():
+        for _when, i in old_items:
+            if i not in paired:
+                events.append({"event": REMOVED, "key": _key_dict(key), "record": old_left[i]})
+    return events
+
+
+# Calcule le différentiel avec l'état enregistré, puis met l'état à jour si le contenu a changé.
+def diff_with_state(
+    path: str, headers: List[str], records: List[Dict[str, str]]
+) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """Renvoie (empreinte, événements); événements = None si le contenu est inchangé.
+
+    Au premier passage (pas d'état), chaque enregistrement est un ajout.
+    """
+    hashes = [row_hash(r) for r in records]
+    digest = content_hash(headers, hashes)
+    state = load_state(path)
+    if state is not None and state.get("content_hash") == digest:
+        logger.info("Différentiel: contenu inchangé (%s)", digest[:12])
+        return digest, None
+    old = state.get("records", []) if state else []
+    events = diff_records(headers, old, records, new_hashes=hashes)
+    save_state(
+        path, {"version": STATE_VERSION, "content_hash": digest, "headers": headers, "records": records}
+    )
+    counts = Counter(e["event"] for e in events)
+    logger.info(
+        "Différentiel: %d ajout(s), %d suppression(s), %d modification(s)",
+        counts[ADDED],
+        counts[REMOVED],
+        counts[MODIFIED],
+    )
+    return digest, events
+
+
+# Écrit les événements en lignes JSON (stdout si path vaut « - », sinon ajout en fin de fichier).
+def write_events(path: str, events: List[Dict[str, Any]], context: Dict[str, Any]) -> None:
+    lines = [json.dumps({**context, **e}, ensure_ascii=False) + "\n" for e in events]
+    if path == "-":
+        sys.stdout.writelines(lines)
+        sys.stdout.flush()
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(lines)
@@ -0,0 +1,78 @@
+"""Repérage des colonnes métier parmi les en-têtes bruts du tableau.
+
+Les en-têtes de la page sont en français et parfois bruités (la colonne
+« Type » embarque le texte de son filtre: « Type CABOTEUR CARGO ... »).
+Les modules d'aval (historique, diff, escales...) retrouvent leurs colonnes
+par mot-clé plutôt que par libellé exact.
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+ARRIVAL = "arrival"
+DEPARTURE = "departure"
+
+
+# Renvoie le premier en-tête correspondant à l'un des mots-clés (égalité, préfixe, puis inclusion).
+def find_field(headers: List[str], *needles: str) -> Optional[str]:
+    lowered = [(h, " ".join(h.lower().split())) for h in headers]
+    for match in (
+        lambda h, n: h == n,
+        lambda h, n: h.startswith(n),
+        lambda h, n: n in h,
+    ):
+        for needle in needles:
+            for header, low in lowered:
+                if match(low, needle):
+                    return header
+    return None
+
+
+# Sens du mouvement d'un enregistrement: arrivée si « Arrivées » est renseigné, départ si « Départs ».
+def movement_direction(rec: Dict[str, str], f_arrival: Optional[str], f_departure: Optional[str]) -> str:
+    if f_arrival and rec.get(f_arrival, "").strip():
+        return ARRIVAL
+    if f_departure and rec.get(f_departure, "").strip():
+        return DEPARTURE
+    return ""
+
+
+# « 18/09/2025 - 05:30 » -> « 2025-09-18T05:30 » (tri lexicographique = chronologique).
+def iso_datetime(value: str) -> str:
+    v = (value or "").strip()
+    if len(v) >= 10 and v[2] == "/" and v[5] == "/":
+        day = f"{v[6:10]}-{v[3:5]}-{v[0:2]}"
+        if len(v) >= 18 and v[10:13] == " - ":
+            return f"{day}T{v[13:18]}"
+        return day
+    return v
+
+
+class MovementFields(NamedTuple):
+    """En-têtes des colonnes métier, résolus une fois par tableau (None si absente)."""
+
+    date: Optional[str]
+    vessel: Optional[str]
+    vessel_type: Optional[str]
+    arrival: Optional[str]
+    departure: Optional[str]
+    quay: Optional[str]
+    length: Optional[str]
+
+    @classmethod
+    def from_headers(cls, headers: List[str]) -> "MovementFields":
+        return cls(
+            date=find_field(headers, "date"),
+            vessel=find_field(headers, "navire"),
+            vessel_type=find_field(headers, "type"),
+            arrival=find_field(headers, "arrivée", "arrivee"),
+            departure=find_field(headers, "départ", "depart"),
+            quay=find_field(headers, "quai"),
+            length=find_field(headers, "longueur"),
+        )
+
+    # Valeur nettoyée d'une colonne métier ("" si la colonne est absente).
+    def get(self, rec: Dict[str, str], field: Optional[str]) -> str:
+        return rec.get(field, "").strip() if field else ""
+
+    def direction(self, rec: Dict[str, str]) -> str:
+        return movement_direction(rec, self.arrival, self.departure)
@@ -0,0 +1,108 @@
+"""Enregistrement et rejeu HAR d'un chargement de page (--record-har, --replay-har).
+
+Un relevé enregistré une fois (document, iframes, XHR, dans une archive HAR)
+peut être rejoué sans réseau: le profilage de l'analyse et du travail du
+navigateur devient reproductible, et les mesures de performance n'ont plus
+besoin du site.
+
+Latence du rejeu (--har-latency):
+  - « zero »:     ``page.route_from_har`` de Playwright, réponses immédiates;
+  - « recorded »: chaque réponse est servie après la durée enregistrée dans
+    l'archive (champ ``time`` de l'entrée), sans bloquer les autres requêtes.
+
+Les requêtes absentes de l'archive sont interrompues (aucun accès réseau).
+Les requêtes bloquées (--block) à l'enregistrement n'y figurent pas:
+enregistrer avec ``--allow all`` pour une archive complète.
+"""
+
+import base64
+import json
+import logging
+import zipfile
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+LATENCIES = ("zero", "recorded")
+# En-têtes qui décrivent l'encodage de transfert d'origine, pas le corps décodé de l'archive
+_TRANSFER_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+# Options de browser.new_context() pour enregistrer l'archive (contenu joint si .zip).
+def record_options(path: str) -> Dict[str, Any]:
+    if not path:
+        return {}
+    return {
+        "record_har_path": path,
+        "record_har_mode": "full",
+        "record_har_content": "attach" if path.endswith(".zip") else "embed",
+    }
+
+
+# Réponse enregistrée -> arguments de route.fulfill() (`archive`: zip du contenu joint).
+def _fulfill_args(entry: Dict[str, Any], archive: zipfile.ZipFile = None) -> Dict[str, Any]:
+    response = entry["response"]
+    content = response.get("content") or {}
+    text = content.get("text") or ""
+    if archive is not None and content.get("_file"):
+        body = archive.read(content["_file"])
+    elif content.get("encoding") == "base64":
+        body = base64.b64decode(text)
+    else:
+        body = text.encode("utf-8")
+    headers = {
+        h["name"]: h["value"] for h in response.get("headers", []) if h["name"].lower() not in _TRANSFER_HEADERS
+    }
+    return {"status": response["status"], "headers": headers, "body": body}
+
+
+class HarReplay:
+    """Entrées de l'archive par (méthode, URL), servies dans l'ordre d'enregistrement."""
+
+    def __init__(self, path: str) -> None:
+        # Archive .zip (contenu joint): le HAR et les corps de réponse y sont des fichiers séparés
+        self.archive = zipfile.ZipFile(path) if path.endswith(".zip") else None
+        if self.archive is not None:
+            name = next(n for n in self.archive.namelist() if n.endswith(".har"))
+            entries = json.loads(self.archive.read(name))["log"]["entries"]
+        else:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)["log"]["entries"]
+        self._entries: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        for entry in entries:
+            request = entry["request"]
+            self._entries[(request["method"], request["url"])].append(entry)
+        logger.debug("Archive HAR chargée: %d entrée(s), %s", len(entries), path)
+
+    # Prochaine entrée pour cette requête; la dernière reste servie aux répétitions.
+    def lookup(self, method: str, url: str) -> Dict[str, Any]:
+        queue = self._entries.get((method, url))
+        if not queue:
+            return None
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+
+# Rejoue l'archive sur la page; à installer avant install_blocking (évaluée après elle).
+def install_replay(page, path: str, latency: str = "zero") -> None:
+    if latency == "zero":
+        page.route_from_har(path, not_found="abort")
+        logger.info("Rejeu HAR sans latence: %s", path)
+        return
+    replay = HarReplay(path)
+
+    def _handle(route, request) -> None:
+        entry = replay.lookup(request.method, request.url)
+        if entry is None:
+            logger.debug("Absente de l'archive, interrompue: %s", request.url)
+            route.abort("internetdisconnected")
+            return
+        delay_ms = max(0.0, float(entry.get("time") or 0.0))
+        if delay_ms:
+            # Attente rendue à la boucle Playwright: les autres requêtes avancent en parallèle
+            page.wait_for_timeout(delay_ms)
+        route.fulfill(**_fulfill_args(entry, replay.archive))
+
+    page.route("**/*", _handle)
+    logger.info("Rejeu HAR avec latences enregistrées: %s", path)
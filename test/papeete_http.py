@@ -0,0 +1,340 @@
+"""Extraction sans navigateur: HTTP + analyse HTML en flux.
+
+Quand le tableau des prévisions est présent dans le HTML servi (ou dans le
+document d'un iframe), lancer Chromium est superflu. Ce module télécharge la
+page et ses iframes avec des connexions HTTP persistantes (bibliothèque
+standard, aucune dépendance) et analyse les tableaux au fil de la lecture avec
+``html.parser``. Chaque tableau a la même forme que ceux de
+``_collect_tables_from_frame``: headers, rows, rowCount, colCount, score.
+"""
+
+import codecs
+import http.client
+import logging
+import zlib
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) CruiseWatch-Tahiti"
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+# Profondeur d'iframes explorée (le tableau de Papeete est au plus dans un iframe)
+MAX_FRAME_DEPTH = 2
+
+_CELL_TAGS = ("td", "th")
+_SECTION_TAGS = ("thead", "tbody", "tfoot")
+_SKIPPED_TAGS = ("script", "style", "template", "noscript")
+
+
+class HttpError(RuntimeError):
+    """Réponse HTTP inattendue (statut >= 400, trop de redirections)."""
+
+
+class HttpPool:
+    """Connexions HTTP(S) persistantes, une par (schéma, hôte, port)."""
+
+    def __init__(self, timeout: float = 30.0) -> None:
+        self.timeout = timeout
+        self._conns: Dict[Tuple[str, str, int], http.client.HTTPConnection] = {}
+
+    def _connection(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        key = (scheme, host, port)
+        conn = self._conns.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = cls(host, port, timeout=self.timeout)
+            self._conns[key] = conn
+        return conn
+
+    def _drop(self, scheme: str, host: str, port: int) -> None:
+        conn = self._conns.pop((scheme, host, port), None)
+        if conn is not None:
+            conn.close()
+
+    def open(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        method: str = "GET",
+        body: Optional[bytes] = None,
+    ) -> Tuple[str, http.client.HTTPResponse]:
+        """Envoie la requête (redirections suivies) et renvoie (url_finale, réponse non lue).
+
+        La réponse doit être lue entièrement pour que la connexion soit réutilisée.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            scheme = parts.scheme or "http"
+            host = parts.hostname or ""
+            port = parts.port or (443 if scheme == "https" else 80)
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+            request_headers = {
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,*/*;q=0.8",
+                "Accept-Language": "fr-FR,fr;q=0.9",
+                "Accept-Encoding": "gzip, deflate",
+            }
+            request_headers.update(headers or {})
+            # Une nouvelle tentative si le serveur a fermé la connexion persistante entre-temps
+            for retry in (False, True):
+                conn = self._connection(scheme, host, port)
+                try:
+                    conn.request(method, target, body=body, headers=request_headers)
+                    response = conn.getresponse()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    self._drop(scheme, host, port)
+                    if retry:
+                        raise
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                url = urljoin(url, response.getheader("Location"))
+                if response.status == 303:
+                    method, body = "GET", None
+                continue
+            if response.status >= 400:
+                response.read()
+                raise HttpError(f"HTTP {response.status} pour {url}")
+            return url, response
+        raise HttpError(f"trop de redirections pour {url}")
+
+    def close(self) -> None:
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+
+# Itère sur le corps d'une réponse, décompressé à la volée si nécessaire.
+def iter_body(response: http.client.HTTPResponse):
+    encoding = (response.getheader("Content-Encoding") or "").lower()
+    decoder = None
+    if encoding == "gzip":
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decoder = zlib.decompressobj()
+    while True:
+        chunk = response.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield decoder.decompress(chunk) if decoder else chunk
+    if decoder:
+        tail = decoder.flush()
+        if tail:
+            yield tail
+
+
+# Jeu de caractères déclaré par l'en-tête Content-Type (utf-8 par défaut ou si Python ne le connaît pas).
+def response_charset(response: http.client.HTTPResponse) -> str:
+    content_type = response.getheader("Content-Type") or ""
+    for part in content_type.split(";"):
+        key, _, value = part.strip().partition("=")
+        if key.lower() == "charset" and value:
+            charset = value.strip("\"'")
+            try:
+                return codecs.lookup(charset).name
+            except LookupError:
+                logger.debug("Jeu de caractères inconnu (%s): utf-8 utilisé", charset)
+                break
+    return "utf-8"
+
+
+class _Table:
+    def __init__(self, attrs: Dict[str, Optional[str]]) -> None:
+        self.id = attrs.get("id") or None
+        self.classes = attrs.get("class") or None
+        self.caption: Optional[List[str]] = None
+        self.section: Optional[str] = None
+        # Lignes: (section, cellules, contient_th)
+        self.rows: List[Tuple[Optional[str], List[str], bool]] = []
+        self.row: Optional[List[str]] = None
+        self.row_has_th = False
+        self.cell: Optional[List[str]] = None
+        self.in_caption = False
+
+    def close_cell(self) -> None:
+        if self.cell is not None and self.row is not None:
+            self.row.append(" ".join("".join(self.cell).split()))
+        self.cell = None
+
+    def close_row(self) -> None:
+        self.close_cell()
+        if self.row is not None:
+            self.rows.append((self.section, self.row, self.row_has_th))
+        self.row = None
+        self.row_has_th = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Même logique d'en-têtes et de corps que le script injecté dans le navigateur."""
+        self.close_row()
+        headers: List[str] = []
+        thead = [cells for section, cells, _ in self.rows if section == "thead"]
+        header_index = next((i for i, (_, _, has_th) in enumerate(self.rows) if has_th), -1)
+        if thead:
+            headers = thead[-1]
+        elif header_index != -1:
+            headers = self.rows[header_index][1]
+        # Le navigateur insère un <tbody> implicite: les lignes hors section en font partie
+        body = [cells for section, cells, _ in self.rows if section in ("tbody", None)]
+        if not body:
+            # Sans corps, le navigateur retire la première ligne à <th> (même si l'en-tête vient du <thead>)
+            body = [cells for i, (_, cells, _) in enumerate(self.rows) if not (headers and i == header_index)]
+        rows = [r for r in body if r]
+        col_count = len(rows[0]) if rows else len(headers)
+        row_count = len(rows)
+        caption = " ".join("".join(self.caption).split()) if self.caption is not None else None
+        return {
+            "caption": caption,
+            "id": self.id,
+            "classes": self.classes,
+            "headers": headers,
+            "rows": rows,
+            "rowCount": row_count,
+            "colCount": col_count,
+            "score": row_count * (col_count or 1) + (5 if headers else 0),
+        }
+
+
+class TableParser(HTMLParser):
+    """Analyseur incrémental: alimenté par morceaux via feed(), collecte tableaux et iframes."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.tables: List[Dict[str, Any]] = []
+        self.iframes: List[str] = []
+        self._stack: List[_Table] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip += 1
+            return
+        if tag == "iframe":
+            src = dict(attrs).get("src")
+            if src:
+                self.iframes.append(src)
+            return
+        if tag == "table":
+            self._append_outer(" ")
+            self._stack.append(_Table(dict(attrs)))
+            return
+        if not self._stack:
+            return
+        table = self._stack[-1]
+        if tag in _CELL_TAGS or tag == "tr":
+            self._append_outer(" ")
+        if tag in _CELL_TAGS:
+            table.close_cell()
+            if table.row is None:
+                table.row = []
+            table.cell = []
+            table.row_has_th = table.row_has_th or tag == "th"
+        elif tag == "tr":
+            table.close_row()
+            table.row = []
+        elif tag in _SECTION_TAGS:
+            table.close_row()
+            table.section = tag
+        elif tag == "caption":
+            table.caption = []
+            table.in_caption = True
+        elif tag == "br" and table.cell is not None:
+            table.cell.append("\n")
+
+    def handle_startendtag(self, tag: str, attrs) -> None:
+        # <br/>, <iframe .../>: pas de contenu, mais les attributs comptent
+        if tag in _SKIPPED_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if not self._stack:
+            return
+        table = self._stack[-1]
+        if tag == "table":
+            self.tables.append(self._stack.pop().to_dict())
+        elif tag in _CELL_TAGS:
+            table.close_cell()
+        elif tag == "tr":
+            table.close_row()
+        elif tag in _SECTION_TAGS:
+            table.close_row()
+            table.section = None
+        elif tag == "caption":
+            table.in_caption = False
+
+    # Texte d'un tableau imbriqué: il fait aussi partie des cellules ouvertes des tableaux englobants
+    def _append_outer(self, text: str) -> None:
+        for table in self._stack[:-1]:
+            if table.cell is not None:
+                table.cell.append(text)
+
+    def handle_data(self, data: str) -> None:
+        if self._skip or not self._stack:
+            return
+        self._append_outer(data)
+        table = self._stack[-1]
+        if table.cell is not None:
+            table.cell.append(data)
+        elif table.in_caption and table.caption is not None:
+            table.caption.append(data)
+
+    def close(self) -> None:
+        super().close()
+        # Tableaux non fermés (HTML tronqué): on garde ce qui a été lu
+        while self._stack:
+            self.tables.append(self._stack.pop().to_dict())
+
+
+# Télécharge un document et en extrait tableaux + iframes, en analysant au fil de l'eau.
+def fetch_document(pool: HttpPool, url: str) -> Tuple[str, List[Dict[str, Any]], List[str]]:
+    final_url, response = pool.open(url)
+    charset = response_charset(response)
+    parser = TableParser()
+    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    for chunk in iter_body(response):
+        parser.feed(decoder.decode(chunk))
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    for t in parser.tables:
+        t["frame_url"] = final_url
+    return final_url, parser.tables, [urljoin(final_url, src) for src in parser.iframes]
+
+
+# Collecte les tableaux de la page et de ses iframes (ordre: page puis frames).
+def collect_tables(url: str, timeout_ms: int, pool: Optional[HttpPool] = None) -> List[Dict[str, Any]]:
+    """Équivalent HTTP du parcours de ``page.frames`` par ``_find_best_table``."""
+    own_pool = pool is None
+    pool = pool or HttpPool(timeout=timeout_ms / 1000.0)
+    candidates: List[Dict[str, Any]] = []
+    try:
+        queue = [(url, 0)]
+        seen = set()
+        while queue:
+            doc_url, depth = queue.pop(0)
+            if doc_url in seen or urlsplit(doc_url).scheme not in ("http", "https"):
+                continue
+            seen.add(doc_url)
+            try:
+                final_url, tables, frames = fetch_document(pool, doc_url)
+            except (HttpError, OSError, http.client.HTTPException) as exc:
+                if depth == 0:
+                    raise
+                logger.debug("Iframe ignoré (%s): %s", exc, doc_url)
+                continue
+            logger.debug("%d table(s) détectée(s) par HTTP dans: %s", len(tables), final_url)
+            candidates.extend(tables)
+            if depth < MAX_FRAME_DEPTH:
+                queue.extend((f, depth + 1) for f in frames)
+    finally:
+        if own_pool:
+            pool.close()
+    return candidates
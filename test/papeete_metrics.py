@@ -0,0 +1,146 @@
+"""Chronométrage par phase et compteurs d'un relevé (--metrics, --metrics-prom).
+
+Un relevé lent peut venir du lancement de Chromium, de la navigation, du
+parcours des frames, des tentatives de ``_find_best_table`` ou des écritures.
+Chaque phase est mesurée par un « span » nommé (une phase répétée, comme les
+tentatives de recherche, produit plusieurs spans du même nom) et les volumes
+par des compteurs (frames parcourues, tableaux trouvés, lignes, octets écrits).
+
+Résumé JSON:
+  {"total_s", "spans": [{"name", "s"}, ...],
+   "phases": {nom: {"calls", "total_s"}}, "counts": {nom: valeur}}
+
+Le format texte Prometheus est écrit de façon atomique, pour le collecteur
+« textfile » de node_exporter.
+
+Désactivé, le relevé utilise ``NULL_METRICS``: ``span`` renvoie un
+gestionnaire de contexte partagé sans effet et ``add`` ne fait rien.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Metrics:
+    """Spans (nom, durée) dans l'ordre d'exécution et compteurs cumulés."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.counts: Dict[str, int] = {}
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({"name": name, "s": round(time.perf_counter() - started, 6)})
+
+    def add(self, name: str, value: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    # Ajoute les spans et compteurs d'un résumé (relevé fait par le démon ou un navigateur gardé ouvert).
+    def merge(self, other: Optional[Dict[str, Any]]) -> None:
+        if not other:
+            return
+        self.spans.extend(other.get("spans", []))
+        for name, value in other.get("counts", {}).items():
+            self.add(name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        phases: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            phase = phases.setdefault(span["name"], {"calls": 0, "total_s": 0.0})
+            phase["calls"] += 1
+            phase["total_s"] = round(phase["total_s"] + span["s"], 6)
+        return {
+            "total_s": round(time.perf_counter() - self.started, 6),
+            "spans": self.spans,
+            "phases": phases,
+            "counts": dict(self.counts),
+        }
+
+
+class _NullMetrics:
+    """Mêmes méthodes que Metrics, sans mesure."""
+
+    enabled = False
+    _null_span = contextlib.nullcontext()
+
+    def span(self, name: str) -> contextlib.nullcontext:
+        return self._null_span
+
+    def add(self, name: str, value: int = 1) -> None:
+        pass
+
+    def merge(self, other: Optional[Dict[str, Any]]) -> None:
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+
+
+def new_metrics(enabled: bool):
+    return Metrics() if enabled else NULL_METRICS
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Résumé -> texte d'exposition Prometheus (jauges du dernier relevé).
+def render_prometheus(summary: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> str:
+    base = ",".join(f'{k}="{_label(v)}"' for k, v in sorted((labels or {}).items()))
+
+    def sample(name: str, value: Any, extra: str = "") -> str:
+        inner = ",".join(p for p in (base, extra) if p)
+        return f"{name}{{{inner}}} {value}" if inner else f"{name} {value}"
+
+    lines = [
+        "# HELP papeete_run_seconds Durée totale du dernier relevé.",
+        "# TYPE papeete_run_seconds gauge",
+        sample("papeete_run_seconds", summary["total_s"]),
+        "# HELP papeete_run_timestamp_seconds Fin du dernier relevé (epoch Unix).",
+        "# TYPE papeete_run_timestamp_seconds gauge",
+        sample("papeete_run_timestamp_seconds", round(time.time(), 3)),
+        "# HELP papeete_phase_seconds Durée cumulée de chaque phase du dernier relevé.",
+        "# TYPE papeete_phase_seconds gauge",
+    ]
+    phases = summary["phases"]
+    lines += [sample("papeete_phase_seconds", p["total_s"], f'phase="{_label(n)}"') for n, p in phases.items()]
+    lines += [
+        "# HELP papeete_phase_calls Nombre de passages dans chaque phase du dernier relevé.",
+        "# TYPE papeete_phase_calls gauge",
+    ]
+    lines += [sample("papeete_phase_calls", p["calls"], f'phase="{_label(n)}"') for n, p in phases.items()]
+    for name, value in sorted(summary["counts"].items()):
+        lines += [f"# TYPE papeete_{name} gauge", sample(f"papeete_{name}", value)]
+    return "\n".join(lines) + "\n"
+
+
+# Écriture atomique (le collecteur ne doit jamais lire un fichier à moitié écrit).
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# Écrit le résumé JSON (« - »: sur stderr, stdout portant les données).
+def write_summary(path: str, summary: Dict[str, Any]) -> None:
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if path == "-":
+        print(text, file=sys.stderr)
+        return
+    _write_atomic(path, text + "\n")
+
+
+def write_prometheus(path: str, summary: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> None:
+    _write_atomic(path, render_prometheus(summary, labels))
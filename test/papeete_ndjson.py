@@ -0,0 +1,67 @@
+"""Sortie NDJSON (une valeur JSON compacte par ligne) pour les consommateurs en flux.
+
+Première ligne: ``{"meta": {...}}``, puis un enregistrement par ligne, écrit
+dès qu'il est disponible. En multi-URL, chaque URL ouvre son bloc par sa
+ligne ``meta``. ``jq -c``, Kafka et consorts lisent ligne à ligne sans
+attendre la fin du document.
+
+Si ``orjson`` est installé, il sert d'encodeur (sortie identique à
+``json.dumps`` compact, plusieurs fois plus rapide); sinon la bibliothèque
+standard est utilisée.
+"""
+
+import json
+import sys
+from typing import Any, Callable, Dict, Iterable, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BACKENDS = ("auto", "orjson", "json")
+
+
+def _json_line(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _orjson_line(value: Any) -> str:
+    return orjson.dumps(value, option=orjson.OPT_APPEND_NEWLINE).decode("utf-8")
+
+
+# Encodeur d'une ligne NDJSON: orjson si disponible (ou demandé), sinon json.
+def line_encoder(backend: str = "auto") -> Callable[[Any], str]:
+    if backend == "orjson" and orjson is None:
+        raise RuntimeError("orjson n'est pas installé (pip install orjson)")
+    if backend in ("auto", "orjson") and orjson is not None:
+        return _orjson_line
+    return _json_line
+
+
+class NdjsonWriter:
+    """Écrit meta puis enregistrements sur stdout (« - ») ou dans un fichier."""
+
+    def __init__(self, path: str, backend: str = "auto") -> None:
+        self.path = path
+        self.encode = line_encoder(backend)
+        self._out: TextIO = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, meta: Dict[str, Any], records: Iterable[Dict[str, str]]) -> None:
+        out = self._out
+        encode = self.encode
+        out.write(encode({"meta": meta}))
+        for rec in records:
+            out.write(encode(rec))
+        out.flush()
+
+    def close(self) -> None:
+        if self._out is not sys.stdout:
+            self._out.close()
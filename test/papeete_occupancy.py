@@ -0,0 +1,160 @@
+"""Occupation des quais: index d'intervalles sur les escales appariées.
+
+Chaque escale (voir papeete_calls) occupe son quai d'arrivée et son quai de
+départ. Le tableau ne donne pas l'heure d'un déhalage (quai de départ
+différent du quai d'arrivée): l'escale est alors comptée sur les deux quais
+pour toute sa durée, ce qui surestime l'occupation mais ne masque aucun
+chevauchement possible. Une escale sans départ reste ouverte jusqu'à la fin
+de l'historique, une escale sans arrivée commence au début. Les dates-heures ISO sont
+comparées telles quelles (ordre lexicographique = chronologique).
+
+Par quai, les intervalles sont triés par début et rangés en arbre binaire
+implicite (le milieu de chaque tranche est la racine de la sous-arborescence)
+augmenté de la fin maximale de chaque sous-arbre. « Qui est à quai à T » et
+« quelles escales recoupent [début, fin) » coûtent O(log n + k); la liste des
+chevauchements d'un quai est obtenue par un balayage unique.
+
+Exemple:
+  python getPrevNaviresPapeete.py --no-type-filter --occupancy quais.txt
+"""
+
+import heapq
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Bornes des escales incomplètes (au-delà de toute date-heure ISO)
+OPEN_START = ""
+OPEN_END = "9999"
+
+
+class QuayIndex:
+    """Intervalles [début, fin) d'un quai, interrogeables en temps logarithmique."""
+
+    __slots__ = ("starts", "ends", "calls", "max_end")
+
+    def __init__(self, intervals: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        intervals = sorted(intervals, key=lambda iv: (iv[0], iv[1]))
+        self.starts = [iv[0] for iv in intervals]
+        self.ends = [iv[1] for iv in intervals]
+        self.calls = [iv[2] for iv in intervals]
+        self.max_end = list(self.ends)
+        self._augment(0, len(intervals))
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    # Fin maximale de chaque sous-arbre, stockée sur sa racine (milieu de la tranche).
+    def _augment(self, lo: int, hi: int) -> str:
+        if lo >= hi:
+            return OPEN_START
+        mid = (lo + hi) // 2
+        best = max(self.ends[mid], self._augment(lo, mid), self._augment(mid + 1, hi))
+        self.max_end[mid] = best
+        return best
+
+    # Indices des intervalles qui recoupent [start, end), par début croissant.
+    def _search(self, lo: int, hi: int, start: str, end: str) -> Iterator[int]:
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self.max_end[mid] <= start:
+            return
+        yield from self._search(lo, mid, start, end)
+        if self.starts[mid] >= end:
+            return
+        if self.ends[mid] > start:
+            yield mid
+        yield from self._search(mid + 1, hi, start, end)
+
+    # Escales qui recoupent [start, end).
+    def overlapping(self, start: str, end: str) -> List[Dict[str, Any]]:
+        return [self.calls[i] for i in self._search(0, len(self.calls), start, end)]
+
+    # Escales présentes à l'instant `at` (arrivée <= at < départ).
+    def at(self, at: str) -> List[Dict[str, Any]]:
+        return [self.calls[i] for i in self._search(0, len(self.calls), at, at + "\0")]
+
+    # Paires d'escales qui se chevauchent (balayage par début, tas des fins en cours).
+    def conflicts(self) -> List[Tuple[int, int]]:
+        pairs: List[Tuple[int, int]] = []
+        active: List[Tuple[str, int]] = []
+        for i, start in enumerate(self.starts):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            pairs.extend((j, i) for _end, j in active)
+            heapq.heappush(active, (self.ends[i], i))
+        return pairs
+
+
+class OccupancyIndex:
+    """Index par quai construit à partir des escales de ``pair_calls``."""
+
+    def __init__(self, calls: List[Dict[str, Any]]) -> None:
+        per_quay: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = defaultdict(list)
+        for call in calls:
+            interval = (call.get("arrival") or OPEN_START, call.get("departure") or OPEN_END, call)
+            for quay in dict.fromkeys(q for q in (call.get("arrival_quay"), call.get("departure_quay")) if q):
+                per_quay[quay].append(interval)
+        self.quays: Dict[str, QuayIndex] = {q: QuayIndex(ivs) for q, ivs in sorted(per_quay.items())}
+
+    # Escales présentes au quai `quay` à l'instant `at` (date-heure ISO).
+    def at(self, quay: str, at: str) -> List[Dict[str, Any]]:
+        index = self.quays.get(quay)
+        return index.at(at) if index else []
+
+    # Escales du quai `quay` qui recoupent [start, end).
+    def overlapping(self, quay: str, start: str, end: str) -> List[Dict[str, Any]]:
+        index = self.quays.get(quay)
+        return index.overlapping(start, end) if index else []
+
+    # Chevauchements par quai: {quai: [(escale, escale), ...]}.
+    def conflicts(self) -> Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        result = {}
+        for quay, index in self.quays.items():
+            pairs = index.conflicts()
+            if pairs:
+                result[quay] = [(index.calls[i], index.calls[j]) for i, j in pairs]
+        return result
+
+
+def _fmt(value: Optional[str]) -> str:
+    return (value or "?").replace("T", " ").ljust(16)
+
+
+# Rapport d'occupation: une frise par quai, chevauchements signalés par « ! ».
+def render_report(index: OccupancyIndex) -> str:
+    lines: List[str] = []
+    for quay, qi in index.quays.items():
+        pairs = qi.conflicts()
+        clashing = {i for pair in pairs for i in pair}
+        lines.append(f"{quay} ({len(qi)} escale(s), {len(pairs)} chevauchement(s))")
+        for i, call in enumerate(qi.calls):
+            dwell = call.get("dwell_minutes")
+            duration = f"{dwell // 60} h {dwell % 60:02d}" if dwell is not None else "ouverte"
+            shift = ""
+            if call.get("arrival_quay") and call.get("departure_quay") and call["arrival_quay"] != call["departure_quay"]:
+                shift = f" [déhalage {call['arrival_quay']} -> {call['departure_quay']}]"
+            lines.append(
+                f"  {'!' if i in clashing else ' '} {_fmt(call.get('arrival'))} -> {_fmt(call.get('departure'))}"
+                f"  {call.get('vessel', '')} ({duration}){shift}"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+# Écrit le rapport: JSON si le chemin se termine par .json, frise texte sinon.
+def write_report(path: str, index: OccupancyIndex) -> None:
+    if path.lower().endswith(".json"):
+        payload = {
+            quay: {
+                "calls": qi.calls,
+                "conflicts": [[i, j] for i, j in qi.conflicts()],
+            }
+            for quay, qi in index.quays.items()
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_report(index))
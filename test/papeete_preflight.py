@@ -0,0 +1,95 @@
+"""Pré-vérification HTTP conditionnelle avant tout scraping.
+
+La plupart des relevés tombent sur une page identique. Avant de lancer
+Chromium, la page (``--url``) et le document du tableau (``frame_url`` du
+relevé précédent) sont redemandés avec les validateurs mémorisés
+(``If-None-Match`` / ``If-Modified-Since``). Si chaque document répond 304,
+ou renvoie un corps d'empreinte identique, le tableau est réputé inchangé
+et le scraping est sauté.
+
+Les validateurs sont gardés dans le fichier --hash-file, par document:
+  {"etag", "last_modified", "body_hash"}
+
+Limite: un tableau rempli par XHR peut changer sans que ses documents
+changent; la pré-vérification reste donc optionnelle (--preflight).
+"""
+
+import hashlib
+import http.client
+import logging
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from papeete_http import HttpError, HttpPool, iter_body
+
+
+logger = logging.getLogger(__name__)
+
+Validators = Dict[str, Optional[str]]
+
+
+# Redemande un document; renvoie (inchangé, validateurs à jour).
+def check_document(pool: HttpPool, url: str, previous: Optional[Validators]) -> Tuple[bool, Validators]:
+    previous = previous or {}
+    headers = {}
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    _final_url, response = pool.open(url, headers=headers)
+    if response.status == 304:
+        response.read()
+        logger.debug("Pré-vérification: 304 pour %s", url)
+        return True, previous
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter_body(response):
+        digest.update(chunk)
+    current = {
+        "etag": response.getheader("ETag"),
+        "last_modified": response.getheader("Last-Modified"),
+        "body_hash": digest.hexdigest(),
+    }
+    unchanged = bool(previous.get("body_hash")) and previous["body_hash"] == current["body_hash"]
+    logger.debug("Pré-vérification: %s pour %s", "corps identique" if unchanged else "modifié", url)
+    return unchanged, current
+
+
+# Vérifie tous les documents; renvoie (tous inchangés, validateurs par document, durée en s).
+def preflight(
+    urls: List[str], previous: Dict[str, Validators], timeout_ms: int
+) -> Tuple[bool, Dict[str, Validators], float]:
+    started = time.perf_counter()
+    pool = HttpPool(timeout=timeout_ms / 1000.0)
+    unchanged = True
+    validators: Dict[str, Validators] = {}
+    try:
+        for url in dict.fromkeys(u for u in urls if u):
+            try:
+                same, validators[url] = check_document(pool, url, previous.get(url))
+            except (HttpError, OSError, http.client.HTTPException, zlib.error) as exc:
+                logger.info("Pré-vérification impossible (%s): %s", exc, url)
+                return False, {}, time.perf_counter() - started
+            unchanged = unchanged and same
+    finally:
+        pool.close()
+    return unchanged, validators, time.perf_counter() - started
+
+
+# Met à jour les compteurs cumulés et renvoie le résumé de l'exécution.
+def record_outcome(stats: Dict[str, Any], hit: bool, elapsed_s: float, full_run_s: Optional[float]) -> Dict[str, Any]:
+    stats["checks"] = stats.get("checks", 0) + 1
+    saved = 0.0
+    if hit:
+        stats["hits"] = stats.get("hits", 0) + 1
+        saved = max(0.0, (full_run_s or 0.0) - elapsed_s)
+        stats["saved_s"] = round(stats.get("saved_s", 0.0) + saved, 3)
+    return {
+        "hit": hit,
+        "elapsed_s": round(elapsed_s, 3),
+        "saved_s": round(saved, 3),
+        "hits": stats.get("hits", 0),
+        "checks": stats["checks"],
+        "hit_rate": round(stats.get("hits", 0) / stats["checks"], 3),
+        "total_saved_s": stats.get("saved_s", 0.0),
+    }
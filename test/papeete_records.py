@@ -0,0 +1,240 @@
+"""Représentation typée et en colonnes des mouvements.
+
+``_to_records`` produit un dictionnaire par ligne, indexé par les en-têtes
+français, dont toutes les valeurs sont du texte. Pour un historique de
+plusieurs années, ``MovementColumns`` range les mêmes données par colonne:
+
+- date-heure en minutes depuis 1970 (``array('q')``, heure locale de Papeete,
+  restituée avec le fuseau Pacific/Tahiti par ``row``);
+- « Arrivées »/« Départs » en numéros de jour (``array('l')``, 0 si vide);
+- longueur en flottant (``array('d')``, NaN si vide);
+- type de navire codé par ``VesselType`` (``array('b')``);
+- navire, quai et autres colonnes encodés par dictionnaire (``array('I')``
+  d'indices vers des chaînes internées, chaque valeur distincte stockée une fois).
+
+La conversion est sans perte: une valeur que le format canonique ne
+reproduit pas à l'identique (« 156.50 », type inconnu, date mal formée) est
+gardée telle quelle dans une table d'exceptions et restituée par
+``to_records``. ``row(i)`` renvoie une vue ``Movement`` typée (``__slots__``).
+"""
+
+import enum
+import math
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from papeete_dates import EPOCH, parse_day, parse_minutes, to_datetime
+from papeete_fields import MovementFields
+
+
+MISSING_MINUTES = -(2**63)
+
+
+class VesselType(enum.IntEnum):
+    """Types proposés par le filtre de la page (« Type CABOTEUR CARGO ... »)."""
+
+    UNKNOWN = 0
+    CABOTEUR = 1
+    CARGO = 2
+    PAQUEBOT = 3
+    PECHE = 4
+    YACHT = 5
+
+    @classmethod
+    def parse(cls, value: str) -> "VesselType":
+        return cls.__members__.get(value.strip().upper(), cls.UNKNOWN)
+
+
+@dataclass
+class Movement:
+    """Vue typée d'une ligne (None/NaN pour les cellules vides)."""
+
+    __slots__ = ("when", "vessel", "vessel_type", "arrival", "departure", "quay", "length", "extra")
+
+    when: Optional[datetime]
+    vessel: str
+    vessel_type: VesselType
+    arrival: Optional[date]
+    departure: Optional[date]
+    quay: str
+    length: Optional[float]
+    extra: Dict[str, str]
+
+
+def format_minutes(minutes: int) -> str:
+    d = EPOCH + timedelta(minutes=minutes)
+    return f"{d.day:02d}/{d.month:02d}/{d.year:04d} - {d.hour:02d}:{d.minute:02d}"
+
+
+def format_day(ordinal: int) -> str:
+    d = date.fromordinal(ordinal)
+    return f"{d.day:02d}/{d.month:02d}/{d.year:04d}"
+
+
+# 159.0 -> « 159 », 258.6 -> « 258.6 » (NaN -> « »).
+def format_length(value: float) -> str:
+    if math.isnan(value):
+        return ""
+    text = repr(value)
+    return text[:-2] if text.endswith(".0") else text
+
+
+class _Dictionary:
+    """Encodage par dictionnaire: chaque chaîne distincte est internée et stockée une fois."""
+
+    __slots__ = ("values", "codes", "_index")
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self.codes = array("I")
+        self._index: Dict[str, int] = {}
+
+    def append(self, value: str) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        self.codes.append(code)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+
+class MovementColumns:
+    """Mouvements rangés par colonne; voir le docstring du module."""
+
+    def __init__(self, headers: List[str]) -> None:
+        self.headers = list(headers)
+        self.fields = MovementFields.from_headers(self.headers)
+        typed = {self.fields.date, self.fields.arrival, self.fields.departure, self.fields.length}
+        typed |= {self.fields.vessel_type, self.fields.vessel, self.fields.quay}
+        self.minutes = array("q")
+        self.arrival_days = array("l")
+        self.departure_days = array("l")
+        self.lengths = array("d")
+        self.types = array("b")
+        self.vessels = _Dictionary()
+        self.quays = _Dictionary()
+        self.extra: Dict[str, _Dictionary] = {h: _Dictionary() for h in self.headers if h not in typed}
+        # Valeurs non canoniques, restituées telles quelles: {(ligne, en-tête): texte}
+        self.raw: Dict[Tuple[int, str], str] = {}
+        self._memo: Dict[str, Dict[str, Tuple[object, bool]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.minutes)
+
+    @classmethod
+    def from_records(cls, headers: List[str], records: List[Dict[str, str]]) -> "MovementColumns":
+        columns = cls(headers)
+        for rec in records:
+            columns.append(rec)
+        return columns
+
+    # Encode une cellule typée; la garde dans `raw` si le format canonique ne la reproduit pas.
+    def _encode(self, i: int, header: Optional[str], value: str, parse, fmt, missing):
+        if header is None or not value:
+            return missing
+        # Les valeurs se répètent beaucoup (jours, longueurs, types): analyse mémorisée par colonne
+        memo = self._memo.setdefault(header, {})
+        hit = memo.get(value)
+        if hit is None:
+            parsed = parse(value)
+            hit = memo[value] = (missing, False) if parsed is None else (parsed, fmt(parsed) == value)
+        if not hit[1]:
+            self.raw[(i, header)] = value
+        return hit[0]
+
+    # Date-heure: l'analyse stricte garantit le format canonique (pas de mémo, valeurs presque uniques).
+    def _encode_minutes(self, i: int, header: Optional[str], value: str) -> int:
+        if header is None or not value:
+            return MISSING_MINUTES
+        parsed = parse_minutes(value)
+        if parsed is None:
+            self.raw[(i, header)] = value
+            return MISSING_MINUTES
+        return parsed
+
+    def append(self, rec: Dict[str, str]) -> None:
+        f = self.fields
+        i = len(self.minutes)
+        get = rec.get
+        self.minutes.append(self._encode_minutes(i, f.date, get(f.date, "")))
+        self.arrival_days.append(self._encode(i, f.arrival, get(f.arrival, ""), parse_day, format_day, 0))
+        self.departure_days.append(self._encode(i, f.departure, get(f.departure, ""), parse_day, format_day, 0))
+        self.lengths.append(
+            self._encode(i, f.length, get(f.length, ""), _parse_length, format_length, math.nan)
+        )
+        vessel_type = self._encode(
+            i, f.vessel_type, get(f.vessel_type, ""), _parse_type, _type_name, VesselType.UNKNOWN
+        )
+        self.types.append(int(vessel_type))
+        self.vessels.append(get(f.vessel, "") if f.vessel else "")
+        self.quays.append(get(f.quay, "") if f.quay else "")
+        for header, column in self.extra.items():
+            column.append(get(header, ""))
+
+    # Texte d'origine d'une cellule (format canonique ou exception conservée).
+    def _text(self, i: int, header: str) -> str:
+        raw = self.raw.get((i, header))
+        if raw is not None:
+            return raw
+        f = self.fields
+        if header == f.date:
+            m = self.minutes[i]
+            return "" if m == MISSING_MINUTES else format_minutes(m)
+        if header == f.arrival:
+            return format_day(self.arrival_days[i]) if self.arrival_days[i] else ""
+        if header == f.departure:
+            return format_day(self.departure_days[i]) if self.departure_days[i] else ""
+        if header == f.length:
+            return format_length(self.lengths[i])
+        if header == f.vessel_type:
+            t = VesselType(self.types[i])
+            return "" if t is VesselType.UNKNOWN else t.name
+        if header == f.vessel:
+            return self.vessels[i]
+        if header == f.quay:
+            return self.quays[i]
+        return self.extra[header][i]
+
+    # Vue typée de la ligne i.
+    def row(self, i: int) -> Movement:
+        m = self.minutes[i]
+        length = self.lengths[i]
+        return Movement(
+            when=None if m == MISSING_MINUTES else to_datetime(m),
+            vessel=self.vessels[i],
+            vessel_type=VesselType(self.types[i]),
+            arrival=date.fromordinal(self.arrival_days[i]) if self.arrival_days[i] else None,
+            departure=date.fromordinal(self.departure_days[i]) if self.departure_days[i] else None,
+            quay=self.quays[i],
+            length=None if math.isnan(length) else length,
+            extra={h: c[i] for h, c in self.extra.items()},
+        )
+
+    def __iter__(self) -> Iterator[Movement]:
+        return (self.row(i) for i in range(len(self)))
+
+    # Forme dictionnaire de ``_to_records`` (identique à l'entrée de from_records).
+    def to_records(self) -> List[Dict[str, str]]:
+        headers = self.headers
+        return [{h: self._text(i, h) for h in headers} for i in range(len(self))]
+
+
+def _parse_length(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_type(value: str) -> Optional[VesselType]:
+    parsed = VesselType.parse(value)
+    return None if parsed is VesselType.UNKNOWN else parsed
+
+
+def _type_name(value: VesselType) -> str:
+    return value.name
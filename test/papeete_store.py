@@ -0,0 +1,136 @@
+"""Historique SQLite des mouvements de navires.
+
+Chaque exécution ajoute une ligne dans ``runs`` et fusionne (upsert) les
+enregistrements de ``_to_records`` dans ``movements``, identifiés par
+(date-heure, navire, sens du mouvement, quai). Les dates de première et
+dernière observation sont tenues à jour; l'écriture se fait en une seule
+transaction (executemany) pour rester peu coûteuse même avec des années
+d'historique.
+
+Exemple:
+  python getPrevNaviresPapeete.py --db historique.sqlite
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from papeete_fields import MovementFields, iso_datetime
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    scraped_at  TEXT NOT NULL,
+    source_url  TEXT,
+    frame_url   TEXT,
+    engine      TEXT,
+    row_count   INTEGER NOT NULL,
+    inserted    INTEGER NOT NULL DEFAULT 0,
+    updated     INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS movements (
+    id          INTEGER PRIMARY KEY,
+    ts          TEXT NOT NULL,
+    vessel      TEXT NOT NULL,
+    direction   TEXT NOT NULL,
+    quay        TEXT NOT NULL,
+    vessel_type TEXT,
+    record      TEXT NOT NULL,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL,
+    first_run   INTEGER NOT NULL REFERENCES runs(id),
+    last_run    INTEGER NOT NULL REFERENCES runs(id),
+    UNIQUE (ts, vessel, direction, quay)
+);
+-- Compteurs d'une exécution (last_run, puis first_run pour les insertions): sans parcours de l'historique
+DROP INDEX IF EXISTS movements_last_run;
+CREATE INDEX IF NOT EXISTS movements_runs ON movements (last_run, first_run);
+CREATE INDEX IF NOT EXISTS movements_vessel_ts ON movements (vessel, ts);
+CREATE INDEX IF NOT EXISTS movements_quay_ts ON movements (quay, ts);
+"""
+
+_UPSERT = """
+INSERT INTO movements
+    (ts, vessel, direction, quay, vessel_type, record, first_seen, last_seen, first_run, last_run)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (ts, vessel, direction, quay) DO UPDATE SET
+    vessel_type = excluded.vessel_type,
+    record = excluded.record,
+    last_seen = excluded.last_seen,
+    last_run = excluded.last_run
+"""
+
+
+class HistoryStore:
+    """Base SQLite d'historique (créée au besoin). Utilisable comme gestionnaire de contexte."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # Enregistre une exécution et fusionne ses enregistrements; renvoie les compteurs.
+    def record_run(
+        self,
+        headers: List[str],
+        records: Iterable[Dict[str, str]],
+        meta: Dict[str, Any],
+        scraped_at: Optional[str] = None,
+    ) -> Dict[str, int]:
+        scraped_at = scraped_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        fields = MovementFields.from_headers(headers)
+        records = list(records)
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (scraped_at, source_url, frame_url, engine, row_count) VALUES (?, ?, ?, ?, ?)",
+                (scraped_at, meta.get("source_url"), meta.get("frame_url"), meta.get("engine"), len(records)),
+            )
+            run_id = cur.lastrowid
+            params = []
+            for rec in records:
+                params.append(
+                    (
+                        iso_datetime(fields.get(rec, fields.date)),
+                        fields.get(rec, fields.vessel),
+                        fields.direction(rec),
+                        fields.get(rec, fields.quay),
+                        fields.get(rec, fields.vessel_type) or None,
+                        json.dumps(rec, ensure_ascii=False, sort_keys=True),
+                        scraped_at,
+                        scraped_at,
+                        run_id,
+                        run_id,
+                    )
+                )
+            self.conn.executemany(_UPSERT, params)
+            # Une ligne insérée par cette exécution a aussi last_run = run_id (index movements_runs)
+            inserted = self.conn.execute(
+                "SELECT COUNT(*) FROM movements WHERE last_run = ? AND first_run = ?", (run_id, run_id)
+            ).fetchone()[0]
+            # Doublons éventuels dans un même tableau: comptés une seule fois
+            touched = self.conn.execute(
+                "SELECT COUNT(*) FROM movements WHERE last_run = ?", (run_id,)
+            ).fetchone()[0]
+            updated = touched - inserted
+            self.conn.execute(
+                "UPDATE runs SET inserted = ?, updated = ? WHERE id = ?", (inserted, updated, run_id)
+            )
+        logger.info("Historique %s: exécution #%d, %d nouveau(x), %d mis à jour", self.path, run_id, inserted, updated)
+        return {"run_id": run_id, "inserted": inserted, "updated": updated}
@@ -0,0 +1,75 @@
+"""Cadence adaptative du mode --watch.
+
+Un cron à intervalle fixe interroge la page pour rien la nuit et trop
+rarement les jours d'escales. Ici l'intervalle suit l'activité:
+
+- mouvement imminent (colonne Date dans les prochaines heures): intervalle minimal;
+- tableau modifié au dernier relevé: intervalle divisé par deux;
+- rien de neuf: intervalle multiplié par 1,5, jusqu'au maximum;
+- échec (timeout Playwright, aucun tableau): attente exponentielle
+  minimal × 2^échecs, plafonnée au maximum.
+
+Chaque attente reçoit une gigue de ±10 % pour désynchroniser plusieurs
+instances.
+"""
+
+import bisect
+import random
+from datetime import datetime
+from typing import Iterable, Optional
+
+from papeete_dates import EPOCH, TAHITI
+
+
+# Heure courante de Papeete en minutes depuis 1970 (même repère que minutes_column).
+def now_minutes() -> int:
+    now = datetime.now(TAHITI).replace(tzinfo=None)
+    return int((now - EPOCH).total_seconds() // 60)
+
+
+# True si un mouvement est prévu entre `now` et `now + horizon` (minutes triées).
+def imminent(sorted_minutes: list, now: int, horizon_min: int) -> bool:
+    i = bisect.bisect_left(sorted_minutes, now)
+    return i < len(sorted_minutes) and sorted_minutes[i] <= now + horizon_min
+
+
+class AdaptiveSchedule:
+    """Calcule l'attente avant le prochain relevé."""
+
+    def __init__(
+        self,
+        min_s: float,
+        max_s: float,
+        horizon_h: float,
+        jitter: float = 0.1,
+        rnd: Optional[random.Random] = None,
+    ) -> None:
+        self.min_s = min_s
+        self.max_s = max(min_s, max_s)
+        self.horizon_min = int(horizon_h * 60)
+        self.jitter = jitter
+        self.rnd = rnd or random.Random()
+        self.interval = min_s
+        self.failures = 0
+        self._movements: list = []
+
+    def _jittered(self, delay: float) -> float:
+        return delay * self.rnd.uniform(1 - self.jitter, 1 + self.jitter)
+
+    # Relevé réussi: `movements` = dates-heures du tableau (None si non relu: tableau inchangé).
+    def after_success(self, movements: Optional[Iterable[Optional[int]]], changed: bool) -> float:
+        self.failures = 0
+        if movements is not None:
+            self._movements = sorted(m for m in movements if m is not None)
+        if imminent(self._movements, now_minutes(), self.horizon_min):
+            self.interval = self.min_s
+        elif changed:
+            self.interval = max(self.min_s, self.interval / 2)
+        else:
+            self.interval = min(self.max_s, self.interval * 1.5)
+        return self._jittered(self.interval)
+
+    # Relevé en échec: attente exponentielle.
+    def after_failure(self) -> float:
+        self.failures += 1
+        return self._jittered(min(self.max_s, self.min_s * 2 ** self.failures))
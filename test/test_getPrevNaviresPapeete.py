@@ -0,0 +1,112 @@
+"""Tests de la projection des colonnes (python -m unittest, depuis test/)."""
+
+import unittest
+
+from getPrevNaviresPapeete import (
+    _build_parser,
+    _build_result,
+    _extraction_options,
+    _job_from_args,
+    _mark_projected,
+    _rows_options,
+    _to_records,
+)
+
+
+HEADERS = ["Date", "N° Escale", "Navire", "Type", "Arrivées", "Départs", "Quai", "agent"]
+ROW = ["18/09/2025 - 05:30", "E1", "STAR BREEZE", "PAQUEBOT", "18/09/2025", "", "QUAI DES PAQUEBOTS", "AGENCE"]
+HISTORY_KEY = ["Date", "Navire", "Arrivées", "Départs", "Quai"]
+
+
+def _table(rows=None, headers=HEADERS):
+    return {"headers": list(headers), "rows": [list(r) for r in (rows or [ROW])], "rowCount": len(rows or [ROW])}
+
+
+# Lecture projetée comme dans la page: _TABLE_ROWS_JS ne renvoie que les colonnes `keep`
+# (cellule absente -> "", la dernière colonne absorbe les cellules excédentaires).
+def _page_read(table, job):
+    options = _rows_options(table, _extraction_options(job))
+    keep = options.get("keep")
+    if keep is not None:
+        width = options["width"]
+
+        def cell_at(r, i):
+            if i == width - 1 and len(r) > width:
+                return " | ".join(r[i:])
+            return r[i] if i < len(r) else ""
+
+        table["rows"] = [[cell_at(r, i) for i in keep] for r in table["rows"]]
+    _mark_projected(table, options)
+    return table
+
+
+class ToRecordsTest(unittest.TestCase):
+    def test_short_rows_padded_and_overflow_joined(self):
+        headers = ["Date", "Navire", "Observations"]
+        table = _table([["18/09/2025 - 05:30"], ["19/09/2025 - 06:00", "PANORAMA II", "escale", "technique"]], headers)
+        out_headers, records = _to_records(table)
+        self.assertEqual(out_headers, headers)
+        self.assertEqual(records[0], {"Date": "18/09/2025 - 05:30", "Navire": "", "Observations": ""})
+        self.assertEqual(records[1]["Observations"], "escale | technique")
+
+    def test_overflow_joined_before_projection(self):
+        headers, records = _to_records(_table([ROW + ["extra"]]), ["agent", "Date"])
+        self.assertEqual(headers, ["agent", "Date"])
+        self.assertEqual(records, [{"agent": "AGENCE | extra", "Date": ROW[0]}])
+
+    def test_generated_headers_without_header_row(self):
+        headers, records = _to_records(_table([["a", "b"], ["c"]], []))
+        self.assertEqual(headers, ["col_1", "col_2"])
+        self.assertEqual(records, [{"col_1": "a", "col_2": "b"}, {"col_1": "c", "col_2": ""}])
+
+    def test_default_drops_ignored_headers(self):
+        headers, _records = _to_records(_table())
+        self.assertEqual(headers, ["Date", "Navire", "Type", "Arrivées", "Départs", "Quai"])
+
+    def test_columns_order_and_drop_columns(self):
+        with self.assertLogs("getPrevNaviresPapeete", "WARNING"):
+            headers, records = _to_records(_table(), ["quai", "navire", "n escale", "Absente"], ["N° Escale"])
+        self.assertEqual(headers, ["Quai", "Navire"])
+        self.assertEqual(records, [{"Quai": "QUAI DES PAQUEBOTS", "Navire": "STAR BREEZE"}])
+
+    def test_projected_table_keeps_every_column(self):
+        table = dict(_table([["STAR BREEZE", "QUAI DES PAQUEBOTS"]], ["Navire", "Quai"]), projected=True)
+        headers, records = _to_records(table, ["Quai"])
+        self.assertEqual(headers, ["Navire", "Quai"])
+        self.assertEqual(records, [{"Navire": "STAR BREEZE", "Quai": "QUAI DES PAQUEBOTS"}])
+
+
+class BuildResultTest(unittest.TestCase):
+    def _run(self, argv):
+        args = _build_parser().parse_args(argv + ["--no-type-filter"])
+        table = _page_read(_table([ROW, ROW[:4]]), _job_from_args(args, "https://example.invalid/"))
+        return table, _build_result(table, args, "https://example.invalid/")
+
+    def test_page_projection_matches_columns(self):
+        table, (headers, all_records, records, meta) = self._run(["--columns", "Navire,Quai"])
+        self.assertTrue(table.get("projected"))
+        self.assertEqual(headers, ["Navire", "Quai"])
+        self.assertEqual(records, [{"Navire": "STAR BREEZE", "Quai": "QUAI DES PAQUEBOTS"}, {"Navire": "STAR BREEZE", "Quai": ""}])
+        self.assertIs(all_records, records)
+        self.assertEqual(meta["headers"], headers)
+
+    def test_db_keeps_history_key_columns(self):
+        table, (headers, all_records, records, _meta) = self._run(["--db", "historique.sqlite", "--columns", "Navire,Quai"])
+        self.assertFalse(table.get("projected"))
+        self.assertEqual(headers, ["Navire", "Quai"])
+        self.assertEqual(list(records[0]), ["Navire", "Quai"])
+        self.assertEqual(len(all_records), len(records))
+        for name in HISTORY_KEY:
+            self.assertIn(name, all_records[0])
+        self.assertEqual(all_records[0]["Arrivées"], "18/09/2025")
+        self.assertEqual((all_records[1]["Quai"], all_records[1]["Date"]), ("", ROW[0]))
+        self.assertNotIn("agent", all_records[0])
+
+    def test_db_with_drop_columns_keeps_dropped_column(self):
+        _table_, (headers, all_records, _records, _meta) = self._run(["--db", "historique.sqlite", "--drop-columns", "Quai"])
+        self.assertNotIn("Quai", headers)
+        self.assertEqual(all_records[0]["Quai"], "QUAI DES PAQUEBOTS")
+
+
+if __name__ == "__main__":
+    unittest.main()
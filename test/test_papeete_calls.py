@@ -0,0 +1,77 @@
+"""Tests de l'appariement des escales (python -m unittest, depuis test/)."""
+
+import csv
+import os
+import unittest
+
+from papeete_calls import pair_calls
+
+
+OUT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out.csv")
+HEADERS = ["Date", "Navire", "Type", "Arrivées", "Départs", "Quai", "Longueur"]
+
+
+def _row(date: str, vessel: str = "STAR BREEZE", quay: str = "QUAI DES PAQUEBOTS", arrival: bool = True):
+    day = date[:10]
+    return {
+        "Date": date,
+        "Navire": vessel,
+        "Type": "PAQUEBOT",
+        "Arrivées": day if arrival else "",
+        "Départs": "" if arrival else day,
+        "Quai": quay,
+        "Longueur": "159,50",
+    }
+
+
+class PairCallsTest(unittest.TestCase):
+    def test_multi_day_call_with_berth_shift(self):
+        rows = [_row("20/09/2025 - 17:00", quay="EPI NORD", arrival=False), _row("18/09/2025 - 05:30")]
+        (call,) = pair_calls(HEADERS, rows)
+        self.assertEqual((call["arrival"], call["departure"]), ("2025-09-18T05:30", "2025-09-20T17:00"))
+        self.assertEqual((call["arrival_quay"], call["departure_quay"]), ("QUAI DES PAQUEBOTS", "EPI NORD"))
+        self.assertEqual(call["dwell_minutes"], 2 * 1440 + 11 * 60 + 30)
+        self.assertEqual((call["vessel_type"], call["length"]), ("PAQUEBOT", 159.5))
+
+    def test_departure_without_arrival(self):
+        # Arrivée antérieure à la fenêtre publiée
+        (call,) = pair_calls(HEADERS, [_row("18/09/2025 - 17:30", arrival=False)])
+        self.assertIsNone(call["arrival"])
+        self.assertIsNone(call["arrival_quay"])
+        self.assertEqual(call["departure"], "2025-09-18T17:30")
+        self.assertIsNone(call["dwell_minutes"])
+
+    def test_arrival_without_departure(self):
+        # Deux arrivées de suite: la première reste ouverte, la seconde aussi (départ hors fenêtre)
+        rows = [_row("18/09/2025 - 05:30"), _row("25/09/2025 - 05:30")]
+        calls = pair_calls(HEADERS, rows)
+        self.assertEqual([c["arrival"] for c in calls], ["2025-09-18T05:30", "2025-09-25T05:30"])
+        self.assertTrue(all(c["departure"] is None and c["dwell_minutes"] is None for c in calls))
+
+    def test_departure_closes_previous_call_at_same_time(self):
+        rows = [
+            _row("18/09/2025 - 05:30"),
+            _row("19/09/2025 - 06:00"),
+            _row("19/09/2025 - 06:00", arrival=False),
+        ]
+        calls = pair_calls(HEADERS, rows)
+        self.assertEqual(
+            [(c["arrival"], c["departure"]) for c in calls],
+            [("2025-09-18T05:30", "2025-09-19T06:00"), ("2025-09-19T06:00", None)],
+        )
+
+    def test_rows_without_direction_are_ignored(self):
+        row = dict(_row("18/09/2025 - 05:30"), **{"Arrivées": ""})
+        self.assertEqual(pair_calls(HEADERS, [row]), [])
+
+    def test_recorded_table_keeps_every_movement(self):
+        with open(OUT_CSV, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        calls = pair_calls(list(rows[0]), rows)
+        movements = sum((c["arrival"] is not None) + (c["departure"] is not None) for c in calls)
+        self.assertEqual(movements, sum(1 for r in rows if r["Arrivées"].strip() or r["Départs"].strip()))
+        self.assertTrue(all(c["dwell_minutes"] is None or c["dwell_minutes"] >= 0 for c in calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Tests de l'analyse des dates par colonne (python -m unittest, depuis test/)."""
+
+import csv
+import os
+import unittest
+from datetime import date, datetime
+
+from papeete_dates import (
+    EPOCH,
+    day_column,
+    minutes_column,
+    parse_day,
+    parse_iso_minutes,
+    parse_minutes,
+    sort_chronologically,
+)
+
+
+OUT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out.csv")
+
+
+def _minutes(dt: datetime) -> int:
+    return int((dt - EPOCH).total_seconds() // 60)
+
+
+class ParseTest(unittest.TestCase):
+    def test_parse_minutes(self):
+        self.assertEqual(parse_minutes("18/09/2025 - 05:30"), _minutes(datetime(2025, 9, 18, 5, 30)))
+        for bad in ("", "18/09/2025", "18/09/2025 - 24:00", "31/02/2025 - 05:30", "18-09-2025 - 05:30", "18/09/2025 05:30"):
+            self.assertIsNone(parse_minutes(bad), bad)
+
+    def test_parse_day(self):
+        self.assertEqual(parse_day("18/09/2025"), date(2025, 9, 18).toordinal())
+        for bad in ("", "18/9/2025", "31/02/2025", "18/09/0999", "aa/09/2025"):
+            self.assertIsNone(parse_day(bad), bad)
+
+    def test_parse_iso_minutes_matches_table_format(self):
+        self.assertEqual(parse_iso_minutes("2025-09-18T05:30"), parse_minutes("18/09/2025 - 05:30"))
+        self.assertEqual(parse_iso_minutes("2025-09-18"), _minutes(datetime(2025, 9, 18)))
+        self.assertIsNone(parse_iso_minutes("2025-09-18 05:30"))
+
+
+class ColumnTest(unittest.TestCase):
+    def test_columns_match_per_value_parsing(self):
+        with open(OUT_CSV, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        dates = [r["Date"] for r in rows] + ["", "18/09/2025", "31/02/2025 - 05:30", "18/09/2025 - 99:00"]
+        self.assertEqual(minutes_column(dates), [parse_minutes(v) for v in dates])
+        days = [r["Arrivées"] for r in rows] + [r["Départs"] for r in rows]
+        self.assertEqual(day_column(days), [parse_day(v) for v in days])
+
+    def test_sort_is_stable_with_unreadable_dates_last(self):
+        records = [
+            {"Date": "à confirmer", "Navire": "A"},
+            {"Date": "19/09/2025 - 06:00", "Navire": "B"},
+            {"Date": "18/09/2025 - 05:30", "Navire": "C"},
+            {"Date": "19/09/2025 - 06:00", "Navire": "D"},
+            {"Date": "", "Navire": "E"},
+        ]
+        ordered = sort_chronologically(records, "Date")
+        self.assertEqual([r["Navire"] for r in ordered], ["C", "B", "D", "A", "E"])
+        self.assertEqual(sort_chronologically(records, None), records)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests du différentiel entre relevés (python -m unittest, depuis test/)."""
+
+import unittest
+from collections import Counter
+
+from papeete_diff import ADDED, MODIFIED, REMOVED, diff_records
+
+
+HEADERS = ["Date", "Navire", "Arrivées", "Départs", "Quai"]
+
+
+def _row(date: str, vessel: str = "STAR BREEZE", quay: str = "QUAI DES PAQUEBOTS", arrival: bool = True):
+    day = date[:10]
+    return {
+        "Date": date,
+        "Navire": vessel,
+        "Arrivées": day if arrival else "",
+        "Départs": "" if arrival else day,
+        "Quai": quay,
+    }
+
+
+def _events(old, new):
+    return Counter(e["event"] for e in diff_records(HEADERS, old, new))
+
+
+class DiffRecordsTest(unittest.TestCase):
+    def test_identical_rows_cancel(self):
+        rows = [_row("18/09/2025 - 05:30"), _row("19/09/2025 - 06:00", "PANORAMA II")]
+        self.assertEqual(diff_records(HEADERS, rows, list(reversed(rows))), [])
+
+    def test_quay_change_is_modified(self):
+        old = [_row("18/09/2025 - 05:30")]
+        new = [_row("18/09/2025 - 05:30", quay="EPI SUD (POSTE N. 3 NORD)")]
+        events = diff_records(HEADERS, old, new)
+        self.assertEqual([e["event"] for e in events], [MODIFIED])
+        self.assertEqual(events[0]["changes"], {"Quai": ["QUAI DES PAQUEBOTS", "EPI SUD (POSTE N. 3 NORD)"]})
+
+    def test_delay_within_tolerance_is_modified(self):
+        old = [_row("18/09/2025 - 05:30")]
+        new = [_row("19/09/2025 - 07:00")]
+        self.assertEqual(_events(old, new), Counter({MODIFIED: 1}))
+
+    def test_new_call_of_same_vessel_is_removed_and_added(self):
+        # Escale sortie de la fenêtre, nouvelle escale du même navire plus tard
+        old = [_row("18/09/2025 - 05:30")]
+        new = [_row("25/10/2025 - 05:30")]
+        self.assertEqual(_events(old, new), Counter({ADDED: 1, REMOVED: 1}))
+
+    def test_pairs_with_closest_date(self):
+        old = [_row("01/10/2025 - 06:00"), _row("18/09/2025 - 05:30")]
+        new = [_row("18/09/2025 - 08:00"), _row("01/10/2025 - 06:00", quay="EPI SUD (POSTE N. 3 NORD)")]
+        events = diff_records(HEADERS, old, new)
+        self.assertEqual([e["event"] for e in events], [MODIFIED, MODIFIED])
+        self.assertEqual(events[0]["changes"], {"Date": ["18/09/2025 - 05:30", "18/09/2025 - 08:00"]})
+        self.assertEqual(set(events[1]["changes"]), {"Quai"})
+
+    def test_closer_old_row_left_to_its_match(self):
+        old = [_row("18/09/2025 - 05:30"), _row("18/09/2025 - 09:00")]
+        new = [_row("18/09/2025 - 09:00", quay="EPI SUD (POSTE N. 3 NORD)")]
+        events = diff_records(HEADERS, old, new)
+        self.assertEqual([e["event"] for e in events], [MODIFIED, REMOVED])
+        self.assertEqual(set(events[0]["changes"]), {"Quai"})
+        self.assertEqual(events[1]["record"]["Date"], "18/09/2025 - 05:30")
+
+    def test_many_rows_of_one_vessel(self):
+        # Même navire, sens et quai: la fusion triée apparie chaque ligne décalée d'une heure
+        old = [_row(f"{d:02d}/{m:02d}/2025 - 05:30") for m in range(1, 13) for d in range(1, 29)]
+        new = [_row(f"{d:02d}/{m:02d}/2025 - 06:30") for m in range(1, 13) for d in range(1, 29)]
+        self.assertEqual(_events(old, new), Counter({MODIFIED: len(old)}))
+
+    def test_rolling_window_shift(self):
+        old = [_row(f"{d:02d}/09/2025 - 05:30", f"NAVIRE {d}") for d in range(1, 11)]
+        new = [_row(f"{d:02d}/09/2026 - 05:30", f"NAVIRE {d}") for d in range(1, 11)]
+        self.assertEqual(_events(old, new), Counter({ADDED: 10, REMOVED: 10}))
+
+    def test_direction_is_part_of_key(self):
+        old = [_row("18/09/2025 - 05:30")]
+        new = [_row("18/09/2025 - 05:30", arrival=False)]
+        self.assertEqual(_events(old, new), Counter({ADDED: 1, REMOVED: 1}))
+
+    def test_unreadable_date_pairs_in_table_order(self):
+        old = [_row("à confirmer")]
+        new = [_row("18/09/2025 - 05:30")]
+        self.assertEqual(_events(old, new), Counter({MODIFIED: 1}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests de l'analyse HTML sans navigateur (python -m unittest, depuis test/).
+
+Les résultats attendus sont ceux de _SUMMARIZE_TABLES_JS dans Chromium pour le même HTML.
+"""
+
+import unittest
+
+from papeete_http import TableParser
+
+
+def _tables(html):
+    parser = TableParser()
+    parser.feed(html)
+    parser.close()
+    return {t["id"]: t for t in parser.tables}
+
+
+class TableParserTest(unittest.TestCase):
+    def test_rows_outside_sections_are_body(self):
+        # <tr> directement sous <table>: le navigateur insère un <tbody> implicite
+        table = _tables("<table id=t><tr><td>1</td><td>2</td></tr><tr><td>3</td><td>4</td></tr></table>")["t"]
+        self.assertEqual(table["headers"], [])
+        self.assertEqual(table["rows"], [["1", "2"], ["3", "4"]])
+        self.assertEqual((table["rowCount"], table["colCount"], table["score"]), (2, 2, 4))
+
+    def test_th_row_is_header_and_stays_in_body(self):
+        table = _tables("<table id=t><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>")["t"]
+        self.assertEqual(table["headers"], ["A", "B"])
+        self.assertEqual(table["rows"], [["A", "B"], ["1", "2"]])
+        self.assertEqual(table["score"], 2 * 2 + 5)
+
+    def test_last_thead_row_is_header(self):
+        table = _tables(
+            "<table id=t><thead><tr><td>Prévisions</td></tr><tr><th>A</th><th>B</th></tr></thead>"
+            "<tbody><tr><td>1</td><td>2</td></tr></tbody></table>"
+        )["t"]
+        self.assertEqual(table["headers"], ["A", "B"])
+        self.assertEqual(table["rows"], [["1", "2"]])
+
+    def test_without_body_first_th_row_is_dropped(self):
+        table = _tables(
+            "<table id=t><thead><tr><th>A</th><th>B</th></tr></thead>"
+            "<tfoot><tr><th>F</th><td>9</td></tr><tr><td>1</td><td>2</td></tr></tfoot></table>"
+        )["t"]
+        self.assertEqual(table["headers"], ["A", "B"])
+        self.assertEqual(table["rows"], [["F", "9"], ["1", "2"]])
+
+    def test_nested_table_rows_are_not_counted_for_outer_table(self):
+        tables = _tables(
+            "<table id=outer><tr><th>Nom</th><th>Détail</th></tr>"
+            "<tr><td>x</td><td><table id=inner><tr><th>K</th></tr><tr><td>1</td></tr><tr><td>2</td></tr></table></td></tr>"
+            "</table>"
+        )
+        self.assertEqual(tables["outer"]["rows"], [["Nom", "Détail"], ["x", "K 1 2"]])
+        self.assertEqual(tables["outer"]["rowCount"], 2)
+        self.assertEqual(tables["inner"]["headers"], ["K"])
+        self.assertEqual(tables["inner"]["rows"], [["K"], ["1"], ["2"]])
+
+    def test_empty_rows_are_skipped(self):
+        table = _tables("<table id=t><tbody><tr></tr><tr><td> 1 </td></tr></tbody></table>")["t"]
+        self.assertEqual(table["rows"], [["1"]])
+        self.assertEqual(table["colCount"], 1)
+
+    def test_unclosed_table_is_kept(self):
+        table = _tables("<table id=t><tr><td>1</td><td>2")["t"]
+        self.assertEqual(table["rows"], [["1", "2"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests de l'occupation des quais (python -m unittest, depuis test/)."""
+
+import csv
+import os
+import unittest
+
+from papeete_calls import pair_calls
+from papeete_occupancy import OccupancyIndex, render_report
+
+
+OUT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out.csv")
+
+
+def _call(vessel, arrival, departure, arrival_quay, departure_quay):
+    return {
+        "vessel": vessel,
+        "arrival": arrival,
+        "departure": departure,
+        "arrival_quay": arrival_quay,
+        "departure_quay": departure_quay,
+        "dwell_minutes": None,
+    }
+
+
+class OccupancyIndexTest(unittest.TestCase):
+    def test_berth_shift_occupies_both_quays(self):
+        call = _call("STAR BREEZE", "2025-09-18T05:30", "2025-09-18T17:30", "QUAI DES PAQUEBOTS", "EPI NORD")
+        index = OccupancyIndex([call])
+        self.assertEqual(set(index.quays), {"QUAI DES PAQUEBOTS", "EPI NORD"})
+        self.assertEqual(index.at("EPI NORD", "2025-09-18T12:00"), [call])
+        self.assertEqual(index.at("QUAI DES PAQUEBOTS", "2025-09-18T12:00"), [call])
+        self.assertIn("déhalage QUAI DES PAQUEBOTS -> EPI NORD", render_report(index))
+
+    def test_same_quay_indexed_once(self):
+        call = _call("PANORAMA II", "2025-09-19T06:00", "2025-09-20T06:30", "EPI SUD", "EPI SUD")
+        index = OccupancyIndex([call])
+        self.assertEqual(len(index.quays["EPI SUD"]), 1)
+        self.assertEqual(index.quays["EPI SUD"].conflicts(), [])
+
+    def test_conflict_on_departure_quay(self):
+        shifted = _call("STAR BREEZE", "2025-09-18T05:30", "2025-09-18T17:30", "QUAI DES PAQUEBOTS", "EPI NORD")
+        moored = _call("ARANUI 5", "2025-09-18T10:00", "2025-09-18T20:00", "EPI NORD", "EPI NORD")
+        conflicts = OccupancyIndex([shifted, moored]).conflicts()
+        self.assertEqual(list(conflicts), ["EPI NORD"])
+        self.assertEqual(len(conflicts["EPI NORD"]), 1)
+
+    def test_departure_quays_from_recorded_table(self):
+        with open(OUT_CSV, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        calls = pair_calls(list(rows[0]), rows)
+        index = OccupancyIndex(calls)
+        departure_quays = {c["departure_quay"] for c in calls if c["departure_quay"]}
+        self.assertTrue(departure_quays <= set(index.quays))
+        self.assertTrue(any(q.startswith("EPI NORD") for q in index.quays))
+        for quay, qi in index.quays.items():
+            expected = sum(1 for c in calls if quay in (c["arrival_quay"], c["departure_quay"]))
+            self.assertEqual(len(qi), expected, quay)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Tests du stockage en colonnes des mouvements (python -m unittest, depuis test/)."""
+
+import csv
+import math
+import os
+import unittest
+from datetime import date
+
+from papeete_records import MISSING_MINUTES, MovementColumns, VesselType
+
+
+OUT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out.csv")
+HEADERS = ["Date", "Navire", "Type", "Arrivées", "Départs", "Quai", "Longueur", "Observations"]
+
+
+def _row(**values):
+    row = dict.fromkeys(HEADERS, "")
+    row.update(
+        {
+            "Date": "18/09/2025 - 05:30",
+            "Navire": "STAR BREEZE",
+            "Type": "PAQUEBOT",
+            "Arrivées": "18/09/2025",
+            "Quai": "QUAI DES PAQUEBOTS",
+            "Longueur": "159",
+        }
+    )
+    row.update(values)
+    return row
+
+
+class MovementColumnsTest(unittest.TestCase):
+    def test_recorded_table_round_trip(self):
+        with open(OUT_CSV, encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+        headers = list(records[0])
+        columns = MovementColumns.from_records(headers, records)
+        self.assertEqual(len(columns), len(records))
+        self.assertEqual(columns.to_records(), records)
+        self.assertEqual(list(columns.to_records()[0]), headers)
+
+    def test_non_canonical_values_kept_as_exceptions(self):
+        records = [
+            _row(Longueur="156.50"),
+            _row(Type="VOILIER"),
+            _row(Date="18/09/2025 à confirmer", Arrivées="31/02/2025"),
+            _row(Longueur="258.6", Type="CARGO"),
+        ]
+        columns = MovementColumns.from_records(HEADERS, records)
+        self.assertEqual(columns.to_records(), records)
+        self.assertEqual(
+            set(columns.raw),
+            {(0, "Longueur"), (1, "Type"), (2, "Date"), (2, "Arrivées")},
+        )
+        self.assertEqual(columns.minutes[2], MISSING_MINUTES)
+
+    def test_typed_row_view(self):
+        records = [_row(), _row(Date="", Arrivées="", Départs="19/09/2025", Longueur="", Type="")]
+        columns = MovementColumns.from_records(HEADERS, records)
+        first, second = columns
+        self.assertEqual((first.when.year, first.when.hour, first.when.minute), (2025, 5, 30))
+        self.assertEqual(first.when.utcoffset().total_seconds(), -10 * 3600)
+        self.assertEqual((first.vessel_type, first.arrival, first.departure), (VesselType.PAQUEBOT, date(2025, 9, 18), None))
+        self.assertEqual(first.length, 159.0)
+        self.assertEqual(first.extra, {"Observations": ""})
+        self.assertIsNone(second.when)
+        self.assertEqual((second.vessel_type, second.departure, second.length), (VesselType.UNKNOWN, date(2025, 9, 19), None))
+        self.assertTrue(math.isnan(columns.lengths[1]))
+
+    def test_repeated_strings_stored_once(self):
+        columns = MovementColumns.from_records(HEADERS, [_row() for _ in range(50)])
+        self.assertEqual(columns.vessels.values, ["STAR BREEZE"])
+        self.assertEqual(list(columns.quays.codes), [0] * 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests de l'historique SQLite (python -m unittest, depuis test/)."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from papeete_store import HistoryStore
+
+
+HEADERS = ["Date", "Navire", "Type", "Arrivées", "Départs", "Quai"]
+META = {"source_url": "https://example.invalid/previsions", "engine": "http"}
+
+
+def _row(date: str, vessel: str = "STAR BREEZE", quay: str = "QUAI DES PAQUEBOTS", arrival: bool = True):
+    day = date[:10]
+    return {
+        "Date": date,
+        "Navire": vessel,
+        "Type": "PAQUEBOT",
+        "Arrivées": day if arrival else "",
+        "Départs": "" if arrival else day,
+        "Quai": quay,
+    }
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = HistoryStore(os.path.join(self.tmp, "historique.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _movements(self):
+        return self.store.conn.execute(
+            "SELECT ts, vessel, direction, quay, first_run, last_run FROM movements ORDER BY ts, direction, quay"
+        ).fetchall()
+
+    def test_same_table_twice_updates_without_new_rows(self):
+        rows = [_row("18/09/2025 - 05:30"), _row("18/09/2025 - 17:30", arrival=False), _row("19/09/2025 - 06:00", "PANORAMA II")]
+        first = self.store.record_run(HEADERS, rows, META, scraped_at="2025-09-17T00:00:00+00:00")
+        second = self.store.record_run(HEADERS, rows, META, scraped_at="2025-09-17T06:00:00+00:00")
+        self.assertEqual((first["inserted"], first["updated"]), (3, 0))
+        self.assertEqual((second["inserted"], second["updated"]), (0, 3))
+        movements = self._movements()
+        self.assertEqual(len(movements), 3)
+        self.assertTrue(all(m[4] == first["run_id"] and m[5] == second["run_id"] for m in movements))
+        seen = self.store.conn.execute("SELECT DISTINCT first_seen, last_seen FROM movements").fetchall()
+        self.assertEqual(seen, [("2025-09-17T00:00:00+00:00", "2025-09-17T06:00:00+00:00")])
+
+    def test_key_is_iso_datetime_vessel_direction_quay(self):
+        self.store.record_run(HEADERS, [_row("18/09/2025 - 05:30")], META)
+        self.assertEqual(self._movements()[0][:4], ("2025-09-18T05:30", "STAR BREEZE", "arrival", "QUAI DES PAQUEBOTS"))
+        # Autre quai ou autre sens: nouveau mouvement; autre valeur hors clé: mise à jour
+        moved = _row("18/09/2025 - 05:30", quay="EPI NORD")
+        departure = _row("18/09/2025 - 05:30", arrival=False)
+        retyped = dict(_row("18/09/2025 - 05:30"), Type="CARGO")
+        counts = self.store.record_run(HEADERS, [moved, departure, retyped], META)
+        self.assertEqual((counts["inserted"], counts["updated"]), (2, 1))
+        self.assertEqual(len(self._movements()), 3)
+        record, vessel_type = self.store.conn.execute(
+            "SELECT record, vessel_type FROM movements WHERE quay = 'QUAI DES PAQUEBOTS' AND direction = 'arrival'"
+        ).fetchone()
+        self.assertEqual(vessel_type, "CARGO")
+        self.assertEqual(json.loads(record), retyped)
+
+    def test_duplicates_in_one_table_counted_once(self):
+        rows = [_row("18/09/2025 - 05:30"), _row("18/09/2025 - 05:30")]
+        counts = self.store.record_run(HEADERS, rows, META)
+        self.assertEqual((counts["inserted"], counts["updated"]), (1, 0))
+        row_count, inserted = self.store.conn.execute(
+            "SELECT row_count, inserted FROM runs WHERE id = ?", (counts["run_id"],)
+        ).fetchone()
+        self.assertEqual((row_count, inserted), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()